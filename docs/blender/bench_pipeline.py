@@ -0,0 +1,227 @@
+# bench_pipeline.py
+# Plain CPython driver: runs the Blender generator (and preview renderer) headless with per-stage
+# timing enabled, appends the result to a JSON history file and prints a comparison against the
+# previous run.
+#
+# Stages (see build_profiling.py): primitive, modifier_apply, join, set_origin_bottom, export,
+# preview_import, preview_render. Times are self times per prop variant, so they add up.
+#
+# Variant seeds use hash(base_name), which Python salts per process; the driver pins
+# PYTHONHASHSEED (and passes --python-use-system-env so Blender honours it) so every run builds
+# identical geometry.
+#
+# render_previews_svg.py reuses tiles from previews/_cache by content hash, so with --repeat > 1 or
+# an --out folder from an earlier run the preview stages would time cache hits. Previews run with
+# --no-cache unless --warm-cache asks for the cached path; the mode is stored with the run and shown
+# in the report.
+#
+# Usage:
+#   python bench_pipeline.py --blender /Applications/Blender.app/Contents/MacOS/Blender [--repeat 3]
+#   python bench_pipeline.py --compare-only
+#
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# =========================
+# CONFIG
+# =========================
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_GENERATOR = SCRIPT_DIR / "file6.py"
+PREVIEW_SCRIPT = SCRIPT_DIR / "render_previews_svg.py"
+DEFAULT_HISTORY = SCRIPT_DIR / "out" / "bench_history.json"
+BENCH_HASH_SEED = "0"
+
+# =========================
+# RUNNING BLENDER
+# =========================
+def blender_version(blender):
+    try:
+        out = subprocess.run([blender, "--version"], capture_output=True, text=True, check=True).stdout
+        return out.splitlines()[0].strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def git_rev():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+                             capture_output=True, text=True, check=True).stdout
+        return out.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def run_blender_script(blender, script, export_dir, stage_json, extra_args=()):
+    """Run one script headless with stage timing; return (process wall seconds, stage rows)."""
+    env = dict(os.environ)
+    env["PYTHONHASHSEED"] = BENCH_HASH_SEED
+    cmd = [
+        blender, "--background", "--factory-startup", "--python-use-system-env",
+        "--python", str(script), "--", str(export_dir), "--stage-times", str(stage_json),
+        *extra_args,
+    ]
+    t0 = time.perf_counter()
+    subprocess.run(cmd, env=env, check=True)
+    wall = time.perf_counter() - t0
+    with open(stage_json, "r", encoding="utf-8") as f:
+        return wall, json.load(f)["stages"]
+
+# =========================
+# AGGREGATION
+# =========================
+def merge_runs(runs):
+    """Best-of-N per (prop, variant, stage): min wall and min cpu across repeats."""
+    best = {}
+    for rows in runs:
+        for r in rows:
+            key = f"{r['prop']}/v{r['variant']}" if r["variant"] >= 0 else r["prop"]
+            cur = best.setdefault(key, {}).get(r["stage"])
+            if cur is None:
+                best[key][r["stage"]] = {"calls": r["calls"], "wall": r["wall"], "cpu": r["cpu"]}
+            else:
+                cur["wall"] = min(cur["wall"], r["wall"])
+                cur["cpu"] = min(cur["cpu"], r["cpu"])
+    return best
+
+def stage_totals(variants):
+    totals = {}
+    for stages in variants.values():
+        for name, s in stages.items():
+            t = totals.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0})
+            t["calls"] += s["calls"]
+            t["wall"] += s["wall"]
+            t["cpu"] += s["cpu"]
+    return totals
+
+# =========================
+# HISTORY + REPORT
+# =========================
+def load_history(path):
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_history(path, history):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=1)
+
+def _pct_change(old, new):
+    return 100.0 * (new - old) / old if old > 0 else float("inf") if new > 0 else 0.0
+
+def print_record(rec):
+    print(f"Run {rec['timestamp']}  rev {rec['gitRev'] or '?'}  {rec['blender']}  label '{rec['label']}'")
+    if rec.get("previewCache"):
+        print(f"  previews with a {rec['previewCache']} tile cache")
+    for name, secs in rec["processWall"].items():
+        print(f"  {name:<10} process wall {secs:8.2f}s")
+    print(f"  {'stage':<18} {'calls':>7} {'wall s':>9} {'cpu s':>9}")
+    for name, t in sorted(rec["stageTotals"].items(), key=lambda kv: -kv[1]["wall"]):
+        print(f"  {name:<18} {t['calls']:>7} {t['wall']:>9.3f} {t['cpu']:>9.3f}")
+
+def print_comparison(old, new, threshold=10.0, top=10):
+    print(f"\nCompared with {old['timestamp']} (rev {old['gitRev'] or '?'}, label '{old['label']}'):")
+    if old.get("previewCache") != new.get("previewCache"):
+        print(f"  note: preview tile cache was {old.get('previewCache') or 'not recorded'} before and "
+              f"{new.get('previewCache') or 'not recorded'} now; preview stages are not comparable")
+    print(f"  {'stage':<18} {'before s':>9} {'after s':>9} {'change':>8}")
+    names = sorted(set(old["stageTotals"]) | set(new["stageTotals"]))
+    for name in names:
+        a = old["stageTotals"].get(name, {}).get("wall", 0.0)
+        b = new["stageTotals"].get(name, {}).get("wall", 0.0)
+        pct = _pct_change(a, b)
+        flag = "  <-- slower" if pct > threshold else ""
+        print(f"  {name:<18} {a:>9.3f} {b:>9.3f} {pct:>+7.1f}%{flag}")
+
+    deltas = []
+    for key in set(old["variants"]) | set(new["variants"]):
+        a = sum(s["wall"] for s in old["variants"].get(key, {}).values())
+        b = sum(s["wall"] for s in new["variants"].get(key, {}).values())
+        deltas.append((b - a, key, a, b))
+    deltas.sort(key=lambda d: -abs(d[0]))
+    print("\n  Largest per-variant changes (wall):")
+    for delta, key, a, b in deltas[:top]:
+        print(f"  {key:<26} {a:>8.3f}s -> {b:>8.3f}s ({_pct_change(a, b):+.1f}%)")
+
+# =========================
+# MAIN
+# =========================
+def parse_args():
+    ap = argparse.ArgumentParser(description="Per-stage benchmark for the prop generation pipeline.")
+    ap.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    ap.add_argument("--generator", default=str(DEFAULT_GENERATOR), help="generator script to benchmark")
+    ap.add_argument("--out", default=None, help="export dir for the benchmark build (default: temp dir)")
+    ap.add_argument("--history", default=str(DEFAULT_HISTORY), help="JSON history file")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per script; best time per stage is kept")
+    ap.add_argument("--skip-previews", action="store_true")
+    ap.add_argument("--warm-cache", action="store_true",
+                    help="let the previews reuse cached tiles (default: render every tile, --no-cache)")
+    ap.add_argument("--label", default="", help="free-form note stored with the run")
+    ap.add_argument("--threshold", type=float, default=10.0, help="percent slowdown flagged in the report")
+    ap.add_argument("--compare-only", action="store_true", help="report the last two history entries")
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+    history_path = Path(args.history)
+    history = load_history(history_path)
+
+    if args.compare_only:
+        if not history:
+            sys.exit(f"No history at {history_path}")
+        print_record(history[-1])
+        if len(history) > 1:
+            print_comparison(history[-2], history[-1], args.threshold)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="park_bench_") as tmp:
+        tmp = Path(tmp)
+        export_dir = Path(args.out) if args.out else tmp / "park_pack"
+        export_dir.mkdir(parents=True, exist_ok=True)
+
+        scripts = [("generator", Path(args.generator), [])]
+        if not args.skip_previews:
+            scripts.append(("previews", PREVIEW_SCRIPT, [] if args.warm_cache else ["--no-cache"]))
+
+        process_wall = {}
+        runs = []
+        for name, script, extra_args in scripts:
+            best_wall = float("inf")
+            for i in range(args.repeat):
+                wall, rows = run_blender_script(args.blender, script, export_dir, tmp / f"{name}_{i}.json",
+                                                extra_args)
+                best_wall = min(best_wall, wall)
+                runs.append(rows)
+            process_wall[name] = best_wall
+
+    variants = merge_runs(runs)
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "label": args.label,
+        "gitRev": git_rev(),
+        "blender": blender_version(args.blender),
+        "generator": Path(args.generator).name,
+        "repeat": args.repeat,
+        "hashSeed": BENCH_HASH_SEED,
+        "previewCache": None if args.skip_previews else ("warm" if args.warm_cache else "cold"),
+        "processWall": process_wall,
+        "stageTotals": stage_totals(variants),
+        "variants": variants,
+    }
+
+    print_record(record)
+    if history:
+        print_comparison(history[-1], record, args.threshold)
+
+    history.append(record)
+    save_history(history_path, history)
+    print("\nHistory:", str(history_path))
+
+if __name__ == "__main__":
+    main()
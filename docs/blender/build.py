@@ -0,0 +1,294 @@
+# build.py
+# Plain CPython build orchestrator (replaces the hard-coded build.sh): the pack build as a DAG of
+# tasks, each wrapping one of the existing scripts, with declared inputs and outputs.
+#
+#   generate   Blender: the generator (variantWatchv5.py) streaming variant GLBs + metadata
+#   pack       glb_pack.py: variant GLBs -> park_props_pack_all.glb
+#   previews   render_previews_parallel.py (or vector_previews.py with --vector-previews)
+#   atlas      thumb_atlas.py: preview thumbnails -> previews/ui_atlas.json (raster previews only)
+#   impostors  Blender: render_impostors.py for the large tier
+#
+#   generate -> pack, previews -> atlas, impostors
+#
+# Every task writes only its own declared outputs. In particular park_props_metadata.json is written
+# by generate alone (impostors go to impostors/impostors.json), so pack, previews and impostors can
+# read it concurrently and a later run still finds generate up to date.
+#
+# Independent tasks run concurrently (--jobs). A task is skipped when its outputs exist and the
+# signature of its inputs (sha256 of the command line, of every input file and of the sibling
+# modules its script imports) matches the one recorded in <export_dir>/.build_state.json by its
+# last successful run; a task whose dependency ran this build always runs. Task output goes to
+# <export_dir>/_build/<task>.log.
+#
+# Variant seeds use hash(base_name), so Blender tasks pin PYTHONHASHSEED (as bench_pipeline.py does)
+# and unchanged scripts reproduce unchanged GLBs.
+#
+# Usage:
+#   python build.py ./out/park_pack --blender /Applications/Blender.app/Contents/MacOS/Blender
+#   python build.py ./out/park_pack previews atlas --jobs 2
+#   python build.py ./out/park_pack --dry-run
+#   python build.py ./out/park_pack --tiers large   # rebuild one tier, merged into the existing metadata
+#
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import prop_filter
+
+# =========================
+# CONFIG
+# =========================
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_GENERATOR = SCRIPT_DIR / "variantWatchv5.py"
+METADATA_NAME = "park_props_metadata.json"
+PACK_NAME = "park_props_pack_all.glb"
+STATE_NAME = ".build_state.json"
+LOG_DIR_NAME = "_build"
+BUILD_HASH_SEED = "0"
+SIBLING_IMPORT = re.compile(r"^\s*(?:import|from)\s+(\w+)", re.MULTILINE)
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Build the prop pack as a DAG of tasks.")
+    ap.add_argument("export_dir")
+    ap.add_argument("targets", nargs="*", help="tasks to bring up to date (with their dependencies); default: all")
+    ap.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    ap.add_argument("--generator", default=str(DEFAULT_GENERATOR))
+    ap.add_argument("--jobs", type=int, default=2, help="tasks running at once")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                    help="Blender processes for the previews task")
+    ap.add_argument("--vector-previews", action="store_true",
+                    help="previews task writes vector sheets (vector_previews.py, no Blender, no atlas)")
+    prop_filter.add_args(ap)  # passed to generate and the Blender previews
+    ap.add_argument("--force", action="store_true", help="run the selected tasks even if up to date")
+    ap.add_argument("--dry-run", action="store_true", help="print what would run and exit")
+    return ap.parse_args()
+
+# =========================
+# TASKS
+# =========================
+class Task:
+    """
+    One build step. inputs / outputs / command are called with the build context once the
+    task's dependencies have finished, so inputs may list files those dependencies produced.
+    """
+
+    def __init__(self, name, deps, inputs, outputs, command, blender=False):
+        self.name = name
+        self.deps = deps
+        self.inputs = inputs
+        self.outputs = outputs
+        self.command = command
+        self.blender = blender
+
+def script_inputs(script: Path, seen=None):
+    """The script plus every sibling module it imports, recursively."""
+    seen = set() if seen is None else seen
+    script = Path(script).resolve()
+    if script in seen or not script.exists():
+        return seen
+    seen.add(script)
+    for name in SIBLING_IMPORT.findall(script.read_text(encoding="utf-8")):
+        script_inputs(script.parent / f"{name}.py", seen)
+    return seen
+
+def variant_glbs(export_dir: Path):
+    """Variant GLBs listed by the generator's metadata (what downstream tasks consume)."""
+    meta = export_dir / METADATA_NAME
+    if not meta.exists():
+        return []
+    data = json.loads(meta.read_text(encoding="utf-8"))
+    return [export_dir / v["file"] for p in data["props"] for v in p["variants"]]
+
+def blender_cmd(args, script, *script_args):
+    return [args.blender, "--background", "--factory-startup", "--python-use-system-env",
+            "--python", str(script), "--", *map(str, script_args)]
+
+def define_tasks(args, export_dir: Path):
+    preview_dir = export_dir / "previews"
+    python = sys.executable
+
+    def glbs_and(*scripts):
+        return lambda: [*variant_glbs(export_dir), *(p for s in scripts for p in script_inputs(SCRIPT_DIR / s))]
+
+    tasks = [
+        Task("generate", [],
+             inputs=lambda: script_inputs(args.generator),
+             outputs=lambda: [export_dir / METADATA_NAME, *variant_glbs(export_dir)],
+             command=lambda: blender_cmd(args, args.generator, export_dir, "--stream", "--no-pack",
+                                          *prop_filter.forward_args(args)),
+             blender=True),
+        Task("pack", ["generate"],
+             inputs=glbs_and("glb_pack.py"),
+             outputs=lambda: [export_dir / PACK_NAME],
+             command=lambda: [python, str(SCRIPT_DIR / "glb_pack.py"), str(export_dir / PACK_NAME),
+                              *map(str, variant_glbs(export_dir))]),
+        Task("impostors", ["generate"],
+             inputs=glbs_and("render_impostors.py"),
+             outputs=lambda: [export_dir / "impostors" / "impostors.json"],
+             command=lambda: blender_cmd(args, SCRIPT_DIR / "render_impostors.py", export_dir),
+             blender=True),
+    ]
+    if args.vector_previews:
+        tasks.append(Task("previews", ["generate"],
+                          inputs=glbs_and("vector_previews.py"),
+                          outputs=lambda: [preview_dir / "_preview_index.html"],
+                          command=lambda: [python, str(SCRIPT_DIR / "vector_previews.py"), str(export_dir)]))
+    else:
+        tasks.append(Task("previews", ["generate"],
+                          inputs=glbs_and("render_previews_parallel.py", "render_previews_svg.py"),
+                          outputs=lambda: [preview_dir / "_preview_index.html"],
+                          command=lambda: [python, str(SCRIPT_DIR / "render_previews_parallel.py"), str(export_dir),
+                                           "--blender", args.blender, "--workers", str(args.workers),
+                                           *prop_filter.forward_args(args)],
+                          blender=True))
+        tasks.append(Task("atlas", ["previews"],
+                          inputs=lambda: [*sorted(preview_dir.glob("*.svg")), *sorted(preview_dir.glob("tiles/*.png")),
+                                          *script_inputs(SCRIPT_DIR / "thumb_atlas.py")],
+                          outputs=lambda: [preview_dir / "ui_atlas.json"],
+                          command=lambda: [python, str(SCRIPT_DIR / "thumb_atlas.py"), str(preview_dir)]))
+    return {t.name: t for t in tasks}
+
+def select(tasks, targets):
+    """The targets plus everything they depend on, in definition (topological) order."""
+    unknown = [t for t in targets if t not in tasks]
+    if unknown:
+        sys.exit(f"Unknown task(s): {', '.join(unknown)} (have: {', '.join(tasks)})")
+    wanted = set()
+
+    def add(name):
+        if name not in wanted:
+            wanted.add(name)
+            for dep in tasks[name].deps:
+                add(dep)
+
+    for name in targets or tasks:
+        add(name)
+    return [name for name in tasks if name in wanted]
+
+# =========================
+# UP-TO-DATE CHECKS
+# =========================
+def file_digest(path: Path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def signature(task):
+    """sha256 over the command line and the content of every input file."""
+    h = hashlib.sha256()
+    h.update("\0".join(task.command()).encode("utf-8"))
+    for path in sorted({Path(p).resolve() for p in task.inputs()}):
+        h.update(f"\0{path}\0".encode("utf-8"))
+        h.update(file_digest(path).encode("ascii") if path.exists() else b"missing")
+    return h.hexdigest()
+
+def load_state(path: Path):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def up_to_date(task, sig, state):
+    return state.get(task.name, {}).get("signature") == sig and all(Path(p).exists() for p in task.outputs())
+
+# =========================
+# RUNNING
+# =========================
+def run_task(task, log_path: Path):
+    env = dict(os.environ)
+    if task.blender:
+        env["PYTHONHASHSEED"] = BUILD_HASH_SEED
+    t0 = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        code = subprocess.run(task.command(), stdout=log, stderr=subprocess.STDOUT, env=env).returncode
+    return code, time.perf_counter() - t0
+
+def main():
+    args = parse_args()
+    export_dir = Path(args.export_dir).resolve()
+    args.generator = Path(args.generator).resolve()
+    tasks = define_tasks(args, export_dir)
+    order = select(tasks, args.targets)
+
+    state_path = export_dir / STATE_NAME
+    state = load_state(state_path)
+    log_dir = export_dir / LOG_DIR_NAME
+
+    if args.dry_run:
+        # signatures use the current tree; a task below one that would run runs too
+        will_run = set()
+        for name in order:
+            task = tasks[name]
+            stale = args.force or any(d in will_run for d in task.deps) or not up_to_date(task, signature(task), state)
+            if stale:
+                will_run.add(name)
+            print(f"{name:10s} {'run' if stale else 'up to date'}")
+        return
+
+    log_dir.mkdir(parents=True, exist_ok=True)
+    lock = threading.Lock()
+    done, ran, failed = set(), set(), set()
+    pending = list(order)
+    running = {}
+    t0 = time.perf_counter()
+
+    def execute(name):
+        task = tasks[name]
+        sig = signature(task)
+        if not (args.force or any(d in ran for d in task.deps)) and up_to_date(task, sig, state):
+            return name, None, 0.0
+        print(f"[{name}] running")
+        code, seconds = run_task(task, log_dir / f"{name}.log")
+        if code == 0:
+            with lock:
+                # re-read the inputs: the task may have rewritten files it also reads
+                state[name] = {"signature": signature(task), "seconds": round(seconds, 2)}
+                export_dir.mkdir(parents=True, exist_ok=True)
+                state_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        return name, code, seconds
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        while pending or running:
+            for name in list(pending):
+                deps = tasks[name].deps
+                if any(d in failed for d in deps):
+                    pending.remove(name)
+                    failed.add(name)
+                    print(f"[{name}] skipped (dependency failed)")
+                elif all(d in done for d in deps if d in order):
+                    pending.remove(name)
+                    running[pool.submit(execute, name)] = name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, code, seconds = future.result()
+                del running[future]
+                if code is None:
+                    done.add(name)
+                    print(f"[{name}] up to date")
+                elif code == 0:
+                    done.add(name)
+                    ran.add(name)
+                    print(f"[{name}] done in {seconds:.1f}s")
+                else:
+                    failed.add(name)
+                    print(f"[{name}] FAILED (exit {code}), see {log_dir / f'{name}.log'}")
+
+    print(f"Build: {len(ran)} ran, {len(done) - len(ran)} up to date, {len(failed)} failed "
+          f"in {time.perf_counter() - t0:.1f}s")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
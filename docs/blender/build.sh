@@ -1,11 +1,4 @@
-#/Applications/Blender.app/Contents/MacOS/Blender \
-#  --background \
-#  --factory-startup \
-#  --python ./3VariantsWithStickersV4.py
-
-
-
-
-
-/Applications/Blender.app/Contents/MacOS/Blender --background --factory-startup \
-  --python ./variantWatchv5.py -- /Users/paul/gitHub/corn-hole/docs/blender/out/park_pack
+#!/bin/sh
+# Full pack build: see build.py (task DAG, incremental). Extra arguments go to build.py.
+BLENDER="${BLENDER:-/Applications/Blender.app/Contents/MacOS/Blender}" \
+  exec python3 "$(dirname "$0")/build.py" "$(dirname "$0")/out/park_pack" "$@"
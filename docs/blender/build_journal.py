@@ -0,0 +1,122 @@
+# build_journal.py
+# Plain Python (no bpy import): append-only checkpoint journal for resumable builds (--resume).
+#
+# One JSON line per finished unit of work (a generator variant, a preview sheet):
+#   {"key": "PROP_Bench_v1", "build": "<sha256>", "outputs": {"PROP_Bench_v1.glb": "<sha256>"}, "fragment": {...}}
+# "outputs" are paths relative to the journal's folder with their content hashes; "fragment" is the
+# unit's piece of the final result (e.g. its metadata entry). "build" identifies the script and
+# settings that wrote the line. Every line is flushed and fsync'ed before the run moves on, so a
+# crash or kill loses at most the unit in flight.
+#
+# A fresh run starts a new journal. With --resume the journal is kept and a unit is skipped when its
+# entry has the same "build" and all of its outputs still hash the same; a torn last line (the run
+# was killed mid-write) is ignored.
+#
+import hashlib
+import json
+import os
+from pathlib import Path
+
+def file_sha256(path: Path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def shard_name(name, shard, count):
+    """Journal file of one of `count` parallel workers: _journal.jsonl -> _journal_<shard>of<count>.jsonl."""
+    stem, dot, ext = name.rpartition(".")
+    return f"{stem}_{shard}of{count}{dot}{ext}"
+
+def _outputs_match(root: Path, outputs):
+    for name, digest in outputs.items():
+        path = root / name
+        if not path.exists() or file_sha256(path) != digest:
+            return False
+    return True
+
+def finished(path: Path):
+    """{key: fragment} of the units in a journal file whose outputs are unchanged, whatever wrote them."""
+    path = Path(path)
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return {}
+    out = {}
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if _outputs_match(path.parent, entry["outputs"]):
+            out[entry["key"]] = entry["fragment"]
+    return out
+
+def build_id(*parts):
+    """sha256 over the given strings: script hashes, settings JSON, ..."""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+class Journal:
+    def __init__(self, path: Path, build, resume=False):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self.build = build
+        self._torn = False
+        self.entries = self._load() if resume else {}
+        self.resumed = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        if self._torn:
+            self._file.write("\n")
+
+    def _load(self):
+        entries = {}
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return entries
+        self._torn = bool(text) and not text.endswith("\n")
+        stale = 0
+        for line in text.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn line of a killed run
+            if entry.get("build") == self.build:
+                entries[entry["key"]] = entry
+            else:
+                stale += 1
+        if stale:
+            print(f"Journal: ignoring {stale} entries written by a different script or settings ({self.path.name})")
+        return entries
+
+    def get(self, key, accept=None):
+        """
+        The fragment journalled for `key` if all its outputs are unchanged and accept(fragment)
+        agrees (e.g. the sources it was built from are the same), else None.
+        """
+        entry = self.entries.get(key)
+        if entry is None or not _outputs_match(self.root, entry["outputs"]):
+            return None
+        if accept is not None and not accept(entry["fragment"]):
+            return None
+        self.resumed += 1
+        return entry["fragment"]
+
+    def record(self, key, outputs, fragment):
+        """Append a finished unit; outputs are paths inside the journal's folder."""
+        entry = {
+            "key": key,
+            "build": self.build,
+            "outputs": {Path(p).relative_to(self.root).as_posix(): file_sha256(p) for p in outputs},
+            "fragment": fragment,
+        }
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+        if self.resumed:
+            print(f"Journal: resumed {self.resumed} finished units from {self.path}")
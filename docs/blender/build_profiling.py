@@ -0,0 +1,222 @@
+# build_profiling.py
+# Opt-in instrumentation shared by the generator scripts and render_previews_svg.py.
+# Plain Python (no bpy import) so it can be imported from Blender or from bench_pipeline.py.
+#
+# Scripts wrap their helpers with @timed("<stage>") and set the current prop/variant with
+# set_context(); nothing is recorded until one of the enable_* calls, so the default build is
+# unaffected. Three independent outputs:
+#   - stage times (enable):            self wall/CPU per prop variant and stage, for bench_pipeline.py
+#   - Chrome trace (enable_trace):     nested spans with prop/variant/part args; open in Perfetto
+#                                      (ui.perfetto.dev) or chrome://tracing
+#   - cProfile (enable_cprofile):      one .prof file per prop
+#
+# Stage times are *self* times: a stage nested in another (e.g. set_origin_bottom inside join) is
+# subtracted from its parent, so per-stage totals add up to the instrumented wall time.
+#
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+# =========================
+# STAGES
+# =========================
+STAGE_PRIMITIVE = "primitive"
+STAGE_MODIFIERS = "modifier_apply"
+STAGE_JOIN = "join"
+STAGE_ORIGIN = "set_origin_bottom"
+STAGE_EXPORT = "export"
+STAGE_PREVIEW_IMPORT = "preview_import"
+STAGE_PREVIEW_RENDER = "preview_render"
+
+GLOBAL_PROP = "(global)"
+
+_timing = False
+_trace = None           # list of Chrome trace events while tracing
+_trace_t0 = 0
+_profile_dir = None
+_profiler = None        # (prop, cProfile.Profile) for the prop being built
+_context = {"prop": GLOBAL_PROP, "variant": -1}
+_stack = []             # [child_wall, child_cpu] accumulators of the open stages
+_totals = {}            # (prop, variant, stage) -> [calls, wall, cpu]
+_outputs = {}           # output paths registered by configure()
+
+def enable():
+    """Record per-stage self times."""
+    global _timing
+    _timing = True
+
+def enable_trace():
+    """Record Chrome Trace Event spans."""
+    global _trace, _trace_t0
+    _trace = []
+    _trace_t0 = time.perf_counter_ns()
+
+def enable_cprofile(out_dir):
+    """Dump a cProfile file per prop into out_dir."""
+    global _profile_dir
+    _profile_dir = Path(out_dir)
+    _profile_dir.mkdir(parents=True, exist_ok=True)
+
+def is_enabled():
+    return _timing or _trace is not None
+
+def _now_us():
+    return (time.perf_counter_ns() - _trace_t0) / 1000.0
+
+def _emit(event):
+    event.setdefault("pid", os.getpid())
+    event.setdefault("tid", threading.get_ident())
+    _trace.append(event)
+
+def _ctx_args():
+    args = {"prop": _context["prop"]}
+    if _context["variant"] >= 0:
+        args["variant"] = _context["variant"]
+    return args
+
+def set_context(prop=GLOBAL_PROP, variant=-1):
+    """
+    Attribute subsequent stages to this prop/variant.
+    With tracing on, each context is also a top-level span; with cProfile on, a new prop
+    closes the previous prop's profile.
+    """
+    if _trace is not None:
+        if _context["variant"] >= 0:
+            _emit({"name": f"{_context['prop']} v{_context['variant']}", "ph": "E", "ts": _now_us()})
+        if variant >= 0:
+            _emit({"name": f"{prop} v{variant}", "cat": "variant", "ph": "B", "ts": _now_us(),
+                   "args": {"prop": prop, "variant": variant}})
+
+    if _profile_dir is not None and (_profiler is None or _profiler[0] != prop):
+        _switch_profiler(prop)
+
+    _context["prop"] = prop
+    _context["variant"] = variant
+
+def _switch_profiler(prop):
+    global _profiler
+    if _profiler is not None:
+        name, p = _profiler
+        p.disable()
+        p.dump_stats(str(_profile_dir / f"{name}.prof"))
+        _profiler = None
+    if prop != GLOBAL_PROP:
+        p = cProfile.Profile()
+        p.enable()
+        _profiler = (prop, p)
+
+# =========================
+# RECORDING
+# =========================
+@contextmanager
+def stage(name, span=None, part=None):
+    """
+    Time a block as `name`. `span` is the trace span name (defaults to the stage) and `part`
+    the object or file being worked on.
+    """
+    if not is_enabled():
+        yield
+        return
+
+    _stack.append([0.0, 0.0])
+    w0 = time.perf_counter()
+    c0 = time.process_time()
+    ts = _now_us() if _trace is not None else 0.0
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - w0
+        cpu = time.process_time() - c0
+        child_wall, child_cpu = _stack.pop()
+        if _stack:
+            _stack[-1][0] += wall
+            _stack[-1][1] += cpu
+
+        if _timing:
+            key = (_context["prop"], _context["variant"], name)
+            acc = _totals.setdefault(key, [0, 0.0, 0.0])
+            acc[0] += 1
+            acc[1] += wall - child_wall
+            acc[2] += cpu - child_cpu
+
+        if _trace is not None:
+            args = _ctx_args()
+            if part:
+                args["part"] = part
+            _emit({"name": span or name, "cat": name, "ph": "X", "ts": ts, "dur": wall * 1e6,
+                   "args": args})
+
+def _part_of(args, kwargs):
+    """Best-effort label for the thing a helper works on: a name argument, or an object/path name."""
+    if isinstance(kwargs.get("name"), str):
+        return kwargs["name"]
+    for a in args:
+        if isinstance(a, str):
+            return a
+    for a in args:
+        label = getattr(a, "name", None)
+        if isinstance(label, str):
+            return label
+    return None
+
+def timed(name):
+    """Decorator form of stage(); a plain call-through while instrumentation is disabled."""
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            if not is_enabled():
+                return fn(*args, **kwargs)
+            with stage(name, span=fn.__name__, part=_part_of(args, kwargs)):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+# =========================
+# OUTPUT
+# =========================
+def results(script_name=""):
+    rows = [
+        {"prop": prop, "variant": variant, "stage": name, "calls": calls, "wall": wall, "cpu": cpu}
+        for (prop, variant, name), (calls, wall, cpu) in sorted(_totals.items(), key=lambda kv: str(kv[0]))
+    ]
+    return {"script": script_name, "python": sys.version.split()[0], "stages": rows}
+
+def write_results(path, script_name=""):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results(script_name), f, indent=1)
+    print("Stage times:", str(path))
+
+def write_trace(path, script_name=""):
+    """Close any open variant span and write Chrome Trace Event JSON."""
+    set_context()
+    _emit({"name": "process_name", "ph": "M", "args": {"name": script_name or "blender"}})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": _trace, "displayTimeUnit": "ms"}, f)
+    print("Trace:", str(path))
+
+def configure(args):
+    """Enable whatever the script's --stage-times / --trace / --cprofile-dir flags ask for."""
+    _outputs["stage_times"] = getattr(args, "stage_times", None)
+    _outputs["trace"] = getattr(args, "trace", None)
+    if _outputs["stage_times"]:
+        enable()
+    if _outputs["trace"]:
+        enable_trace()
+    if getattr(args, "cprofile_dir", None):
+        enable_cprofile(args.cprofile_dir)
+
+def finish(script_name=""):
+    """Flush every output registered by configure(); call once at the end of a script."""
+    if _timing and _outputs.get("stage_times"):
+        write_results(_outputs["stage_times"], script_name)
+    if _trace is not None and _outputs.get("trace"):
+        write_trace(_outputs["trace"], script_name)
+    if _profile_dir is not None:
+        set_context()
+        print("cProfile:", str(_profile_dir))
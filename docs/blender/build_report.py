@@ -0,0 +1,42 @@
+# build_report.py
+# Plain Python (no bpy import): per-variant failure report for the generators.
+#
+# Each variant is built under an isolation boundary: an exception is recorded here with its
+# traceback, the variant's partial objects are removed (datablock_leaks.rollback_on_error) and the
+# run carries on with the next variant. The report is written at the end of every run, also when
+# nothing failed so it never shows an older run's failures, and the generator then exits non-zero
+# if anything failed. Failed variants are not journalled, so --resume retries only them.
+#
+import json
+import traceback
+from pathlib import Path
+
+class BuildReport:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.built = 0
+        self.failures = []
+
+    def add_success(self):
+        self.built += 1
+
+    def add_failure(self, label, exc, **context):
+        self.failures.append({
+            "variant": label,
+            **context,
+            "error": f"{type(exc).__name__}: {exc}",
+            "traceback": "".join(traceback.format_exception(type(exc), exc, exc.__traceback__)),
+        })
+        print(f"FAILED {label}: {type(exc).__name__}: {exc} (continuing with the next variant)")
+
+    def write(self):
+        """Write the report; returns True when nothing failed."""
+        report = {"built": self.built, "failed": len(self.failures), "failures": self.failures}
+        self.path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        if self.failures:
+            print(f"Build report: {len(self.failures)} variant(s) failed, {self.built} built -> {self.path}")
+            for f in self.failures:
+                print(f"  {f['variant']}: {f['error']}")
+        else:
+            print(f"Build report: {self.built} variants built, none failed")
+        return not self.failures
@@ -0,0 +1,527 @@
+# consumed_set_codec.py
+# Plain CPython (no Blender needed): reference encoders/decoders for the consumedSet carried by
+# SnapshotFull / SnapshotDelta, plus a benchmark that replays simulated consumption over generated
+# layouts and compares the schemes.
+#
+# Schemes: raw bitset, chunked bitset, run-length, roaring-style containers.
+# The byte layout of each scheme is documented in docs/consumedSet_sync.md ("Wire format") and pinned
+# by test vectors (--write-vectors) so the C# port can be checked byte-for-byte.
+#
+# Usage:
+#   python consumed_set_codec.py /path/to/export_dir [--counts 1000,10000,100000] [--order hilbert]
+#   python consumed_set_codec.py --write-vectors ../consumedSet_vectors.json
+#
+import argparse
+import json
+import math
+import random
+import time
+from pathlib import Path
+
+from generate_layout import CHUNK_SIZE, build_layout, load_metadata
+
+# =========================
+# CONFIG
+# =========================
+SCHEME_RAW = 0
+SCHEME_CHUNKED = 1
+SCHEME_RLE = 2
+SCHEME_ROARING = 3
+
+SCHEME_NAMES = {
+    SCHEME_RAW: "raw",
+    SCHEME_CHUNKED: "chunked",
+    SCHEME_RLE: "rle",
+    SCHEME_ROARING: "roaring",
+}
+
+ROARING_CONTAINER_BITS = 16         # low bits per container (ids >> 16 select the container)
+ROARING_ARRAY_MAX = 4096            # array container holds at most this many ids
+
+CONTAINER_ARRAY = 0
+CONTAINER_BITMAP = 1
+CONTAINER_RUN = 2
+
+DEFAULT_COUNTS = (1000, 10000, 100000)
+
+# =========================
+# VARINTS (unsigned LEB128)
+# =========================
+def write_varint(out, value):
+    if value < 0:
+        raise ValueError("varint must be non-negative")
+    while True:
+        b = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return
+
+def read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+
+# =========================
+# BITMAP HELPERS
+# =========================
+def ids_to_bitmap(ids, nbits):
+    """LSB-first bitmap: id i lives in byte i >> 3, bit i & 7."""
+    bm = bytearray((nbits + 7) // 8)
+    for i in ids:
+        bm[i >> 3] |= 1 << (i & 7)
+    return bm
+
+def bitmap_to_ids(bm, base=0, nbits=None):
+    ids = []
+    limit = len(bm) * 8 if nbits is None else nbits
+    for byte_index, b in enumerate(bm):
+        while b:
+            low = b & -b
+            bit = low.bit_length() - 1
+            i = byte_index * 8 + bit
+            if i < limit:
+                ids.append(base + i)
+            b ^= low
+    return ids
+
+def _write_header(out, scheme, object_count):
+    out.append(scheme)
+    write_varint(out, object_count)
+
+# =========================
+# RAW BITSET
+# =========================
+def encode_raw(ids, object_count):
+    out = bytearray()
+    _write_header(out, SCHEME_RAW, object_count)
+    out += ids_to_bitmap(ids, object_count)
+    return bytes(out)
+
+def _decode_raw(data, pos, object_count):
+    nbytes = (object_count + 7) // 8
+    return bitmap_to_ids(data[pos:pos + nbytes], 0, object_count)
+
+# =========================
+# CHUNKED BITSET
+# =========================
+def encode_chunked(ids, object_count, chunk_size=CHUNK_SIZE):
+    """Only chunks with at least one set bit are written (chunkId ascending)."""
+    if chunk_size % 8:
+        raise ValueError("chunk_size must be a multiple of 8")
+    by_chunk = {}
+    for i in ids:
+        by_chunk.setdefault(i // chunk_size, []).append(i % chunk_size)
+
+    out = bytearray()
+    _write_header(out, SCHEME_CHUNKED, object_count)
+    write_varint(out, chunk_size)
+    write_varint(out, len(by_chunk))
+    for chunk_id in sorted(by_chunk):
+        nbits = min(chunk_size, object_count - chunk_id * chunk_size)
+        write_varint(out, chunk_id)
+        out += ids_to_bitmap(by_chunk[chunk_id], nbits)
+    return bytes(out)
+
+def _decode_chunked(data, pos, object_count):
+    chunk_size, pos = read_varint(data, pos)
+    if chunk_size == 0 or chunk_size % 8:
+        raise ValueError(f"Invalid chunk size {chunk_size}")
+    n_chunks, pos = read_varint(data, pos)
+    ids = []
+    for _ in range(n_chunks):
+        chunk_id, pos = read_varint(data, pos)
+        if chunk_id * chunk_size >= object_count:
+            raise ValueError(f"Chunk id {chunk_id} out of range for {object_count} objects")
+        nbits = min(chunk_size, object_count - chunk_id * chunk_size)
+        nbytes = (nbits + 7) // 8
+        ids.extend(bitmap_to_ids(data[pos:pos + nbytes], chunk_id * chunk_size, nbits))
+        pos += nbytes
+    return ids
+
+# =========================
+# RUN-LENGTH
+# =========================
+def encode_rle(ids, object_count):
+    """
+    Alternating run lengths starting with a (possibly empty) run of zeros.
+    Runs stop after the last set bit; trailing zeros are implied by object_count.
+    """
+    runs = []
+    cursor = 0
+    start = None
+    prev = None
+    for i in sorted(ids):
+        if start is None:
+            start = prev = i
+        elif i == prev + 1:
+            prev = i
+        else:
+            runs.append(start - cursor)
+            runs.append(prev - start + 1)
+            cursor = prev + 1
+            start = prev = i
+    if start is not None:
+        runs.append(start - cursor)
+        runs.append(prev - start + 1)
+
+    out = bytearray()
+    _write_header(out, SCHEME_RLE, object_count)
+    write_varint(out, len(runs))
+    for r in runs:
+        write_varint(out, r)
+    return bytes(out)
+
+def _decode_rle(data, pos, object_count):
+    n_runs, pos = read_varint(data, pos)
+    ids = []
+    cursor = 0
+    for k in range(n_runs):
+        length, pos = read_varint(data, pos)
+        if k % 2:
+            ids.extend(range(cursor, cursor + length))
+        cursor += length
+    return ids
+
+# =========================
+# ROARING-STYLE CONTAINERS
+# =========================
+def _runs_of(lows):
+    runs = []
+    for v in lows:
+        if runs and v == runs[-1][0] + runs[-1][1]:
+            runs[-1][1] += 1
+        else:
+            runs.append([v, 1])
+    return runs
+
+def encode_roaring(ids, object_count):
+    """
+    One container per 2**16 id range, each stored as whichever of array / bitmap / run is smallest
+    (array only up to ROARING_ARRAY_MAX ids, as in Roaring).
+    """
+    span = 1 << ROARING_CONTAINER_BITS
+    by_key = {}
+    for i in sorted(ids):
+        by_key.setdefault(i >> ROARING_CONTAINER_BITS, []).append(i & (span - 1))
+
+    out = bytearray()
+    _write_header(out, SCHEME_ROARING, object_count)
+    write_varint(out, len(by_key))
+    for key in sorted(by_key):
+        lows = by_key[key]
+        runs = _runs_of(lows)
+
+        sizes = {
+            CONTAINER_BITMAP: span // 8,
+            CONTAINER_RUN: 4 * len(runs),
+        }
+        if len(lows) <= ROARING_ARRAY_MAX:
+            sizes[CONTAINER_ARRAY] = 2 * len(lows)
+        kind = min(sizes, key=lambda k: (sizes[k], k))
+
+        write_varint(out, key)
+        out.append(kind)
+        if kind == CONTAINER_ARRAY:
+            write_varint(out, len(lows))
+            for v in lows:
+                out += v.to_bytes(2, "little")
+        elif kind == CONTAINER_RUN:
+            write_varint(out, len(runs))
+            for start, length in runs:
+                out += start.to_bytes(2, "little")
+                out += (length - 1).to_bytes(2, "little")
+        else:
+            out += ids_to_bitmap(lows, span)
+    return bytes(out)
+
+def _decode_roaring(data, pos, object_count):
+    span = 1 << ROARING_CONTAINER_BITS
+    n_containers, pos = read_varint(data, pos)
+    ids = []
+    for _ in range(n_containers):
+        key, pos = read_varint(data, pos)
+        base = key << ROARING_CONTAINER_BITS
+        kind = data[pos]
+        pos += 1
+        if kind == CONTAINER_ARRAY:
+            n, pos = read_varint(data, pos)
+            for _ in range(n):
+                ids.append(base + int.from_bytes(data[pos:pos + 2], "little"))
+                pos += 2
+        elif kind == CONTAINER_RUN:
+            n, pos = read_varint(data, pos)
+            for _ in range(n):
+                start = int.from_bytes(data[pos:pos + 2], "little")
+                length = int.from_bytes(data[pos + 2:pos + 4], "little") + 1
+                ids.extend(range(base + start, base + start + length))
+                pos += 4
+        elif kind == CONTAINER_BITMAP:
+            ids.extend(bitmap_to_ids(data[pos:pos + span // 8], base))
+            pos += span // 8
+        else:
+            raise ValueError(f"Unknown roaring container type {kind}")
+    return ids
+
+# =========================
+# DISPATCH
+# =========================
+ENCODERS = {
+    SCHEME_RAW: encode_raw,
+    SCHEME_CHUNKED: encode_chunked,
+    SCHEME_RLE: encode_rle,
+    SCHEME_ROARING: encode_roaring,
+}
+
+_DECODERS = {
+    SCHEME_RAW: _decode_raw,
+    SCHEME_CHUNKED: _decode_chunked,
+    SCHEME_RLE: _decode_rle,
+    SCHEME_ROARING: _decode_roaring,
+}
+
+def encode(scheme, ids, object_count):
+    return ENCODERS[scheme](ids, object_count)
+
+def decode(data):
+    """Return (scheme, object_count, sorted ids) for any encoded consumedSet."""
+    scheme = data[0]
+    object_count, pos = read_varint(data, 1)
+    if scheme not in _DECODERS:
+        raise ValueError(f"Unknown consumedSet scheme {scheme}")
+    return scheme, object_count, sorted(_DECODERS[scheme](data, pos, object_count))
+
+# A SnapshotDelta carries the ids consumed since the acknowledged snapshot, encoded with the same
+# scheme; consumption is monotonic, so applying a delta is a set union.
+def apply_delta(consumed, delta_bytes):
+    _, _, ids = decode(delta_bytes)
+    consumed.update(ids)
+    return consumed
+
+# =========================
+# CONSUMPTION REPLAY
+# =========================
+def simulate_consumption(layout, holes=8, ticks=1800, snapshot_every=30, seed=0):
+    """
+    Scripted holes random-walk over the layout and eat every object within their radius.
+    Returns a list of per-snapshot lists of newly consumed objectIds (in eat order).
+    """
+    rng = random.Random(seed)
+    width = float(layout["map_size"]["width"])
+    height = float(layout["map_size"]["height"])
+    cell = 2.0
+
+    grid = {}
+    for o in layout["objects"]:
+        key = (int((o["x"] + width / 2) // cell), int((o["y"] + height / 2) // cell))
+        grid.setdefault(key, []).append((o["objectId"], o["x"], o["y"]))
+
+    state = []
+    for _ in range(holes):
+        state.append({
+            "x": rng.uniform(-width / 2, width / 2),
+            "y": rng.uniform(-height / 2, height / 2),
+            "heading": rng.uniform(-math.pi, math.pi),
+            "radius": 0.5,
+        })
+
+    consumed = set()
+    windows = []
+    window = []
+    speed = 6.0 / 30.0    # 6 m/s at 30 ticks/s
+    for tick in range(ticks):
+        for h in state:
+            h["heading"] += rng.uniform(-0.25, 0.25)
+            h["x"] = min(max(h["x"] + math.cos(h["heading"]) * speed, -width / 2), width / 2)
+            h["y"] = min(max(h["y"] + math.sin(h["heading"]) * speed, -height / 2), height / 2)
+
+            r = h["radius"]
+            r2 = r * r
+            gx0 = int((h["x"] - r + width / 2) // cell)
+            gx1 = int((h["x"] + r + width / 2) // cell)
+            gy0 = int((h["y"] - r + height / 2) // cell)
+            gy1 = int((h["y"] + r + height / 2) // cell)
+            for gx in range(gx0, gx1 + 1):
+                for gy in range(gy0, gy1 + 1):
+                    for object_id, ox, oy in grid.get((gx, gy), ()):
+                        if object_id in consumed:
+                            continue
+                        if (ox - h["x"]) ** 2 + (oy - h["y"]) ** 2 <= r2:
+                            consumed.add(object_id)
+                            window.append(object_id)
+                            h["radius"] = min(h["radius"] + 0.01, 6.0)
+
+        if (tick + 1) % snapshot_every == 0:
+            windows.append(window)
+            window = []
+    if window:
+        windows.append(window)
+    return windows
+
+# =========================
+# BENCHMARK
+# =========================
+def _time_call(fn, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+def _mean(values, scale=1.0):
+    """Mean of values * scale, or None when there were no samples (e.g. a trace with no windows)."""
+    return scale * sum(values) / len(values) if values else None
+
+def bench_layout(layout, windows, full_every=10):
+    """
+    For each scheme: mean bytes of a SnapshotFull (sampled every `full_every` windows) and of a
+    SnapshotDelta (one per window), and mean encode/decode time in microseconds, reported
+    separately for deltas and full snapshots (a full snapshot carries the whole consumed set, so
+    its timings would swamp the per-window delta timings if mixed).
+    """
+    n = layout["objectCount"]
+    results = {}
+    for scheme, name in SCHEME_NAMES.items():
+        consumed = set()
+        full_sizes, delta_sizes = [], []
+        delta_enc, delta_dec, full_enc, full_dec = [], [], [], []
+
+        for w_index, window in enumerate(windows):
+            consumed.update(window)
+
+            delta, t_enc = _time_call(encode, scheme, window, n)
+            _, t_dec = _time_call(decode, delta)
+            delta_sizes.append(len(delta))
+            delta_enc.append(t_enc)
+            delta_dec.append(t_dec)
+
+            if w_index % full_every == 0 or w_index == len(windows) - 1:
+                full, t_enc = _time_call(encode, scheme, consumed, n)
+                (_, _, decoded), t_dec = _time_call(decode, full)
+                if decoded != sorted(consumed):
+                    raise AssertionError(f"{name}: round-trip mismatch")
+                full_sizes.append(len(full))
+                full_enc.append(t_enc)
+                full_dec.append(t_dec)
+
+        results[name] = {
+            "bytesPerSnapshot": _mean(full_sizes),
+            "bytesPerDelta": _mean(delta_sizes),
+            "deltaEncodeUs": _mean(delta_enc, 1e6),
+            "deltaDecodeUs": _mean(delta_dec, 1e6),
+            "fullEncodeUs": _mean(full_enc, 1e6),
+            "fullDecodeUs": _mean(full_dec, 1e6),
+        }
+    return results
+
+def run_benchmark(metadata, counts, order="hilbert", holes=8, ticks=1800, seed=None):
+    report = []
+    for count in counts:
+        layout = build_layout(metadata, count, seed, order)
+        windows = simulate_consumption(layout, holes=holes, ticks=ticks)
+        consumed_total = sum(len(w) for w in windows)
+        report.append({
+            "objectCount": count,
+            "idOrder": order,
+            "consumed": consumed_total,
+            "snapshots": len(windows),
+            "schemes": bench_layout(layout, windows),
+        })
+    return report
+
+def _cell(value, width):
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.1f}"
+
+def print_report(report):
+    print(f"{'objects':>8} {'order':>8} {'scheme':>8} {'B/snapshot':>11} {'B/delta':>9} "
+          f"{'delta enc us':>13} {'delta dec us':>13} {'full enc us':>12} {'full dec us':>12}")
+    for row in report:
+        for name, r in row["schemes"].items():
+            print(f"{row['objectCount']:>8} {row['idOrder']:>8} {name:>8} "
+                  f"{_cell(r['bytesPerSnapshot'], 11)} {_cell(r['bytesPerDelta'], 9)} "
+                  f"{_cell(r['deltaEncodeUs'], 13)} {_cell(r['deltaDecodeUs'], 13)} "
+                  f"{_cell(r['fullEncodeUs'], 12)} {_cell(r['fullDecodeUs'], 12)}")
+
+# =========================
+# TEST VECTORS
+# =========================
+def make_test_vectors():
+    """Small deterministic cases covering every scheme and every roaring container type."""
+    rng = random.Random(20240601)
+    cases = [
+        ("empty", 1000, []),
+        ("first_bit", 1000, [0]),
+        ("last_bit", 1000, [999]),
+        ("odd_count_tail", 13, [0, 7, 8, 12]),
+        ("single_run", 3000, list(range(1020, 1100))),
+        ("sparse_random", 5000, sorted(rng.sample(range(5000), 40))),
+        ("dense_chunk", 4096, list(range(1024, 2048))),
+        ("two_containers", 70000, [5, 6, 7, 65535, 65536, 69999]),
+        ("bitmap_container", 8200, list(range(0, 8200, 2))),
+    ]
+    vectors = []
+    for name, n, ids in cases:
+        encodings = {}
+        for scheme, scheme_name in SCHEME_NAMES.items():
+            data = encode(scheme, ids, n)
+            if decode(data)[2] != sorted(ids):
+                raise AssertionError(f"vector {name}/{scheme_name}: round-trip mismatch")
+            encodings[scheme_name] = data.hex()
+        vectors.append({
+            "name": name,
+            "objectCount": n,
+            "ids": ids,
+            "encodings": encodings,
+        })
+    return {"chunkSize": CHUNK_SIZE, "vectors": vectors}
+
+# =========================
+# MAIN
+# =========================
+def parse_args():
+    ap = argparse.ArgumentParser(description="Benchmark consumedSet encodings.")
+    ap.add_argument("export_dir", nargs="?", default="/tmp/park_pack")
+    ap.add_argument("--counts", default=",".join(str(c) for c in DEFAULT_COUNTS),
+                    help="comma separated object counts")
+    ap.add_argument("--order", choices=("hilbert", "morton", "spawn"), default="hilbert")
+    ap.add_argument("--holes", type=int, default=8)
+    ap.add_argument("--ticks", type=int, default=1800, help="simulated ticks at 30 Hz")
+    ap.add_argument("--json", default=None, help="also write the report to this path")
+    ap.add_argument("--write-vectors", default=None, help="write reference test vectors and exit")
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.write_vectors:
+        vectors = make_test_vectors()
+        with open(args.write_vectors, "w", encoding="utf-8") as f:
+            # one vector per line keeps the file diffable without exploding the id lists
+            f.write('{"chunkSize": %d, "vectors": [\n' % vectors["chunkSize"])
+            f.write(",\n".join(json.dumps(v, separators=(",", ":")) for v in vectors["vectors"]))
+            f.write("\n]}\n")
+        print("Vectors:", args.write_vectors)
+        return
+
+    metadata = load_metadata(Path(args.export_dir))
+    counts = [int(c) for c in args.counts.split(",") if c.strip()]
+    report = run_benchmark(metadata, counts, args.order, args.holes, args.ticks)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print("Report:", args.json)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# datablock_leaks.py
+# Datablock leak tracking shared by the generator scripts and render_previews_svg.py (Blender only).
+#
+# Deleting an object leaves its mesh, materials and images in bpy.data with zero users; join() and
+# the glTF importer do the same for the parts they replace. Left alone, bpy.data grows for the
+# whole run and every name lookup gets slower.
+#
+#   - track(label):  counts datablocks per type around a prop / preview, purges orphans recursively
+#                    at the end and warns about growth that is still referenced afterwards
+#   - @watch:        attributes orphans to the helper that left them (self counts, like stage times)
+#   - print_summary: table of purged orphans per label and per helper
+#   - rollback_on_error: removes the objects a failing block created (per-variant failure isolation)
+#
+import bpy
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+TRACKED = (
+    "objects", "meshes", "materials", "images", "textures", "node_groups",
+    "cameras", "lights", "collections", "actions",
+)
+
+_rows = []        # (label, purged Counter, kept Counter)
+_open = []        # purged Counter of each open track()
+_helpers = {}     # helper name -> Counter of orphans left (+ "calls")
+_watch_stack = [] # orphans already attributed to nested helpers
+_warned = set()
+
+# =========================
+# COUNTING
+# =========================
+def counts():
+    return {t: len(getattr(bpy.data, t)) for t in TRACKED}
+
+def orphan_counts():
+    out = {}
+    for t in TRACKED:
+        n = sum(1 for block in getattr(bpy.data, t) if block.users == 0)
+        if n:
+            out[t] = n
+    return out
+
+def _fmt(counter):
+    return ", ".join(f"{n} {t}" for t, n in sorted(counter.items()))
+
+# =========================
+# PURGING
+# =========================
+def protect(blocks):
+    """Give datablocks a fake user so purges keep them while nothing references them (e.g. a palette)."""
+    for b in blocks:
+        b.use_fake_user = True
+
+def _remove_orphans_once():
+    removed = 0
+    for t in TRACKED:
+        coll = getattr(bpy.data, t)
+        for block in [b for b in coll if b.users == 0 and not b.use_fake_user]:
+            coll.remove(block)
+            removed += 1
+    return removed
+
+def purge():
+    """Recursively remove zero-user datablocks; returns a Counter of what was removed per type."""
+    before = counts()
+    if hasattr(bpy.data, "orphans_purge"):
+        bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+    else:
+        while _remove_orphans_once():
+            pass
+    after = counts()
+    removed = Counter({t: before[t] - after[t] for t in TRACKED if before[t] > after[t]})
+    if _open:
+        _open[-1].update(removed)
+    return removed
+
+@contextmanager
+def rollback_on_error():
+    """If the block raises, delete every object it created and purge their data, then re-raise."""
+    before = {o.as_pointer() for o in bpy.data.objects}
+    try:
+        yield
+    except Exception:
+        for o in [o for o in bpy.data.objects if o.as_pointer() not in before]:
+            bpy.data.objects.remove(o, do_unlink=True)
+        purge()
+        raise
+
+# =========================
+# TRACKING
+# =========================
+@contextmanager
+def track(label, expect=None):
+    """
+    Purge orphans after the block and record what was removed. `expect` is the per-type growth the
+    block is meant to keep (e.g. {"objects": 3, "meshes": 3} for three exported variants); anything
+    beyond that survives the purge only because something still references it, and is reported.
+    """
+    before = counts()
+    _open.append(Counter())
+    try:
+        yield
+        purge()
+    finally:
+        purged = _open.pop()
+    after = counts()
+    expect = expect or {}
+    kept = Counter({t: after[t] - before[t] - expect.get(t, 0) for t in TRACKED})
+    kept = +kept
+    _rows.append((label, purged, kept))
+    if kept:
+        print(f"Warning: {label} still holds {_fmt(kept)} after purge")
+
+def watch(fn):
+    """Record orphans a helper leaves behind; nested watched helpers are subtracted from the caller."""
+    @wraps(fn)
+    def inner(*args, **kwargs):
+        before = orphan_counts()
+        _watch_stack.append(Counter())
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            nested = _watch_stack.pop()
+            after = orphan_counts()
+            total = Counter({t: n - before.get(t, 0) for t, n in after.items()})
+            left = +(total - nested)
+            if _watch_stack:
+                _watch_stack[-1].update(+total)
+            if left:
+                acc = _helpers.setdefault(fn.__name__, Counter())
+                acc.update(left)
+                acc["calls"] += 1
+                if fn.__name__ not in _warned:
+                    _warned.add(fn.__name__)
+                    print(f"Warning: {fn.__name__}() leaves orphan datablocks ({_fmt(left)}); "
+                          "purged after each prop/preview")
+    return inner
+
+# =========================
+# REPORT
+# =========================
+def print_summary():
+    if not _rows and not _helpers:
+        return
+    cols = [t for t in TRACKED if any(p[t] or k[t] for _, p, k in _rows)]
+    total_purged = Counter()
+    total_kept = Counter()
+
+    print("\nDatablock leaks (orphans purged per label; '+n' = still referenced after purge):")
+    print(f"  {'label':<26}" + "".join(f"{t:>12}" for t in cols))
+    for label, purged, kept in _rows:
+        total_purged.update(purged)
+        total_kept.update(kept)
+        cells = "".join(f"{_cell(purged[t], kept[t]):>12}" for t in cols)
+        print(f"  {label:<26}{cells}")
+    cells = "".join(f"{_cell(total_purged[t], total_kept[t]):>12}" for t in cols)
+    print(f"  {'TOTAL':<26}{cells}")
+
+    if _helpers:
+        print("\n  Orphans left by helper:")
+        for name, acc in sorted(_helpers.items(), key=lambda kv: -sum(n for t, n in kv[1].items() if t != "calls")):
+            leaked = Counter({t: n for t, n in acc.items() if t != "calls"})
+            print(f"  {name + '()':<26} {acc['calls']:>6} calls  {_fmt(leaked)}")
+    print(f"\n  bpy.data at exit: {_fmt(Counter(counts()))}")
+
+def _cell(purged, kept):
+    if not purged and not kept:
+        return "."
+    return f"{purged}+{kept}" if kept else str(purged)
@@ -8,31 +8,76 @@
 import bpy
 import bmesh
 import math
+import os
 import json
 import random
 import sys
+import argparse
 from pathlib import Path
 
+# Sibling helper modules (Blender does not put the script folder on sys.path)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import build_profiling as prof
+import glb_pack
+import build_journal
+import build_report
+import prop_filter
+import datablock_leaks as leaks
+import render_previews_svg as previews
+from preview_index import write_index
+
 # =========================
 # CLI ARG PARSING
 # =========================
-def parse_export_dir(default="/tmp/park_pack"):
-    if "--" in sys.argv:
-        user_args = sys.argv[sys.argv.index("--") + 1:]
-        if len(user_args) >= 1 and user_args[0].strip():
-            return user_args[0]
-    return default
+def parse_args(default_export_dir="/tmp/park_pack"):
+    # Blender args end; script args begin after "--"
+    user_args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    ap = argparse.ArgumentParser(prog=Path(__file__).name)
+    ap.add_argument("export_dir", nargs="?", default=default_export_dir)
+    ap.add_argument("--stage-times", default=None,
+                    help="write per-stage wall/CPU times for every prop variant to this JSON file")
+    ap.add_argument("--trace", default=None,
+                    help="write a Chrome Trace Event JSON of helper spans (open in ui.perfetto.dev)")
+    ap.add_argument("--cprofile-dir", default=None, help="dump one cProfile .prof file per prop here")
+    ap.add_argument("--stream", action="store_true",
+                    help="free each variant after export and build the combined pack from the written GLBs")
+    ap.add_argument("--no-pack", action="store_true",
+                    help="skip the combined pack (build.py merges it with glb_pack.py as its own task)")
+    ap.add_argument("--previews", action="store_true",
+                    help="render the preview SVGs from the live objects (no GLB re-import by render_previews_svg.py)")
+    ap.add_argument("--preview-quality", choices=tuple(previews.QUALITY_TIERS), default="eevee",
+                    help="render tier for --previews (render_previews_svg.py --quality)")
+    ap.add_argument("--resume", action="store_true",
+                    help="skip variants an interrupted run journalled (park_props_journal.jsonl) whose GLB is unchanged")
+    prop_filter.add_args(ap)
+    args = ap.parse_args(user_args)
+    if not args.export_dir.strip():
+        args.export_dir = default_export_dir
+    return args
 
 # =========================
 # CONFIG
 # =========================
 MASTER_SEED = 1337
-EXPORT_DIR = Path(parse_export_dir())
+ARGS = parse_args()
+PARTIAL = prop_filter.is_partial(ARGS)  # --props / --tiers / --variants: merge into the existing metadata
+EXPORT_DIR = Path(ARGS.export_dir)
 EXPORT_DIR.mkdir(parents=True, exist_ok=True)
 
-EXPORT_COMBINED_PACK = True
+EXPORT_COMBINED_PACK = not ARGS.no_pack
 COMBINED_GLB_PATH = EXPORT_DIR / "park_props_pack_all.glb"
 META_PATH = EXPORT_DIR / "park_props_metadata.json"
+# One line per exported variant (GLB hash + metadata fragment), so a killed run can be resumed.
+# Variant seeds use hash(base_name), which Python salts per process: the salt (hash of a fixed
+# string) is part of the build id, so lines written under another PYTHONHASHSEED never match.
+JOURNAL = build_journal.Journal(EXPORT_DIR / "park_props_journal.jsonl",
+                                build_journal.build_id(build_journal.file_sha256(__file__), str(MASTER_SEED),
+                                                       str(hash("variant seed salt"))),
+                                resume=ARGS.resume)
+if ARGS.resume and not os.environ.get("PYTHONHASHSEED"):
+    print("Warning: --resume without a pinned PYTHONHASHSEED (and --python-use-system-env) cannot reuse any variant")
+# Variants that raised (traceback, prop, seed); written at the end, exit code 1 if any
+REPORT = build_report.BuildReport(EXPORT_DIR / "park_props_build_report.json")
 
 VARIANTS_PER_PROP = 3
 
@@ -44,11 +89,14 @@ SUBDIV_LEVEL = 1
 GRID_COLS = 10
 GRID_SPACING = 2.6
 
+prof.configure(ARGS)
+
 # =========================
 # CLEAN SCENE
 # =========================
 bpy.ops.object.select_all(action='SELECT')
 bpy.ops.object.delete(use_global=False)
+leaks.purge()
 
 bpy.context.scene.unit_settings.system = 'METRIC'
 bpy.context.scene.unit_settings.scale_length = 1.0
@@ -106,6 +154,8 @@ PALETTE = {
     "sticker_cyan": make_material("MAT_StickerCyan", (0.55, 0.95, 0.95), rough=0.75, spec=0.20),
     "sticker_lime": make_material("MAT_StickerLime", (0.75, 0.95, 0.55), rough=0.75, spec=0.20),
 }
+# palette materials sit unused between props; keep them through orphan purges
+leaks.protect(PALETTE.values())
 
 def assign_mat(obj, mat):
     if obj.data.materials:
@@ -125,6 +175,11 @@ def move_to_collection(obj, target_col):
         c.objects.unlink(obj)
     target_col.objects.link(obj)
 
+def free_variant(obj):
+    """Streaming mode: drop a finished variant and purge the mesh/material datablocks it leaves."""
+    bpy.data.objects.remove(obj, do_unlink=True)
+    leaks.purge()
+
 # =========================
 # GEOMETRY HELPERS
 # =========================
@@ -153,6 +208,8 @@ def add_subdiv(obj, level=1):
     mod.subdivision_type = 'CATMULL_CLARK'
     return mod
 
+@leaks.watch
+@prof.timed(prof.STAGE_MODIFIERS)
 def apply_modifiers(obj):
     bpy.context.view_layer.objects.active = obj
     obj.select_set(True)
@@ -160,6 +217,7 @@ def apply_modifiers(obj):
         bpy.ops.object.modifier_apply(modifier=m.name)
     obj.select_set(False)
 
+@prof.timed(prof.STAGE_ORIGIN)
 def set_origin_bottom(obj):
     bpy.context.view_layer.objects.active = obj
     obj.select_set(True)
@@ -171,6 +229,8 @@ def set_origin_bottom(obj):
     obj.location.z += local_min_z
     obj.select_set(False)
 
+@leaks.watch
+@prof.timed(prof.STAGE_JOIN)
 def join(parts, name):
     bpy.ops.object.select_all(action='DESELECT')
     for p in parts:
@@ -182,6 +242,8 @@ def join(parts, name):
     set_origin_bottom(obj)
     return obj
 
+@leaks.watch
+@prof.timed(prof.STAGE_PRIMITIVE)
 def rounded_cube(name, size=1.0, scale=(1,1,1), bevel=0.08, mat=None):
     bpy.ops.mesh.primitive_cube_add(size=size)
     obj = bpy.context.active_object
@@ -197,6 +259,8 @@ def rounded_cube(name, size=1.0, scale=(1,1,1), bevel=0.08, mat=None):
     set_origin_bottom(obj)
     return obj
 
+@leaks.watch
+@prof.timed(prof.STAGE_PRIMITIVE)
 def capsule(name, radius=0.25, length=1.2, mat=None):
     bpy.ops.mesh.primitive_cylinder_add(vertices=16, radius=radius, depth=length)
     cyl = bpy.context.active_object
@@ -228,6 +292,8 @@ def capsule(name, radius=0.25, length=1.2, mat=None):
     set_origin_bottom(obj)
     return obj
 
+@leaks.watch
+@prof.timed(prof.STAGE_PRIMITIVE)
 def simple_sphere(name, radius=0.6, mat=None, roughen=0.12, seg=16):
     bpy.ops.mesh.primitive_uv_sphere_add(segments=seg, ring_count=max(8, seg//2), radius=radius)
     obj = bpy.context.active_object
@@ -264,6 +330,8 @@ def jitter_vec3(v, pct):
 def random_yaw(max_rad=0.35):
     return random.uniform(-max_rad, max_rad)
 
+@leaks.watch
+@prof.timed(prof.STAGE_PRIMITIVE)
 def add_stickers(base_parts, count, area_min=(0.18, 0.12), area_max=(0.28, 0.18), thickness=0.02):
     """Raised sticker cubes; return sticker objects (caller joins them)."""
     stickers = []
@@ -685,11 +753,12 @@ metadata = {
     "variantsPerProp": VARIANTS_PER_PROP,
     "map_size": {"width": 80, "height": 80},
     "spawn_algo_version": 1,
+    "layoutGrid": {"cols": GRID_COLS, "spacing": GRID_SPACING},
     "props": []
 }
 
 created_objects = []
-layout_index = 0
+preview_bases = []
 
 # =========================
 # GLTF EXPORT (Blender version tolerant)
@@ -727,6 +796,8 @@ def export_selected_as_glb(filepath):
 
     bpy.ops.export_scene.gltf(**kwargs)
 
+@leaks.watch
+@prof.timed(prof.STAGE_EXPORT)
 def export_single_glb(obj, out_path):
     bpy.ops.object.select_all(action='DESELECT')
     obj.select_set(True)
@@ -736,7 +807,13 @@ def export_single_glb(obj, out_path):
 # =========================
 # BUILD + EXPORT
 # =========================
-for (base_name, tier, required_radius, area_value, score_value) in PROPS:
+if ARGS.previews:
+    previews.init(previews.parse_args([str(EXPORT_DIR), "--quality", ARGS.preview_quality]))
+    previews.setup_preview_scene(clear=False)
+
+for prop_index, (base_name, tier, required_radius, area_value, score_value) in enumerate(PROPS):
+    if not prop_filter.prop_selected(ARGS, base_name, tier):
+        continue
     entry = {
         "name": base_name,
         "tier": tier,
@@ -746,46 +823,106 @@ for (base_name, tier, required_radius, area_value, score_value) in PROPS:
         "variants": []
     }
 
-    for v in range(VARIANTS_PER_PROP):
-        variant_seed = (MASTER_SEED * 1000003) ^ (hash(base_name) & 0xFFFFFFFF) ^ (v * 9176)
-        random.seed(variant_seed)
-
-        obj = make_prop(base_name, v)
-        obj.name = f"{base_name}_v{v}"
-
-        move_to_collection(obj, props_collection)
-
-        # preview layout
-        col = layout_index % GRID_COLS
-        row = layout_index // GRID_COLS
-        obj.location = (col * GRID_SPACING, row * GRID_SPACING, 0.0)
-        obj.rotation_euler.z = random_yaw(0.35)
-        layout_index += 1
-
-        created_objects.append(obj)
-
-        glb_name = f"{base_name}_v{v}.glb"
-        glb_path = EXPORT_DIR / glb_name
-        export_single_glb(obj, glb_path)
-
-        entry["variants"].append({
-            "variantIndex": v,
-            "seed": int(variant_seed),
-            "file": glb_name
-        })
-
-    metadata["props"].append(entry)
-
-if EXPORT_COMBINED_PACK:
+    # variants kept in the scene for the combined pack are expected growth, not leaks
+    variants = [v for v in range(VARIANTS_PER_PROP) if prop_filter.variant_selected(ARGS, v)]
+    kept = 0 if ARGS.stream else len(variants)
+    preview_b64s = [None] * VARIANTS_PER_PROP  # None keeps that variant's tile from the existing sheet
+    with leaks.track(base_name, expect={"objects": kept, "meshes": kept}):
+        for v in variants:
+            variant_seed = (MASTER_SEED * 1000003) ^ (hash(base_name) & 0xFFFFFFFF) ^ (v * 9176)
+            glb_name = f"{base_name}_v{v}.glb"
+            glb_path = EXPORT_DIR / glb_name
+            # grid slot in the full, unfiltered order: partial, resumed and queued builds place
+            # every variant where a full build does
+            slot = prop_index * VARIANTS_PER_PROP + v
+
+            done = JOURNAL.get(f"{base_name}_v{v}", lambda frag: frag["seed"] == variant_seed)
+            if done is not None:
+                # exported by an interrupted run (--resume)
+                entry["variants"].append(done)
+                if ARGS.previews:
+                    preview_b64s[v] = previews.cached_tile(glb_path)
+                continue
+
+            try:
+                # one bad recipe costs this variant, not the run
+                with leaks.rollback_on_error():
+                    random.seed(variant_seed)
+                    prof.set_context(base_name, v)
+
+                    obj = make_prop(base_name, v)
+                    obj.name = f"{base_name}_v{v}"
+
+                    move_to_collection(obj, props_collection)
+
+                    # preview layout
+                    col = slot % GRID_COLS
+                    row = slot // GRID_COLS
+                    obj.location = (col * GRID_SPACING, row * GRID_SPACING, 0.0)
+                    obj.rotation_euler.z = random_yaw(0.35)
+
+                    export_single_glb(obj, glb_path)
+
+                    if ARGS.previews:
+                        preview_b64s[v] = previews.render_live_object(obj, glb_path)
+            except Exception as exc:
+                REPORT.add_failure(f"{base_name}_v{v}", exc, prop=base_name, variantIndex=v, seed=int(variant_seed))
+                if ARGS.previews:
+                    preview_b64s[v] = ""  # the sheet shows the failure, not the last run's tile
+                continue
+
+            if ARGS.stream:
+                free_variant(obj)
+            else:
+                created_objects.append(obj)
+
+            entry["variants"].append({
+                "variantIndex": v,
+                "seed": int(variant_seed),
+                "file": glb_name
+            })
+            JOURNAL.record(f"{base_name}_v{v}", [glb_path], entry["variants"][-1])
+            REPORT.add_success()
+
+    if entry["variants"]:
+        metadata["props"].append(entry)
+    if ARGS.previews:
+        previews.write_prop_svg(base_name, preview_b64s)
+        preview_bases.append(base_name)
+
+prof.set_context()
+
+if PARTIAL:
+    # props and variants this run did not rebuild keep their entries
+    metadata = prop_filter.merge_metadata(META_PATH, metadata)
+
+if EXPORT_COMBINED_PACK and (ARGS.stream or PARTIAL or ARGS.resume):
+    # variants are gone from the scene (--stream) or only some were built here; merge the files on disk
+    pack_glbs = [EXPORT_DIR / var["file"] for p in metadata["props"] for var in p["variants"]]
+    with prof.stage(prof.STAGE_EXPORT):
+        glb_pack.merge_glb_files(pack_glbs, COMBINED_GLB_PATH)
+elif EXPORT_COMBINED_PACK and created_objects:
     bpy.ops.object.select_all(action='DESELECT')
     for o in created_objects:
         o.select_set(True)
     bpy.context.view_layer.objects.active = created_objects[0]
-    export_selected_as_glb(COMBINED_GLB_PATH)
+    with prof.stage(prof.STAGE_EXPORT):
+        export_selected_as_glb(COMBINED_GLB_PATH)
 
 with open(META_PATH, "w", encoding="utf-8") as f:
     json.dump(metadata, f, indent=2)
+JOURNAL.close()
 
 print("Exported folder:", str(EXPORT_DIR))
 print("Combined pack:", str(COMBINED_GLB_PATH) if EXPORT_COMBINED_PACK else "(disabled)")
 print("Metadata:", str(META_PATH))
+
+if ARGS.previews:
+    if PARTIAL:
+        preview_bases = [p["name"] for p in metadata["props"] if (previews.PREVIEW_DIR / f"{p['name']}.svg").exists()]
+    write_index(previews.PREVIEW_DIR, preview_bases)
+
+leaks.print_summary()
+prof.finish(Path(__file__).name)
+if not REPORT.write():
+    sys.exit(1)
@@ -0,0 +1,259 @@
+# generate_layout.py
+# Plain CPython (no Blender needed): builds a deterministic spawn layout for the 80x80 map
+# from park_props_metadata.json and assigns objectIds along a space-filling curve.
+#
+# Why: consumedSet is synced as a chunked bitset (1024 objects per chunk, see docs/consumedSet_sync.md).
+# With objectIds in raw spawn order every hole touches almost every chunk; ordering ids along a
+# Morton (Z-order) or Hilbert curve keeps nearby props in the same chunk, so a hole eating in one
+# area dirties only a few chunks.
+#
+# Usage:
+#   python generate_layout.py /path/to/export_dir [--count 4096] [--seed 1337] [--curve hilbert]
+#
+import argparse
+import json
+import math
+import random
+from pathlib import Path
+
+# =========================
+# CONFIG
+# =========================
+LAYOUT_FILE_NAME = "park_layout.json"
+LAYOUT_VERSION = 1
+
+DEFAULT_OBJECT_COUNT = 4096
+CHUNK_SIZE = 1024          # objects per consumedSet chunk
+
+CURVE_BITS = 16            # quantisation per axis for curve keys
+CURVES = ("morton", "hilbert", "spawn")
+
+# Relative spawn weight per tier (lots of small clutter, few big props)
+TIER_WEIGHTS = {
+    "small": 0.60,
+    "medium": 0.30,
+    "large": 0.10,
+}
+
+# =========================
+# SPACE-FILLING CURVES
+# =========================
+def _spread_bits(v):
+    """Insert a zero bit between each of the low 16 bits of v."""
+    v &= 0xFFFF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+def morton_key(ix, iy):
+    """Z-order key for integer grid coords (x in even bits, y in odd bits)."""
+    return _spread_bits(ix) | (_spread_bits(iy) << 1)
+
+def hilbert_key(ix, iy, bits=CURVE_BITS):
+    """Distance along a Hilbert curve of side 2**bits for integer grid coords."""
+    n = 1 << bits
+    x, y = ix, iy
+    d = 0
+    s = n >> 1
+    while s > 0:
+        rx = 1 if (x & s) else 0
+        ry = 1 if (y & s) else 0
+        d += s * s * ((3 * rx) ^ ry)
+        # rotate quadrant
+        if ry == 0:
+            if rx == 1:
+                x = s - 1 - x
+                y = s - 1 - y
+            x, y = y, x
+        s >>= 1
+    return d
+
+def quantize(x, y, width, height, bits=CURVE_BITS):
+    """Map world x/y (centred on origin) to integer grid coords in [0, 2**bits)."""
+    top = (1 << bits) - 1
+    ix = int((x + width / 2.0) / width * top)
+    iy = int((y + height / 2.0) / height * top)
+    return min(max(ix, 0), top), min(max(iy, 0), top)
+
+def curve_key(curve, x, y, width, height):
+    if curve == "spawn":
+        return 0
+    ix, iy = quantize(x, y, width, height)
+    if curve == "hilbert":
+        return hilbert_key(ix, iy)
+    return morton_key(ix, iy)
+
+# =========================
+# SPAWN
+# =========================
+def load_metadata(export_dir: Path):
+    meta_path = export_dir / "park_props_metadata.json"
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def spawn_objects(metadata, count, seed):
+    """
+    Deterministic raw spawn list (spawn order), one dict per object.
+    Props are picked by tier weight, then uniformly within the tier.
+    """
+    rng = random.Random(seed)
+    width = float(metadata["map_size"]["width"])
+    height = float(metadata["map_size"]["height"])
+
+    by_tier = {}
+    for p in metadata["props"]:
+        by_tier.setdefault(p["tier"], []).append(p)
+    tiers = [t for t in TIER_WEIGHTS if t in by_tier]
+    weights = [TIER_WEIGHTS[t] for t in tiers]
+
+    objects = []
+    for spawn_index in range(count):
+        tier = rng.choices(tiers, weights=weights)[0]
+        prop = rng.choice(by_tier[tier])
+        variant = rng.randrange(len(prop["variants"]))
+
+        # keep the footprint inside the map
+        margin = float(prop["requiredRadius"])
+        x = rng.uniform(-width / 2.0 + margin, width / 2.0 - margin)
+        y = rng.uniform(-height / 2.0 + margin, height / 2.0 - margin)
+        yaw = rng.uniform(-math.pi, math.pi)
+
+        objects.append({
+            "spawnIndex": spawn_index,
+            "prop": prop["name"],
+            "variant": variant,
+            "x": round(x, 3),
+            "y": round(y, 3),
+            "yaw": round(yaw, 4),
+        })
+    return objects
+
+def assign_object_ids(objects, curve, width, height):
+    """Sort along the curve (spawn index breaks ties) and number objects 0..N-1 in that order."""
+    ordered = sorted(
+        objects,
+        key=lambda o: (curve_key(curve, o["x"], o["y"], width, height), o["spawnIndex"]),
+    )
+    for object_id, o in enumerate(ordered):
+        o["objectId"] = object_id
+    return ordered
+
+def build_chunks(ordered, chunk_size):
+    """Chunk boundaries over the objectId range plus the world-space bounds each chunk covers."""
+    chunks = []
+    for chunk_id, start in enumerate(range(0, len(ordered), chunk_size)):
+        members = ordered[start:start + chunk_size]
+        chunks.append({
+            "chunkId": chunk_id,
+            "firstObjectId": start,
+            "count": len(members),
+            "bounds": {
+                "minX": min(o["x"] for o in members),
+                "maxX": max(o["x"] for o in members),
+                "minY": min(o["y"] for o in members),
+                "maxY": max(o["y"] for o in members),
+            },
+        })
+    return chunks
+
+def build_layout(metadata, count=DEFAULT_OBJECT_COUNT, seed=None, curve="hilbert", chunk_size=CHUNK_SIZE):
+    """Full layout dict as written to park_layout.json."""
+    if curve not in CURVES:
+        raise ValueError(f"Unknown curve '{curve}' (expected one of {CURVES})")
+    if seed is None:
+        seed = int(metadata.get("masterSeed", 0))
+
+    width = float(metadata["map_size"]["width"])
+    height = float(metadata["map_size"]["height"])
+
+    objects = spawn_objects(metadata, count, seed)
+    ordered = assign_object_ids(objects, curve, width, height)
+
+    return {
+        "layoutVersion": LAYOUT_VERSION,
+        "mapSeed": seed,
+        "spawn_algo_version": metadata.get("spawn_algo_version", 1),
+        "map_size": metadata["map_size"],
+        "idOrder": curve,
+        "chunkSize": chunk_size,
+        "objectCount": len(ordered),
+        "chunks": build_chunks(ordered, chunk_size),
+        "objects": [
+            {
+                "objectId": o["objectId"],
+                "prop": o["prop"],
+                "variant": o["variant"],
+                "x": o["x"],
+                "y": o["y"],
+                "yaw": o["yaw"],
+            }
+            for o in ordered
+        ],
+    }
+
+def load_layout(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# =========================
+# LOCALITY REPORT
+# =========================
+def mean_chunks_touched(layout, radius=3.0, samples=200, seed=0):
+    """
+    Average number of distinct chunks a hole of `radius` would dirty if it ate
+    everything under it, sampled at random map positions.
+    """
+    rng = random.Random(seed)
+    width = float(layout["map_size"]["width"])
+    height = float(layout["map_size"]["height"])
+    chunk_size = layout["chunkSize"]
+    r2 = radius * radius
+
+    total = 0
+    for _ in range(samples):
+        cx = rng.uniform(-width / 2.0, width / 2.0)
+        cy = rng.uniform(-height / 2.0, height / 2.0)
+        touched = {
+            o["objectId"] // chunk_size
+            for o in layout["objects"]
+            if (o["x"] - cx) ** 2 + (o["y"] - cy) ** 2 <= r2
+        }
+        total += len(touched)
+    return total / samples
+
+# =========================
+# MAIN
+# =========================
+def parse_args():
+    ap = argparse.ArgumentParser(description="Generate a spatially ordered prop layout.")
+    ap.add_argument("export_dir", nargs="?", default="/tmp/park_pack")
+    ap.add_argument("--count", type=int, default=DEFAULT_OBJECT_COUNT, help="objects to spawn")
+    ap.add_argument("--seed", type=int, default=None, help="map seed (default: masterSeed from metadata)")
+    ap.add_argument("--curve", choices=CURVES, default="hilbert", help="objectId ordering")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    ap.add_argument("--out", default=None, help=f"output path (default: <export_dir>/{LAYOUT_FILE_NAME})")
+    ap.add_argument("--report", action="store_true", help="print chunk locality vs spawn order")
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+    export_dir = Path(args.export_dir)
+    metadata = load_metadata(export_dir)
+
+    layout = build_layout(metadata, args.count, args.seed, args.curve, args.chunk_size)
+    out_path = Path(args.out) if args.out else export_dir / LAYOUT_FILE_NAME
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(layout, f, indent=1)
+
+    print("Layout:", str(out_path))
+    print(f"Objects: {layout['objectCount']}  chunks: {len(layout['chunks'])}  order: {layout['idOrder']}")
+
+    if args.report:
+        baseline = build_layout(metadata, args.count, args.seed, "spawn", args.chunk_size)
+        print(f"Mean chunks dirtied per 3m hole: {mean_chunks_touched(layout):.2f} "
+              f"(spawn order: {mean_chunks_touched(baseline):.2f})")
+
+if __name__ == "__main__":
+    main()
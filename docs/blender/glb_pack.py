@@ -0,0 +1,240 @@
+# glb_pack.py
+# Plain Python (no bpy import): merge already-exported GLB files into one combined GLB.
+#
+# Used by the generators' streaming mode so the combined pack no longer needs every variant alive
+# in the Blender scene. Only the glTF JSON of each input is held in memory; binary chunks are
+# streamed from the inputs straight into the output.
+#
+# Supports what the prop exporters produce (meshes, materials, textures/images, morph targets);
+# skins and animations are rejected.
+#
+# Usage:
+#   python glb_pack.py out.glb a.glb b.glb ...
+#
+import json
+import struct
+import sys
+from pathlib import Path
+
+GLB_MAGIC = 0x46546C67      # "glTF"
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A     # "JSON"
+CHUNK_BIN = 0x004E4942      # "BIN\0"
+COPY_BLOCK = 1 << 20
+
+# =========================
+# READING
+# =========================
+def _pad4(n):
+    return (n + 3) & ~3
+
+def read_glb_header(path: Path):
+    """
+    Return (gltf_json, bin_offset, bin_length) without reading the binary payload.
+    bin_offset is the file position of the first BIN byte (None if there is no BIN chunk).
+    """
+    with open(path, "rb") as f:
+        magic, version, _length = struct.unpack("<III", f.read(12))
+        if magic != GLB_MAGIC or version != GLB_VERSION:
+            raise ValueError(f"{path}: not a glTF 2.0 binary file")
+        json_len, json_type = struct.unpack("<II", f.read(8))
+        if json_type != CHUNK_JSON:
+            raise ValueError(f"{path}: first chunk is not JSON")
+        gltf = json.loads(f.read(json_len).decode("utf-8"))
+
+        header = f.read(8)
+        if len(header) < 8:
+            return gltf, None, 0
+        bin_len, bin_type = struct.unpack("<II", header)
+        if bin_type != CHUNK_BIN:
+            return gltf, None, 0
+        return gltf, f.tell(), bin_len
+
+# =========================
+# MERGING
+# =========================
+class _Merger:
+    """Accumulates glTF JSON from several files, remapping indices into shared arrays."""
+
+    def __init__(self):
+        self.out = {
+            "asset": {"version": "2.0", "generator": "glb_pack.py"},
+            "scene": 0,
+            "scenes": [{"name": "Scene", "nodes": []}],
+        }
+        self.material_keys = {}
+        self.bin_length = 0
+        self.extensions_used = set()
+        self.extensions_required = set()
+
+    def _append(self, key, items):
+        arr = self.out.setdefault(key, [])
+        base = len(arr)
+        arr.extend(items)
+        return base
+
+    def add(self, gltf, bin_length):
+        if gltf.get("skins") or gltf.get("animations"):
+            raise ValueError("skins/animations are not supported by glb_pack")
+        if len(gltf.get("buffers", [])) > 1:
+            raise ValueError("only single-buffer GLBs are supported")
+
+        self.extensions_used.update(gltf.get("extensionsUsed", []))
+        self.extensions_required.update(gltf.get("extensionsRequired", []))
+        bin_base = self.bin_length
+
+        # bufferViews -> the single merged buffer
+        views = []
+        for bv in gltf.get("bufferViews", []):
+            bv = dict(bv)
+            bv["buffer"] = 0
+            bv["byteOffset"] = bv.get("byteOffset", 0) + bin_base
+            views.append(bv)
+        view_base = self._append("bufferViews", views)
+
+        accessors = []
+        for acc in gltf.get("accessors", []):
+            acc = json.loads(json.dumps(acc))
+            if "bufferView" in acc:
+                acc["bufferView"] += view_base
+            sparse = acc.get("sparse")
+            if sparse:
+                sparse["indices"]["bufferView"] += view_base
+                sparse["values"]["bufferView"] += view_base
+            accessors.append(acc)
+        acc_base = self._append("accessors", accessors)
+
+        images = []
+        for img in gltf.get("images", []):
+            img = dict(img)
+            if "bufferView" in img:
+                img["bufferView"] += view_base
+            images.append(img)
+        image_base = self._append("images", images)
+        sampler_base = self._append("samplers", gltf.get("samplers", []))
+
+        textures = []
+        for tex in gltf.get("textures", []):
+            tex = dict(tex)
+            if "source" in tex:
+                tex["source"] += image_base
+            if "sampler" in tex:
+                tex["sampler"] += sampler_base
+            textures.append(tex)
+        texture_base = self._append("textures", textures)
+
+        # materials: identical definitions (the shared palette) are stored once
+        material_map = []
+        for mat in gltf.get("materials", []):
+            mat = json.loads(json.dumps(mat))
+            _remap_texture_refs(mat, texture_base)
+            key = json.dumps(mat, sort_keys=True)
+            if key not in self.material_keys:
+                self.material_keys[key] = self._append("materials", [mat])
+            material_map.append(self.material_keys[key])
+
+        meshes = []
+        for mesh in gltf.get("meshes", []):
+            mesh = json.loads(json.dumps(mesh))
+            for prim in mesh.get("primitives", []):
+                prim["attributes"] = {k: v + acc_base for k, v in prim["attributes"].items()}
+                if "indices" in prim:
+                    prim["indices"] += acc_base
+                if "material" in prim:
+                    prim["material"] = material_map[prim["material"]]
+                if "targets" in prim:
+                    prim["targets"] = [{k: v + acc_base for k, v in t.items()} for t in prim["targets"]]
+            meshes.append(mesh)
+        mesh_base = self._append("meshes", meshes)
+        camera_base = self._append("cameras", gltf.get("cameras", []))
+
+        node_base = len(self.out.get("nodes", []))
+        nodes = []
+        for node in gltf.get("nodes", []):
+            node = dict(node)
+            if "mesh" in node:
+                node["mesh"] += mesh_base
+            if "camera" in node:
+                node["camera"] += camera_base
+            if "children" in node:
+                node["children"] = [c + node_base for c in node["children"]]
+            nodes.append(node)
+        self._append("nodes", nodes)
+
+        scenes = gltf.get("scenes", [])
+        if scenes:
+            roots = scenes[gltf.get("scene", 0)].get("nodes", [])
+        else:
+            children = {c for n in gltf.get("nodes", []) for c in n.get("children", [])}
+            roots = [i for i in range(len(nodes)) if i not in children]
+        self.out["scenes"][0]["nodes"].extend(r + node_base for r in roots)
+
+        self.bin_length += _pad4(bin_length)
+
+    def finish(self):
+        if self.bin_length:
+            self.out["buffers"] = [{"byteLength": self.bin_length}]
+        if self.extensions_used:
+            self.out["extensionsUsed"] = sorted(self.extensions_used)
+        if self.extensions_required:
+            self.out["extensionsRequired"] = sorted(self.extensions_required)
+        # drop arrays that stayed empty; glTF requires non-empty arrays when present
+        return {k: v for k, v in self.out.items() if v != []}
+
+def _remap_texture_refs(obj, texture_base):
+    """Shift every textureInfo {"index": n} inside a material by texture_base."""
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k.endswith("Texture") and isinstance(v, dict) and "index" in v:
+                v["index"] += texture_base
+            _remap_texture_refs(v, texture_base)
+    elif isinstance(obj, list):
+        for v in obj:
+            _remap_texture_refs(v, texture_base)
+
+# =========================
+# WRITING
+# =========================
+def merge_glb_files(paths, out_path):
+    """Merge GLB files into out_path; returns the number of inputs merged."""
+    paths = [Path(p) for p in paths]
+    merger = _Merger()
+    bins = []
+    for p in paths:
+        gltf, bin_offset, bin_length = read_glb_header(p)
+        merger.add(gltf, bin_length)
+        bins.append((p, bin_offset, bin_length))
+
+    json_bytes = json.dumps(merger.finish(), separators=(",", ":")).encode("utf-8")
+    json_bytes += b" " * (_pad4(len(json_bytes)) - len(json_bytes))
+    bin_total = merger.bin_length
+
+    total = 12 + 8 + len(json_bytes) + (8 + bin_total if bin_total else 0)
+    with open(out_path, "wb") as out:
+        out.write(struct.pack("<III", GLB_MAGIC, GLB_VERSION, total))
+        out.write(struct.pack("<II", len(json_bytes), CHUNK_JSON))
+        out.write(json_bytes)
+        if bin_total:
+            out.write(struct.pack("<II", bin_total, CHUNK_BIN))
+            for p, bin_offset, bin_length in bins:
+                if bin_offset is None:
+                    continue
+                with open(p, "rb") as f:
+                    f.seek(bin_offset)
+                    _copy_exact(f, out, bin_length)
+                out.write(b"\0" * (_pad4(bin_length) - bin_length))
+    return len(paths)
+
+def _copy_exact(src, dst, n):
+    while n > 0:
+        block = src.read(min(COPY_BLOCK, n))
+        if not block:
+            raise ValueError("unexpected end of BIN chunk")
+        dst.write(block)
+        n -= len(block)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("usage: python glb_pack.py out.glb in1.glb [in2.glb ...]")
+    count = merge_glb_files(sys.argv[2:], sys.argv[1])
+    print(f"Merged {count} files into {sys.argv[1]}")
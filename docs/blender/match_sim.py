@@ -0,0 +1,369 @@
+# match_sim.py
+# Plain CPython + NumPy (no Blender, no Unity): headless match simulator for balance and load testing.
+#
+# Loads park_props_metadata.json and a spawn layout (park_layout.json or generated on the fly), then
+# steps scripted holes through a match at the server tick rate using the PRD rules:
+#   - eligibility: radius >= requiredRadius and distance <= radius * INNER_CONSUME_FACTOR
+#   - arbitration: smallest distance, then larger radius, then lowest playerId
+#   - growth: holeArea += areaValue, radius = sqrt(holeArea / PI) (capped at MAX_RADIUS)
+# Many matches share one layout and are stepped together as a batch, so a tick is a handful of
+# array operations no matter how many holes or matches are in flight; batches run across processes.
+# Hole-vs-hole eating (Battle Royale) is not modelled.
+#
+# Usage:
+#   python match_sim.py /path/to/export_dir [--matches 1000] [--holes 8] [--policy wander] [--workers 8]
+#   python match_sim.py /path/to/export_dir --layout /path/to/park_layout.json --json report.json
+#
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from generate_layout import DEFAULT_OBJECT_COUNT, build_layout, load_layout, load_metadata
+
+# =========================
+# CONFIG (mirrors HolePlayer.cs / MatchTimer.cs / NetworkProjectConfig)
+# =========================
+TICK_RATE = 64                 # Fusion simulation tick rate
+MATCH_SECONDS = 120.0          # MatchTimer.matchDurationSeconds
+MOVE_SPEED = 5.0               # HolePlayer.moveSpeed (m/s)
+INITIAL_RADIUS = 1.0           # HolePlayer.initialRadius
+MAX_RADIUS = 10.0              # HolePlayer.maxRadius
+INNER_CONSUME_FACTOR = 1.0     # innerConsumeRadius = radius * factor
+TIE_EPSILON = 0.02             # metres; distances closer than this count as a tie
+
+CELL_SIZE = 2.0                # broadphase grid cell (m)
+POLICIES = ("wander", "mow")
+
+# =========================
+# WORLD
+# =========================
+class World:
+    """
+    Object arrays sorted by broadphase cell (row-major), plus a CSR cell index:
+    objects of cell c are [cell_start[c], cell_start[c + 1]).
+    Because cells are row-major, a run of cells along one grid row is one contiguous slice.
+    """
+
+    def __init__(self, metadata, layout, cell_size=CELL_SIZE):
+        props = {p["name"]: p for p in metadata["props"]}
+        self.tier_names = []
+        for p in metadata["props"]:
+            if p["tier"] not in self.tier_names:
+                self.tier_names.append(p["tier"])
+        # smallest radius that unlocks each tier
+        self.tier_thresholds = np.array([
+            min(p["requiredRadius"] for p in metadata["props"] if p["tier"] == t)
+            for t in self.tier_names
+        ])
+
+        self.width = float(layout["map_size"]["width"])
+        self.height = float(layout["map_size"]["height"])
+        self.cell_size = cell_size
+        self.grid_w = int(math.ceil(self.width / cell_size))
+        self.grid_h = int(math.ceil(self.height / cell_size))
+
+        objs = layout["objects"]
+        x = np.array([o["x"] for o in objs], dtype=np.float32)
+        y = np.array([o["y"] for o in objs], dtype=np.float32)
+        req = np.array([props[o["prop"]]["requiredRadius"] for o in objs])
+        area = np.array([props[o["prop"]]["areaValue"] for o in objs])
+        score = np.array([props[o["prop"]]["scoreValue"] for o in objs], dtype=np.int64)
+        tier = np.array([self.tier_names.index(props[o["prop"]]["tier"]) for o in objs], dtype=np.int64)
+        object_id = np.array([o["objectId"] for o in objs], dtype=np.int64)
+
+        cx, cy = self.cell_of(x, y)
+        cell = cy * self.grid_w + cx
+        order = np.argsort(cell, kind="stable")
+
+        self.x, self.y = x[order], y[order]
+        self.required_radius = req[order]
+        self.area_value = area[order]
+        self.score_value = score[order]
+        self.tier = tier[order]
+        self.object_id = object_id[order]
+        self.count = len(objs)
+
+        counts = np.bincount(cell, minlength=self.grid_w * self.grid_h)
+        self.cell_start = np.concatenate(([0], np.cumsum(counts)))
+
+    def cell_of(self, x, y):
+        cx = np.clip(((x + self.width / 2.0) // self.cell_size).astype(np.int64), 0, self.grid_w - 1)
+        cy = np.clip(((y + self.height / 2.0) // self.cell_size).astype(np.int64), 0, self.grid_h - 1)
+        return cx, cy
+
+# =========================
+# BROADPHASE
+# =========================
+def _concat_ranges(starts, lengths):
+    """Concatenate [s, s + n) for every (s, n) without a Python loop."""
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(total)
+
+def gather_candidates(world, hx, hy, reach):
+    """
+    Return (candidate hole index, candidate object index) for every object in the grid cells
+    overlapping each hole's reach square.
+    """
+    cx0, cy0 = world.cell_of(hx - reach, hy - reach)
+    cx1, cy1 = world.cell_of(hx + reach, hy + reach)
+
+    rows = cy1 - cy0 + 1
+    row_hole = np.repeat(np.arange(len(hx)), rows)
+    row = cy0[row_hole] + _concat_ranges(np.zeros(len(hx), dtype=np.int64), rows)
+
+    base = row * world.grid_w
+    starts = world.cell_start[base + cx0[row_hole]]
+    ends = world.cell_start[base + cx1[row_hole] + 1]
+    lengths = ends - starts
+
+    cand_obj = _concat_ranges(starts, lengths)
+    cand_hole = np.repeat(row_hole, lengths)
+    return cand_hole, cand_obj
+
+# =========================
+# SIMULATION
+# =========================
+def _steer(state, policy, rng, dt, world):
+    half_w, half_h = world.width / 2.0, world.height / 2.0
+    n = len(state["x"])
+
+    if policy == "wander":
+        state["heading"] += rng.normal(0.0, 0.35, n) * math.sqrt(dt)
+        vx = np.cos(state["heading"])
+        vy = np.sin(state["heading"])
+    else:
+        # boustrophedon: run along x, step one hole diameter in y at each wall
+        vx = state["dir_x"].astype(np.float64)
+        vy = np.clip((state["lane_y"] - state["y"]) * 4.0, -1.0, 1.0)
+        norm = np.hypot(vx, vy)
+        vx, vy = vx / norm, vy / norm
+
+    state["x"] += vx * MOVE_SPEED * dt
+    state["y"] += vy * MOVE_SPEED * dt
+
+    hit_x = np.abs(state["x"]) > half_w
+    hit_y = np.abs(state["y"]) > half_h
+    state["x"] = np.clip(state["x"], -half_w, half_w)
+    state["y"] = np.clip(state["y"], -half_h, half_h)
+
+    if policy == "wander":
+        state["heading"] = np.where(hit_x, math.pi - state["heading"], state["heading"])
+        state["heading"] = np.where(hit_y, -state["heading"], state["heading"])
+    else:
+        state["dir_x"] = np.where(hit_x, -state["dir_x"], state["dir_x"])
+        lane = state["lane_y"] + np.where(hit_x, state["dir_y"] * 2.0 * state["radius"], 0.0)
+        flip = np.abs(lane) > half_h
+        state["dir_y"] = np.where(flip, -state["dir_y"], state["dir_y"])
+        state["lane_y"] = np.clip(lane, -half_h, half_h)
+
+def simulate_batch(world, matches, holes, policy="wander", seed=0,
+                   seconds=MATCH_SECONDS, tick_rate=TICK_RATE, initial_radius=INITIAL_RADIUS):
+    """
+    Step `matches` independent matches of `holes` holes each over the same layout.
+    Hole k of match m is row m * holes + k in every per-hole array.
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / tick_rate
+    ticks = int(round(seconds * tick_rate))
+    n_holes = matches * holes
+    n_obj = world.count
+
+    state = {
+        "x": rng.uniform(-world.width / 2.0, world.width / 2.0, n_holes),
+        "y": rng.uniform(-world.height / 2.0, world.height / 2.0, n_holes),
+        "heading": rng.uniform(-math.pi, math.pi, n_holes),
+        "dir_x": rng.choice([-1, 1], n_holes),
+        "dir_y": rng.choice([-1.0, 1.0], n_holes),
+        "radius": np.full(n_holes, float(initial_radius)),
+    }
+    state["lane_y"] = state["y"].copy()
+    hole_area = math.pi * state["radius"] ** 2
+    max_area = math.pi * MAX_RADIUS * MAX_RADIUS
+    hole_score = np.zeros(n_holes, dtype=np.int64)
+    hole_eaten = np.zeros(n_holes, dtype=np.int64)
+    hole_in_match = np.arange(n_holes) % holes
+    match_of_hole = np.arange(n_holes) // holes
+
+    consumed = np.zeros(matches * n_obj, dtype=bool)
+    tier_time = np.full((n_holes, len(world.tier_names)), np.nan)
+    tier_time[state["radius"][:, None] >= world.tier_thresholds[None, :]] = 0.0
+
+    checks = np.zeros((ticks, matches), dtype=np.int64)
+    eaten_per_tick = np.zeros((ticks, matches), dtype=np.int64)
+
+    for tick in range(ticks):
+        _steer(state, policy, rng, dt, world)
+
+        r = state["radius"]
+        reach = r * INNER_CONSUME_FACTOR
+        cand_hole, cand_obj = gather_candidates(world, state["x"], state["y"], reach)
+        checks[tick] = np.bincount(match_of_hole[cand_hole], minlength=matches)
+        if len(cand_obj) == 0:
+            continue
+
+        # cheapest rejections first: most candidates late in a match are already eaten
+        gobj = match_of_hole[cand_hole] * n_obj + cand_obj
+        live = np.flatnonzero(~consumed[gobj])
+        cand_hole, cand_obj, gobj = cand_hole[live], cand_obj[live], gobj[live]
+        dx = world.x[cand_obj] - state["x"][cand_hole]
+        dy = world.y[cand_obj] - state["y"][cand_hole]
+        d2 = dx * dx + dy * dy
+        ok = np.flatnonzero((r[cand_hole] >= world.required_radius[cand_obj]) & (d2 <= reach[cand_hole] ** 2))
+        if len(ok) == 0:
+            continue
+
+        cand_hole, cand_obj, gobj, d2 = cand_hole[ok], cand_obj[ok], gobj[ok], d2[ok]
+
+        # ConsumeArbiter: per object, smallest distance, then larger radius, then lowest playerId
+        d_bucket = np.floor(np.sqrt(d2) / TIE_EPSILON)
+        order = np.lexsort((hole_in_match[cand_hole], -r[cand_hole], d_bucket, gobj))
+        gobj_sorted = gobj[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = gobj_sorted[1:] != gobj_sorted[:-1]
+        win = order[first]
+
+        w_hole, w_obj = cand_hole[win], cand_obj[win]
+        consumed[gobj[win]] = True
+        np.add.at(hole_area, w_hole, world.area_value[w_obj])
+        np.add.at(hole_score, w_hole, world.score_value[w_obj])
+        np.add.at(hole_eaten, w_hole, 1)
+        eaten_per_tick[tick] = np.bincount(match_of_hole[w_hole], minlength=matches)
+
+        np.minimum(hole_area, max_area, out=hole_area)
+        state["radius"] = np.sqrt(hole_area / math.pi)
+
+        unlocked = np.isnan(tier_time) & (state["radius"][:, None] >= world.tier_thresholds[None, :])
+        tier_time[unlocked] = (tick + 1) * dt
+
+    return {
+        "ticks": ticks,
+        "seconds": seconds,
+        "radius": state["radius"],
+        "score": hole_score,
+        "eaten": hole_eaten,
+        "tier_time": tier_time,
+        "checks": checks,
+        "eaten_per_tick": eaten_per_tick,
+        "consumed_fraction": consumed.reshape(matches, n_obj).mean(axis=1),
+    }
+
+# =========================
+# REPORT
+# =========================
+def _pct(a, q):
+    return float(np.percentile(a, q)) if len(a) else float("nan")
+
+def summarize(world, batches, holes):
+    radius = np.concatenate([b["radius"] for b in batches])
+    score = np.concatenate([b["score"] for b in batches])
+    eaten = np.concatenate([b["eaten"] for b in batches])
+    tier_time = np.concatenate([b["tier_time"] for b in batches])
+    checks = np.concatenate([b["checks"].ravel() for b in batches])
+    eaten_tick = np.concatenate([b["eaten_per_tick"].ravel() for b in batches])
+    consumed = np.concatenate([b["consumed_fraction"] for b in batches])
+    seconds = batches[0]["seconds"]
+
+    tiers = {}
+    for i, name in enumerate(world.tier_names):
+        t = tier_time[:, i]
+        reached = t[~np.isnan(t)]
+        tiers[name] = {
+            "unlockRadius": float(world.tier_thresholds[i]),
+            "reachedFraction": float(len(reached) / len(t)),
+            "p50Seconds": _pct(reached, 50),
+            "p90Seconds": _pct(reached, 90),
+        }
+
+    return {
+        "matches": len(consumed),
+        "holesPerMatch": holes,
+        "objects": world.count,
+        "consumePerHolePerSecond": float(eaten.mean() / seconds),
+        "finalRadius": {"p10": _pct(radius, 10), "p50": _pct(radius, 50), "p90": _pct(radius, 90)},
+        "finalScore": {"p10": _pct(score, 10), "p50": _pct(score, 50), "p90": _pct(score, 90)},
+        "mapConsumedFraction": float(consumed.mean()),
+        "timeToTier": tiers,
+        "checksPerTick": {"mean": float(checks.mean()), "p99": _pct(checks, 99), "max": int(checks.max())},
+        "consumedPerTick": {"mean": float(eaten_tick.mean()), "max": int(eaten_tick.max())},
+    }
+
+def print_summary(s):
+    print(f"Matches: {s['matches']}  holes/match: {s['holesPerMatch']}  objects: {s['objects']}")
+    print(f"Consumed per hole per second: {s['consumePerHolePerSecond']:.2f}  "
+          f"map consumed: {100.0 * s['mapConsumedFraction']:.1f}%")
+    print("Final radius p10/p50/p90: {p10:.2f} / {p50:.2f} / {p90:.2f}".format(**s["finalRadius"]))
+    print("Final score  p10/p50/p90: {p10:.0f} / {p50:.0f} / {p90:.0f}".format(**s["finalScore"]))
+    for name, t in s["timeToTier"].items():
+        print(f"  tier {name:<7} unlock r>={t['unlockRadius']:.2f}  reached {100.0 * t['reachedFraction']:5.1f}%  "
+              f"p50 {t['p50Seconds']:6.1f}s  p90 {t['p90Seconds']:6.1f}s")
+    c = s["checksPerTick"]
+    print(f"Consumption checks per tick per match: mean {c['mean']:.1f}  p99 {c['p99']:.0f}  max {c['max']}")
+    print(f"Objects consumed per tick per match: mean {s['consumedPerTick']['mean']:.2f}  "
+          f"max {s['consumedPerTick']['max']}")
+
+# =========================
+# MAIN
+# =========================
+def _run_batch(job):
+    world, matches, holes, policy, seed, seconds, tick_rate, initial_radius = job
+    return simulate_batch(world, matches, holes, policy, seed, seconds, tick_rate, initial_radius)
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Headless batched match simulator.")
+    ap.add_argument("export_dir", nargs="?", default="/tmp/park_pack")
+    ap.add_argument("--layout", default=None, help="park_layout.json (default: generate from metadata)")
+    ap.add_argument("--count", type=int, default=DEFAULT_OBJECT_COUNT, help="objects when generating a layout")
+    ap.add_argument("--matches", type=int, default=256)
+    ap.add_argument("--batch", type=int, default=64, help="matches stepped together")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes running batches")
+    ap.add_argument("--holes", type=int, default=8)
+    ap.add_argument("--policy", choices=POLICIES, default="wander")
+    ap.add_argument("--seconds", type=float, default=MATCH_SECONDS)
+    ap.add_argument("--tick-rate", type=int, default=TICK_RATE)
+    ap.add_argument("--initial-radius", type=float, default=INITIAL_RADIUS)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", default=None, help="also write the summary to this path")
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+    export_dir = Path(args.export_dir)
+    metadata = load_metadata(export_dir)
+    layout = load_layout(Path(args.layout)) if args.layout else build_layout(metadata, args.count)
+    world = World(metadata, layout)
+
+    sizes = [min(args.batch, args.matches - start) for start in range(0, args.matches, args.batch)]
+    jobs = [
+        (world, n, args.holes, args.policy, args.seed + i, args.seconds, args.tick_rate, args.initial_radius)
+        for i, n in enumerate(sizes)
+    ]
+
+    t0 = time.perf_counter()
+    if args.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            batches = list(pool.map(_run_batch, jobs))
+    else:
+        batches = [_run_batch(job) for job in jobs]
+    elapsed = time.perf_counter() - t0
+
+    summary = summarize(world, batches, args.holes)
+    summary["wallSeconds"] = elapsed
+    print_summary(summary)
+    print(f"Simulated {args.matches} matches in {elapsed:.1f}s ({args.matches / elapsed:.1f} matches/s)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print("Report:", args.json)
+
+if __name__ == "__main__":
+    main()
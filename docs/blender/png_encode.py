@@ -0,0 +1,257 @@
+# png_encode.py
+# Plain Python + NumPy (no bpy import): in-memory PNG encoder for rendered tiles.
+#
+# encode_png(rgba) takes a top-down (H, W, 4) uint8 array and returns PNG bytes:
+#   - filter_type: scanline filter: none / sub / up / average / paeth, or adaptive (per row, the
+#                  filter with the smallest sum of absolute residuals, as libpng does)
+#   - level:       zlib level 0-9
+#   - palette:     0 = truecolour RGBA; 1-256 = indexed PNG (PLTE + tRNS). Images that already have
+#                  that few distinct colours are stored losslessly; others are quantised (median cut +
+#                  one k-means pass). If any pixel then differs by more than max_error in a channel,
+#                  the image is stored truecolour instead.
+#
+# decode_png(data) reads back what encode_png writes (8-bit RGBA or indexed, non-interlaced), e.g.
+# for thumb_atlas.py, which packs the preview tiles outside Blender.
+#
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+FILTERS = ("none", "sub", "up", "average", "paeth", "adaptive")
+MAX_PALETTE_ERROR = 48   # largest per-channel error (0-255) encode_png accepts from quantisation
+
+# =========================
+# FILTERING
+# =========================
+def _filter_rows(rows, bpp, kind):
+    """Filtered bytes for every row at once (PNG filters only read unfiltered neighbours)."""
+    x = rows.astype(np.int16)
+    left = np.zeros_like(x)
+    left[:, bpp:] = x[:, :-bpp]
+    up = np.zeros_like(x)
+    up[1:] = x[:-1]
+    if kind == "none":
+        out = x
+    elif kind == "sub":
+        out = x - left
+    elif kind == "up":
+        out = x - up
+    elif kind == "average":
+        out = x - (left + up) // 2
+    else:  # paeth
+        up_left = np.zeros_like(x)
+        up_left[1:, bpp:] = x[:-1, :-bpp]
+        p = left + up - up_left
+        pa, pb, pc = np.abs(p - left), np.abs(p - up), np.abs(p - up_left)
+        pred = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, up_left))
+        out = x - pred
+    return (out & 0xFF).astype(np.uint8)
+
+def filter_scanlines(rows, bpp, kind="adaptive"):
+    """(H, W*bpp) uint8 rows -> (H, 1 + W*bpp) with the filter type byte in front of each row."""
+    if kind not in FILTERS:
+        raise ValueError(f"unknown PNG filter '{kind}' (expected one of {', '.join(FILTERS)})")
+    h = rows.shape[0]
+    if kind != "adaptive":
+        code = FILTERS.index(kind)
+        return np.hstack([np.full((h, 1), code, dtype=np.uint8), _filter_rows(rows, bpp, kind)])
+
+    candidates = [_filter_rows(rows, bpp, k) for k in FILTERS[:5]]
+    # residuals as signed bytes; smallest sum of magnitudes wins per row
+    scores = np.stack([np.abs(c.view(np.int8).astype(np.int32)).sum(axis=1) for c in candidates])
+    best = scores.argmin(axis=0)
+    out = np.empty((h, rows.shape[1] + 1), dtype=np.uint8)
+    out[:, 0] = best
+    for code, c in enumerate(candidates):
+        sel = best == code
+        out[sel, 1:] = c[sel]
+    return out
+
+# =========================
+# PALETTE
+# =========================
+def _nearest(colors, palette):
+    """
+    Index of the nearest palette entry for every colour. |x - p|^2 = |p|^2 - 2 x.p + |x|^2, and |x|^2
+    is the same for every p, so one matrix product per chunk finds it.
+    """
+    pal = palette.astype(np.float32)
+    norms = (pal * pal).sum(axis=1)
+    out = np.empty(len(colors), dtype=np.intp)
+    for start in range(0, len(colors), 65536):
+        block = colors[start:start + 65536].astype(np.float32)
+        out[start:start + 65536] = (norms - 2.0 * block @ pal.T).argmin(axis=1)
+    return out
+
+def _median_cut(colors, weights, n):
+    """
+    Up to n weighted-mean colours: repeatedly split the box with the widest channel range at the
+    weighted median of that channel. Splitting by range rather than by population gives small
+    accent colours (a red sticker on a grey prop) a box of their own.
+    """
+    boxes = [np.arange(len(colors))]
+    spans = [np.ptp(colors, axis=0)]
+    while len(boxes) < n:
+        i = max(range(len(boxes)), key=lambda k: spans[k].max())
+        if spans[i].max() == 0:
+            break
+        box, channel = boxes.pop(i), int(spans.pop(i).argmax())
+        box = box[np.argsort(colors[box, channel], kind="stable")]
+        cum = np.cumsum(weights[box])
+        cut = int(np.clip(np.searchsorted(cum, cum[-1] / 2), 1, len(box) - 1))
+        for half in (box[:cut], box[cut:]):
+            boxes.append(half)
+            spans.append(np.ptp(colors[half], axis=0))
+    return np.array([np.average(colors[b], axis=0, weights=weights[b]) for b in boxes])
+
+def quantize(rgba, colors=256):
+    """
+    (indices (H, W) uint8, palette (N, 4) uint8). Exact when the image has <= colors distinct
+    RGBA values; otherwise a median-cut palette refined by one k-means pass, with nearest-colour
+    mapping. Fully transparent pixels share one entry that quantisation never moves.
+    """
+    h, w, _ = rgba.shape
+    flat = rgba.reshape(-1, 4)
+    flat = np.where(flat[:, 3:4] == 0, 0, flat).astype(np.uint8)   # one transparent colour
+    packed = flat.view(np.uint32).ravel()
+    uniq, inverse, counts = np.unique(packed, return_inverse=True, return_counts=True)
+    if len(uniq) <= colors:
+        palette = uniq.view(np.uint8).reshape(-1, 4)
+        return inverse.astype(np.uint8).reshape(h, w), palette
+
+    # unique colours weighted by pixel count; uniq is sorted, so transparent (0) comes first
+    clear = int(uniq[0] == 0 and colors > 1)
+    opaque = uniq[clear:].view(np.uint8).reshape(-1, 4)
+    weights = counts[clear:].astype(np.float64)
+    centres = _median_cut(opaque, weights, colors - clear)
+
+    # one k-means (Lloyd) step: move every entry to the weighted mean of the colours mapped to it
+    nearest = _nearest(opaque, centres)
+    totals = np.bincount(nearest, weights, minlength=len(centres))
+    used = totals > 0
+    sums = np.stack([np.bincount(nearest, weights * opaque[:, c], minlength=len(centres)) for c in range(4)], axis=1)
+    centres = sums[used] / totals[used][:, None]
+
+    palette = np.round(centres).astype(np.uint8)
+    nearest = _nearest(opaque, palette) + clear
+    if clear:
+        palette = np.vstack([np.zeros((1, 4), dtype=np.uint8), palette])
+        nearest = np.concatenate([[0], nearest])
+    return nearest[inverse].astype(np.uint8).reshape(h, w), palette
+
+def palette_error(rgba, indices, palette):
+    """Largest per-channel difference between the image and its quantised version (0-255)."""
+    flat = rgba.reshape(-1, 4)
+    flat = np.where(flat[:, 3:4] == 0, 0, flat)
+    return int(np.abs(palette[indices.ravel()].astype(np.int16) - flat).max())
+
+# =========================
+# ENCODING
+# =========================
+def _chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+def encode_png(rgba, filter_type="adaptive", level=9, palette=0, max_error=MAX_PALETTE_ERROR):
+    """Encode a top-down (H, W, 4) uint8 array as PNG bytes (see module header for the options)."""
+    h, w, _ = rgba.shape
+    if palette:
+        indices, pal = quantize(rgba, palette)
+        if max_error is not None and palette_error(rgba, indices, pal) > max_error:
+            palette = 0   # too lossy for this image: store it truecolour
+    if palette:
+        ihdr = struct.pack(">IIBBBBB", w, h, 8, 3, 0, 0, 0)
+        extra = _chunk(b"PLTE", pal[:, :3].tobytes())
+        if (pal[:, 3] < 255).any():
+            extra += _chunk(b"tRNS", pal[:, 3].tobytes())
+        rows, bpp = indices, 1
+    else:
+        ihdr = struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0)
+        extra = b""
+        rows, bpp = rgba.reshape(h, w * 4), 4
+
+    data = filter_scanlines(np.ascontiguousarray(rows), bpp, filter_type)
+    return (PNG_SIGNATURE
+            + _chunk(b"IHDR", ihdr)
+            + extra
+            + _chunk(b"IDAT", zlib.compress(data.tobytes(), level))
+            + _chunk(b"IEND", b""))
+
+# =========================
+# DECODING
+# =========================
+def _unfilter_serial(line, prev, bpp, kind):
+    """
+    Average (3) and Paeth (4) rows. Each byte depends on the decoded byte bpp to its left, so the
+    loop stays serial; the terms from the row above are precomputed with NumPy and the loop runs on
+    plain ints (NumPy scalar indexing is several times slower).
+    """
+    stride = len(line)
+    cur = [0] * stride
+    if kind == 3:
+        cur[:bpp] = ((line[:bpp] + prev[:bpp] // 2) & 0xFF).tolist()
+        line, prev = line.tolist(), prev.tolist()
+        for x in range(bpp, stride):
+            cur[x] = (line[x] + ((cur[x - bpp] + prev[x]) >> 1)) & 0xFF
+        return cur
+    # Paeth: with a = left, b = up, c = up-left: pa = |b - c|, pb = |a - c|, pc = |a + b - 2c|
+    cur[:bpp] = ((line[:bpp] + prev[:bpp]) & 0xFF).tolist()   # a = c = 0 -> predictor b
+    up_left = prev[:-bpp]
+    pa_row = np.abs(prev[bpp:] - up_left).tolist()
+    line, prev, up_left = line.tolist(), prev.tolist(), up_left.tolist()
+    for x in range(bpp, stride):
+        a, b, c = cur[x - bpp], prev[x], up_left[x - bpp]
+        pa, pb, pc = pa_row[x - bpp], abs(a - c), abs(a + b - c - c)
+        cur[x] = (line[x] + (a if pa <= pb and pa <= pc else (b if pb <= pc else c))) & 0xFF
+    return cur
+
+def _unfilter(raw, h, stride, bpp):
+    rows = np.frombuffer(raw, dtype=np.uint8).reshape(h, stride + 1)
+    out = np.zeros((h, stride), dtype=np.uint8)
+    prev = np.zeros(stride, dtype=np.int32)
+    for y in range(h):
+        kind, line = rows[y, 0], rows[y, 1:].astype(np.int32)
+        if kind == 0:
+            cur = line
+        elif kind == 1:
+            # running sum per channel
+            cur = (np.cumsum(line.reshape(-1, bpp), axis=0) & 0xFF).ravel()
+        elif kind == 2:
+            cur = (line + prev) & 0xFF
+        else:
+            cur = np.array(_unfilter_serial(line, prev, bpp, kind), dtype=np.int32)
+        out[y] = cur
+        prev = cur
+    return out
+
+def decode_png(data):
+    """PNG bytes (8-bit RGBA or indexed, as written by encode_png) -> top-down (H, W, 4) uint8."""
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError("not a PNG")
+    pos, idat, plte, trns = 8, [], None, None
+    while pos < len(data):
+        length, tag = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if tag == b"IHDR":
+            w, h, depth, colour, _, _, interlace = struct.unpack(">IIBBBBB", body)
+        elif tag == b"PLTE":
+            plte = np.frombuffer(body, dtype=np.uint8).reshape(-1, 3)
+        elif tag == b"tRNS":
+            trns = np.frombuffer(body, dtype=np.uint8)
+        elif tag == b"IDAT":
+            idat.append(body)
+        elif tag == b"IEND":
+            break
+    if depth != 8 or interlace or colour not in (3, 6):
+        raise ValueError("only 8-bit non-interlaced RGBA or indexed PNGs are supported")
+
+    bpp = 4 if colour == 6 else 1
+    rows = _unfilter(zlib.decompress(b"".join(idat)), h, w * bpp, bpp)
+    if colour == 6:
+        return rows.reshape(h, w, 4)
+    alpha = np.full(len(plte), 255, dtype=np.uint8)
+    if trns is not None:
+        alpha[:len(trns)] = trns
+    return np.column_stack([plte, alpha])[rows]
@@ -0,0 +1,11 @@
+# preview_camera.py
+# Plain Python (no bpy import): the preview view shared by render_previews_svg.py (ensure_camera /
+# ensure_light / fit_camera_ortho, and so render_impostors.py) and vector_previews.py, which projects
+# the GLBs through the same camera in NumPy. Rotations are Blender 'XYZ' Euler angles in radians.
+#
+import math
+
+CAMERA_LOCATION = (3.0, -3.0, 2.2)
+CAMERA_ROTATION = (math.radians(60), 0.0, math.radians(45))
+SUN_ROTATION = (math.radians(55), 0.0, math.radians(25))
+ORTHO_FIT = 2.2   # ortho_scale = largest bounds dimension * ORTHO_FIT
@@ -0,0 +1,166 @@
+# preview_diff.py
+# Plain Python + NumPy (no bpy import): which preview tiles changed since the previous run.
+#
+# Each variant tile is compared with its previous version by
+#   - a 64-bit difference hash (dHash) of the tile composited on white, and
+#   - a pixel diff on a DIFF_SIZE x DIFF_SIZE downsample (share of cells that moved more than PIXEL_TOLERANCE)
+# so re-encoded or sub-pixel noisy tiles do not count. Only changed variants are written to the report:
+#   <out>/report.html  before / after / diff images per changed variant, plus added and removed ones
+#   <out>/report.json  the same as data, with the counts
+#
+# render_previews_svg.py --diff compares against the sheets it is about to overwrite; standalone it
+# compares two preview folders (e.g. a saved copy of the last published previews):
+#   python preview_diff.py ./old/previews ./out/park_pack/previews --out ./out/park_pack/previews/_diff
+#
+import argparse
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+import png_encode
+from thumb_atlas import SHEET_IMAGE, sheet_icons
+
+HASH_DISTANCE = 4       # dHash bits that may differ before a tile counts as changed
+DIFF_SIZE = 64
+PIXEL_TOLERANCE = 12    # 0-255 per channel, on the downsample
+CHANGED_SHARE = 0.002   # share of downsampled cells that may move before a tile counts as changed
+
+# =========================
+# COMPARISON
+# =========================
+def _on_white(rgba):
+    px = rgba.astype(np.float64)
+    a = px[..., 3:4] / 255.0
+    return px[..., :3] * a + 255.0 * (1.0 - a)
+
+def _resize(img, h, w):
+    """Area-average resize (any size) of an (H, W, C) float image."""
+    ys = np.linspace(0, img.shape[0], h + 1).astype(int)
+    xs = np.linspace(0, img.shape[1], w + 1).astype(int)
+    rows = np.add.reduceat(img, ys[:-1], axis=0) / np.diff(ys)[:, None, None]
+    return np.add.reduceat(rows, xs[:-1], axis=1) / np.diff(xs)[None, :, None]
+
+def dhash(rgba):
+    """64-bit difference hash: is each cell of a 9x8 grey downsample brighter than its right neighbour."""
+    grey = _resize(_on_white(rgba).mean(axis=2, keepdims=True), 8, 9)[..., 0]
+    bits = (grey[:, 1:] > grey[:, :-1]).ravel()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+def compare_tiles(before, after):
+    """{"hashDistance", "changedShare", "changed"} for two (H, W, 4) uint8 tiles."""
+    distance = bin(dhash(before) ^ dhash(after)).count("1")
+    a = _resize(_on_white(before), DIFF_SIZE, DIFF_SIZE)
+    b = _resize(_on_white(after), DIFF_SIZE, DIFF_SIZE)
+    share = float((np.abs(a - b).max(axis=2) > PIXEL_TOLERANCE).mean())
+    return {
+        "hashDistance": distance,
+        "changedShare": round(share, 5),
+        "changed": distance > HASH_DISTANCE or share > CHANGED_SHARE,
+    }
+
+def diff_image(before, after):
+    """The new tile faded towards white, with pixels that moved more than PIXEL_TOLERANCE in red."""
+    a, b = _on_white(before), _on_white(after)
+    if a.shape != b.shape:
+        a = _resize(a, *b.shape[:2])
+    moved = np.abs(a - b).max(axis=2) > PIXEL_TOLERANCE
+    out = 255.0 - (255.0 - b) * 0.3
+    out[moved] = (230, 30, 30)
+    rgba = np.concatenate([out, np.full(out.shape[:2] + (1,), 255.0)], axis=2)
+    return rgba.astype(np.uint8)
+
+# =========================
+# REPORT
+# =========================
+class DiffReport:
+    """Collects per-variant results; only changed, added and removed variants keep their images."""
+
+    def __init__(self, out_dir: Path):
+        self.out_dir = Path(out_dir)
+        if self.out_dir.exists():
+            shutil.rmtree(self.out_dir)   # images of the previous report
+        self.out_dir.mkdir(parents=True)
+        self.entries = []
+        self.compared = 0
+
+    def _write(self, name, rgba):
+        if rgba is None:
+            return None
+        (self.out_dir / name).write_bytes(png_encode.encode_png(rgba))
+        return name
+
+    def add_unchanged(self, count):
+        """A sheet whose SVG is byte-identical to the previous one (no decoding needed)."""
+        self.compared += count
+
+    def add_sheet(self, base, before, after):
+        """before / after: {variant: rgba} of one prop's old and new sheet."""
+        for v in sorted(set(before) | set(after)):
+            self.compared += 1
+            old, new = before.get(v), after.get(v)
+            name = f"{base}_v{v}"
+            if old is None or new is None:
+                status, stats, diff = ("added" if old is None else "removed"), {}, None
+            else:
+                stats = compare_tiles(old, new)
+                if not stats["changed"]:
+                    continue
+                status, diff = "changed", diff_image(old, new)
+            self.entries.append({
+                "variant": name,
+                "status": status,
+                **{key: val for key, val in stats.items() if key != "changed"},
+                "before": self._write(f"{name}_before.png", old),
+                "after": self._write(f"{name}_after.png", new),
+                "diff": self._write(f"{name}_diff.png", diff),
+            })
+
+    def write(self):
+        summary = {"compared": self.compared, "changed": len(self.entries), "variants": self.entries}
+        (self.out_dir / "report.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+        def cell(src):
+            return f"<td><img src='{src}' loading='lazy' /></td>" if src else "<td>-</td>"
+
+        lines = [
+            "<!doctype html><html><head><meta charset='utf-8'><title>Preview Changes</title></head><body>",
+            "<h1>Preview Changes</h1>",
+            f"<p>{len(self.entries)} of {self.compared} variant tiles changed.</p>",
+            "<table><tr><th>variant</th><th>before</th><th>after</th><th>diff</th></tr>",
+        ]
+        for e in self.entries:
+            detail = e["status"] if e["status"] != "changed" else \
+                f"hash distance {e['hashDistance']}, {e['changedShare'] * 100:.1f}% moved"
+            lines.append(f"<tr><td><b>{e['variant']}</b><br/>{detail}</td>"
+                         f"{cell(e['before'])}{cell(e['after'])}{cell(e['diff'])}</tr>")
+        lines.append("</table></body></html>")
+        out = self.out_dir / "report.html"
+        out.write_text("\n".join(lines), encoding="utf-8")
+        print(f"Preview diff: {len(self.entries)}/{self.compared} variant tiles changed -> {out}")
+        return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Report preview tiles that changed between two preview folders.")
+    ap.add_argument("before_dir")
+    ap.add_argument("after_dir")
+    ap.add_argument("--out", default=None, help="default: <after_dir>/_diff")
+    ap.add_argument("--thumb-size", type=int, default=256)
+    args = ap.parse_args()
+
+    before_dir, after_dir = Path(args.before_dir), Path(args.after_dir)
+    report = DiffReport(Path(args.out) if args.out else after_dir / "_diff")
+    bases = sorted({p.stem for d in (before_dir, after_dir) for p in d.glob("*.svg")})
+    for base in bases:
+        old, new = before_dir / f"{base}.svg", after_dir / f"{base}.svg"
+        if old.exists() and new.exists() and old.read_bytes() == new.read_bytes():
+            report.add_unchanged(len(SHEET_IMAGE.findall(new.read_text(encoding="utf-8"))))
+            continue
+        report.add_sheet(base,
+                         sheet_icons(old, args.thumb_size) if old.exists() else {},
+                         sheet_icons(new, args.thumb_size) if new.exists() else {})
+    report.write()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# preview_index.py
+# Plain Python (no bpy import): writes previews/_preview_index.html.
+# Shared by render_previews_svg.py and render_previews_parallel.py so both produce the same page.
+#
+# Large catalogs are split into pages of PAGE_SIZE props (_preview_index.html, _preview_index_2.html, ...)
+# and every image is lazy-loaded. Sheets written with external tiles (render_previews_svg.py
+# --tiles external) are shown as their tile PNGs: an SVG loaded through <img> may not fetch images.
+#
+import re
+from pathlib import Path
+
+INDEX_NAME = "_preview_index.html"
+PAGE_SIZE = 100
+TILE_HREF = re.compile(r'<image [^>]*href="(?!data:)([^"]+)"')
+
+def find_base_props(export_dir: Path):
+    v0s = sorted(Path(export_dir).glob("*_v0.glb"))
+    bases = []
+    for p in v0s:
+        stem = p.stem  # PROP_Acorn_v0
+        base = stem[:-3]  # remove "_v0"
+        bases.append(base)
+    return bases
+
+def page_name(page):
+    return INDEX_NAME if page == 1 else f"{INDEX_NAME[:-5]}_{page}.html"
+
+def sheet_tiles(svg_path: Path):
+    """External tile hrefs of a preview sheet, in variant order ([] for inline or vector sheets)."""
+    try:
+        return TILE_HREF.findall(svg_path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return []
+
+def _page_nav(page, pages):
+    if pages == 1:
+        return []
+    links = [f"<b>{p}</b>" if p == page else f"<a href='{page_name(p)}'>{p}</a>" for p in range(1, pages + 1)]
+    return [f"<p>Page {' '.join(links)}</p>"]
+
+def write_index(preview_dir: Path, bases, header_lines=(), page_size=PAGE_SIZE):
+    """One <li> per base prop pointing at <base>.svg; header_lines go right under the title."""
+    preview_dir = Path(preview_dir)
+    bases = list(bases)
+    pages = max(1, -(-len(bases) // page_size))
+    for page in range(1, pages + 1):
+        nav = _page_nav(page, pages)
+        lines = [
+            "<!doctype html><html><head><meta charset='utf-8'><title>Prop Previews</title></head><body>",
+            "<h1>Prop Preview Sheets</h1>",
+            *header_lines,
+            *nav,
+            "<ul style='list-style:none;padding:0'>"
+        ]
+        for base in bases[(page - 1) * page_size:page * page_size]:
+            tiles = sheet_tiles(preview_dir / f"{base}.svg")
+            if tiles:
+                imgs = "".join(f"<img src='{t}' loading='lazy' />" for t in tiles)
+                lines.append(f"<li style='margin:20px 0'><h3><a href='{base}.svg'>{base}</a></h3>{imgs}</li>")
+            else:
+                lines.append(f"<li style='margin:20px 0'><h3>{base}</h3><img src='{base}.svg' loading='lazy' /></li>")
+        lines.append("</ul>")
+        lines.extend(nav)
+        lines.append("</body></html>")
+        (preview_dir / page_name(page)).write_text("\n".join(lines), encoding="utf-8")
+
+    # pages left over from a larger earlier run
+    for old in preview_dir.glob(f"{INDEX_NAME[:-5]}_*.html"):
+        suffix = old.stem.rsplit("_", 1)[-1]
+        if suffix.isdigit() and int(suffix) > pages:
+            old.unlink()
+
+    out = preview_dir / INDEX_NAME
+    print("Index:", str(out) + (f" ({pages} pages)" if pages > 1 else ""))
+    return out
@@ -0,0 +1,90 @@
+# prop_filter.py
+# Plain Python (no bpy import): --props / --tiers / --variants selection for partial builds, shared by
+# the generators, render_previews_svg.py and render_previews_parallel.py.
+#
+#   --props PROP_Bench,PROP_Tree*   prop names or fnmatch globs
+#   --tiers large                   metadata tiers (small, medium, large)
+#   --variants 1,2                  variant indices
+#
+# A partial build merges its props into the existing park_props_metadata.json (merge_metadata) instead
+# of overwriting it, so rebuilding one tier leaves the other tiers' entries untouched.
+#
+import fnmatch
+import json
+from pathlib import Path
+
+def _names(text):
+    return [s.strip() for s in text.split(",") if s.strip()]
+
+def _indices(text):
+    return sorted({int(s) for s in _names(text)})
+
+def add_args(ap):
+    ap.add_argument("--props", type=_names, default=None,
+                    help="only these props: comma-separated names or globs, e.g. PROP_Bench,PROP_Tree*")
+    ap.add_argument("--tiers", type=_names, default=None, help="only props of these tiers, e.g. large or small,medium")
+    ap.add_argument("--variants", type=_indices, default=None, help="only these variant indices, e.g. 1,2")
+
+def forward_args(args):
+    """The filter flags of `args` as command-line arguments (drivers pass them on to workers)."""
+    out = []
+    if args.props:
+        out += ["--props", ",".join(args.props)]
+    if args.tiers:
+        out += ["--tiers", ",".join(args.tiers)]
+    if args.variants:
+        out += ["--variants", ",".join(map(str, args.variants))]
+    return out
+
+def is_partial(args):
+    return bool(args.props or args.tiers or args.variants)
+
+def prop_selected(args, name, tier=None):
+    if args.props and not any(fnmatch.fnmatchcase(name, pattern) for pattern in args.props):
+        return False
+    return not args.tiers or tier in args.tiers
+
+def variant_selected(args, v):
+    return not args.variants or v in args.variants
+
+def prop_tiers(meta_path: Path):
+    """{prop name: tier} from an existing metadata file ({} if there is none)."""
+    try:
+        meta = json.loads(Path(meta_path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    return {p["name"]: p["tier"] for p in meta["props"]}
+
+def select_bases(args, bases, meta_path: Path):
+    """The base props of `bases` matching --props / --tiers (tiers are looked up in the metadata)."""
+    tiers = prop_tiers(meta_path) if args.tiers else {}
+    if args.tiers and not tiers:
+        raise RuntimeError(f"--tiers needs {Path(meta_path).name} to look up prop tiers")
+    return [b for b in bases if prop_selected(args, b, tiers.get(b))]
+
+def merge_metadata(meta_path: Path, metadata):
+    """`metadata` from a partial build merged into the file at meta_path (see merge_into)."""
+    try:
+        old = json.loads(Path(meta_path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return metadata
+    return merge_into(old, metadata)
+
+def merge_into(old, metadata):
+    """
+    Rebuilt variants in `metadata` replace their whole entry in `old` (anything else recorded on the
+    old entry described the old geometry), every other prop and variant is kept, and new props are
+    appended.
+    """
+    rebuilt = {p["name"]: p for p in metadata["props"]}
+    props = []
+    for p in old["props"]:
+        new = rebuilt.pop(p["name"], None)
+        if new is None:
+            props.append(p)
+            continue
+        done = {v["variantIndex"] for v in new["variants"]}
+        variants = [v for v in p["variants"] if v["variantIndex"] not in done] + new["variants"]
+        props.append({**p, **new, "variants": sorted(variants, key=lambda v: v["variantIndex"])})
+    props.extend(rebuilt.values())
+    return {**old, **metadata, "props": props}
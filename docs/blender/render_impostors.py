@@ -0,0 +1,280 @@
+# render_impostors.py
+# Headless script: octahedral impostor atlases for the large-tier variants, so Unity can swap a
+# far-away prop for a single billboard quad.
+#
+# Uses the preview scene from render_previews_svg.py (camera, sun, engine, Viewer capture). For each
+# variant, FRAMES x FRAMES linked duplicates are laid out in one orthographic frame, each one rotated
+# so the fixed preview camera sees it from its frame's direction; every map is then a single render:
+#   - impostors/<variant>_albedo.png:      diffuse colour pass (unlit, sRGB) + coverage alpha
+#   - impostors/<variant>_normaldepth.png: object normal * 0.5 + 0.5 in RGB, alpha = 1 - depth across
+#                                          the bounding sphere (1 = nearest, 0 = empty)
+# and impostors/impostors.json gets an entry for each of those variants, keyed by its GLB file name.
+# park_props_metadata.json is only read: it is the generator's output, and the pack / previews build
+# tasks read it while this script runs.
+#
+# Frame layout (hemi-octahedral, glTF axes, Y up): frame (i, j) is column i from the left and row j
+# from the bottom; with f = ((i + 0.5) / FRAMES, (j + 0.5) / FRAMES) * 2 - 1, a = (f.x + f.y) / 2,
+# b = (f.x - f.y) / 2, the direction from the prop to the viewer is normalize(a, 1 - |a| - |b|, b).
+# Frame "up" is world +Y projected onto the view plane (+Z straight above). Normals and directions
+# are in the GLB scene axes, node rotation included; "centerOffset" is the bounding-sphere centre
+# relative to the variant node's origin.
+#
+# Usage:
+#   Blender --background --factory-startup --python render_impostors.py -- ./out/park_pack
+#   Blender --background --factory-startup --python render_impostors.py -- ./out/park_pack --resolution 1024 --frames 8 --tiers large medium
+#
+import bpy
+import os
+import sys
+import json
+import socket
+import math
+import argparse
+import numpy as np
+from pathlib import Path
+from mathutils import Matrix, Vector
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import build_profiling as prof
+import datablock_leaks as leaks
+import png_encode
+import render_previews_svg as previews
+
+METADATA_NAME = "park_props_metadata.json"
+IMPOSTOR_DIR = "impostors"
+IMPOSTOR_INDEX = "impostors.json"
+SWAP_FACTOR = 20.0  # swap to the impostor beyond radius * SWAP_FACTOR metres
+CLIP_CELLS = 8.0    # camera clip_end in cells; empty pixels read at least this deep
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    ap = argparse.ArgumentParser(prog=Path(__file__).name)
+    ap.add_argument("export_dir", nargs="?", default="/tmp/park_pack")
+    ap.add_argument("--resolution", type=int, default=2048, help="atlas size in pixels (square)")
+    ap.add_argument("--frames", type=int, default=8, help="frames per atlas side")
+    ap.add_argument("--tiers", nargs="+", default=["large"], help="metadata tiers that get impostors")
+    ap.add_argument("--swap-factor", type=float, default=SWAP_FACTOR,
+                    help="swapDistance = bounding radius * this")
+    ap.add_argument("--quality", choices=("eevee", "cycles"), default="eevee",
+                    help="render tier (Workbench has no render passes)")
+    ap.add_argument("--stage-times", default=None)
+    ap.add_argument("--trace", default=None)
+    ap.add_argument("--cprofile-dir", default=None)
+    args = ap.parse_args(argv)
+    if args.resolution % args.frames:
+        ap.error("--resolution must be a multiple of --frames")
+    return args
+
+# =========================
+# OCTAHEDRAL FRAMES
+# =========================
+def gltf_to_blender(v):
+    return Vector((v[0], -v[2], v[1]))
+
+def blender_to_gltf(v):
+    return [v[0], v[2], -v[1]]
+
+def frame_direction(i, j, frames):
+    """Unit direction (glTF axes) from the prop towards the viewer for frame (i, j); see header."""
+    fx = (i + 0.5) / frames * 2.0 - 1.0
+    fy = (j + 0.5) / frames * 2.0 - 1.0
+    a, b = (fx + fy) / 2.0, (fx - fy) / 2.0
+    d = np.array([a, 1.0 - abs(a) - abs(b), b])
+    return d / np.linalg.norm(d)
+
+def view_basis(to_viewer: Vector):
+    """Columns right, up, back (= to_viewer) of a camera looking at the prop from to_viewer (Blender axes)."""
+    back = to_viewer.normalized()
+    world_up = Vector((0.0, 0.0, 1.0)) if abs(back.z) < 0.999 else Vector((0.0, 1.0, 0.0))
+    right = world_up.cross(back).normalized()
+    up = back.cross(right)
+    return Matrix((right, up, back)).transposed()
+
+# =========================
+# SCENE
+# =========================
+def route_viewer(tree, layers, viewer, output):
+    """Feed one Render Layers output to the Viewer node (coverage stays on the Alpha input if present)."""
+    sock = layers.outputs.get(output)
+    if sock is None and output == "Depth":
+        sock = layers.outputs.get("Z")  # older name
+    if sock is None:
+        raise RuntimeError(f"render pass '{output}' is not available with {bpy.context.scene.render.engine}")
+    tree.links.new(sock, viewer.inputs["Image"])
+
+def enable_passes():
+    layer = bpy.context.view_layer
+    layer.use_pass_diffuse_color = True
+    layer.use_pass_normal = True
+    layer.use_pass_z = True
+
+@prof.timed(prof.STAGE_PREVIEW_RENDER)
+def render_pass(capture, output):
+    route_viewer(*capture, output)
+    bpy.ops.render.render()
+    return previews.viewer_pixels()
+
+def layout_frames(obj, cam, frames, cell):
+    """
+    Linked duplicates of obj, one per frame, placed in the camera plane. Returns
+    [(duplicate, rotation 3x3 world <- object view)] in frame order (row j from the top of the image).
+    """
+    minx, maxx, miny, maxy, minz, maxz = previews.compute_bounds(obj)
+    centre = Vector(((minx + maxx) / 2, (miny + maxy) / 2, (minz + maxz) / 2))
+    cam_basis = cam.rotation_euler.to_matrix()
+    forward = cam_basis @ Vector((0.0, 0.0, -1.0))
+    anchor = cam.location + forward * (cell * 4.0)
+
+    placed = []
+    for row in range(frames):
+        j = frames - 1 - row   # image rows run top-down, frame rows bottom-up
+        for i in range(frames):
+            view = view_basis(gltf_to_blender(frame_direction(i, j, frames)))
+            # camera sees rot @ p exactly like a camera with basis `view` sees p
+            rot = cam_basis @ view.transposed()
+            dup = obj.copy()
+            bpy.context.scene.collection.objects.link(dup)
+            offset = cam_basis @ Vector(((i - (frames - 1) / 2) * cell, ((frames - 1) / 2 - row) * cell, 0.0))
+            dup.matrix_world = (Matrix.Translation(anchor + offset) @ rot.to_4x4()
+                                @ Matrix.Translation(-centre) @ obj.matrix_world)
+            placed.append((dup, rot))
+    obj.hide_render = True
+    cam.data.ortho_scale = cell * frames
+    cam.data.clip_start = cell
+    cam.data.clip_end = cell * CLIP_CELLS
+    return placed
+
+# =========================
+# MAPS
+# =========================
+def albedo_map(diffuse, alpha):
+    """Diffuse colour pass (premultiplied by coverage) -> sRGB RGBA uint8."""
+    rgb = np.where(alpha > 0, diffuse[..., :3] / np.maximum(alpha, 1e-8), 0.0)
+    rgb = np.clip(rgb, 0.0, 1.0)
+    srgb = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1.0 / 2.4) - 0.055)
+    return (np.concatenate([srgb, alpha], axis=2) * 255.0 + 0.5).astype(np.uint8)
+
+def normal_depth_map(normal, depth, alpha, rotations, frames, cell, cam_distance, radius):
+    """World normals of the rotated duplicates -> object normals (glTF axes); depth across the sphere."""
+    res = normal.shape[0]
+    px = res // frames
+    out = np.zeros((res, res, 4), dtype=np.float64)
+    n = normal[..., :3] / np.maximum(alpha, 1e-8)
+    for k, rot in enumerate(rotations):
+        row, i = divmod(k, frames)
+        ys, xs = slice(row * px, (row + 1) * px), slice(i * px, (i + 1) * px)
+        inv = np.array(rot.transposed())            # world -> object (Blender axes)
+        obj_n = n[ys, xs] @ inv.T
+        gltf_n = np.stack([obj_n[..., 0], obj_n[..., 2], -obj_n[..., 1]], axis=-1)
+        gltf_n /= np.maximum(np.linalg.norm(gltf_n, axis=-1, keepdims=True), 1e-8)
+        out[ys, xs, :3] = gltf_n * 0.5 + 0.5
+    near = cam_distance - radius
+    d = np.clip(1.0 - (depth[..., 0] - near) / (2.0 * radius), 0.0, 1.0)
+    covered = (alpha[..., 0] > 0) & (depth[..., 0] < cell * CLIP_CELLS * 0.999)
+    out[..., 3] = np.where(covered, d, 0.0)
+    out[..., :3] *= covered[..., None]
+    return (out * 255.0 + 0.5).astype(np.uint8)
+
+def render_impostor(glb: Path, capture, args):
+    """Render both maps of one variant; returns its metadata entry (None if the GLB has no mesh)."""
+    obj = previews.load_variant(glb)
+    if obj is None:
+        return None
+    minx, maxx, miny, maxy, minz, maxz = previews.compute_bounds(obj)
+    radius = 0.5 * math.sqrt((maxx - minx) ** 2 + (maxy - miny) ** 2 + (maxz - minz) ** 2)
+    centre = Vector(((minx + maxx) / 2, (miny + maxy) / 2, (minz + maxz) / 2))
+    centre_offset = centre - obj.matrix_world.translation
+
+    cam = previews.cam
+    cell = 2.0 * radius
+    placed = layout_frames(obj, cam, args.frames, cell)
+    try:
+        diffuse = render_pass(capture, "DiffCol")
+        alpha = np.clip(diffuse[..., 3:4], 0.0, 1.0)
+        if "Alpha" not in capture[2].inputs:
+            alpha = None  # coverage comes from the depth pass below
+        normal = render_pass(capture, "Normal")
+        depth = render_pass(capture, "Depth")
+    finally:
+        for dup, _ in placed:
+            bpy.data.objects.remove(dup, do_unlink=True)
+        previews.delete_all_objects_except(cam, previews.light)
+        route_viewer(*capture, "Image")
+    if alpha is None:
+        alpha = (depth[..., 0:1] < cell * CLIP_CELLS * 0.999).astype(np.float64)
+
+    out_dir = previews.EXPORT_DIR / IMPOSTOR_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = glb.stem
+    albedo_path = out_dir / f"{stem}_albedo.png"
+    normal_path = out_dir / f"{stem}_normaldepth.png"
+    albedo_path.write_bytes(png_encode.encode_png(albedo_map(diffuse, alpha)))
+    normal_path.write_bytes(png_encode.encode_png(
+        normal_depth_map(normal, depth, alpha, [rot for _, rot in placed], args.frames, cell, cell * 4.0, radius)))
+    print("Wrote:", str(albedo_path), str(normal_path))
+
+    return {
+        "albedo": f"{IMPOSTOR_DIR}/{albedo_path.name}",
+        "normalDepth": f"{IMPOSTOR_DIR}/{normal_path.name}",
+        "layout": "hemi-octahedral",
+        "frames": args.frames,
+        "frameSize": args.resolution // args.frames,
+        "radius": round(radius, 5),
+        "centerOffset": [round(c, 5) for c in blender_to_gltf(centre_offset)],
+        "swapDistance": round(radius * args.swap_factor, 3),
+    }
+
+def load_index(path: Path):
+    """{variant GLB file: impostor entry} from an earlier run ({} if there is none)."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))["variants"]
+    except FileNotFoundError:
+        return {}
+
+def write_index(path: Path, impostors):
+    """Write impostors.json through a temp file so a reader never sees it half written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"variants": impostors}, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def main():
+    args = parse_args()
+    previews.init(previews.parse_args([args.export_dir, "--quality", args.quality, "--no-cache"]))
+    prof.configure(args)
+    previews.setup_preview_scene()
+    scene = bpy.context.scene
+    scene.render.resolution_x = args.resolution
+    scene.render.resolution_y = args.resolution
+    enable_passes()
+    capture = previews.CAPTURE
+
+    meta = json.loads((previews.EXPORT_DIR / METADATA_NAME).read_text(encoding="utf-8"))
+    index_path = previews.EXPORT_DIR / IMPOSTOR_DIR / IMPOSTOR_INDEX
+    impostors = load_index(index_path)
+    done = 0
+    for prop in meta["props"]:
+        if prop["tier"] not in args.tiers:
+            continue
+        for var in prop["variants"]:
+            glb = previews.EXPORT_DIR / var["file"]
+            impostors.pop(var["file"], None)   # re-rendered below, or no longer has one
+            if not glb.exists():
+                print(f"Warning: {glb.name} missing (no impostor)")
+                continue
+            prof.set_context(prop["name"], var["variantIndex"])
+            with leaks.track(glb.stem):
+                entry = render_impostor(glb, capture, args)
+            if entry is not None:
+                impostors[var["file"]] = {"prop": prop["name"], "variantIndex": var["variantIndex"], **entry}
+                done += 1
+
+    # variants of other tiers keep their impostors from earlier runs while they still exist
+    files = {var["file"] for prop in meta["props"] for var in prop["variants"]}
+    write_index(index_path, {f: e for f, e in sorted(impostors.items()) if f in files})
+    print(f"Impostors: {done} variants ({', '.join(args.tiers)}) -> {previews.EXPORT_DIR / IMPOSTOR_DIR}")
+    leaks.print_summary()
+    prof.finish(Path(__file__).name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# render_previews_parallel.py
+# Plain CPython driver: splits the base props across N headless Blender processes running
+# render_previews_svg.py, then writes _preview_index.html once every worker has finished.
+#
+# Worker k renders props k, k+N, k+2N, ... (--shard k/N) and writes its SVGs directly into
+# <export_dir>/previews. Each worker gets cpu_count/N render threads; its output goes to
+# previews/_worker_<k>.log. --atlas packs the finished thumbnails into the UI atlas (thumb_atlas.py).
+#
+# Usage:
+#   python render_previews_parallel.py /path/to/export_dir --blender /Applications/Blender.app/Contents/MacOS/Blender --workers 8
+#   python render_previews_parallel.py ./out/park_pack --workers 4 -- --single-pass
+#
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import build_journal
+import prop_filter
+import thumb_atlas
+from preview_index import find_base_props, write_index
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PREVIEW_SCRIPT = SCRIPT_DIR / "render_previews_svg.py"
+JOURNAL_NAME = "_journal.jsonl"  # render_previews_svg.JOURNAL_NAME (not importable without bpy)
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Render prop previews with several Blender processes.")
+    ap.add_argument("export_dir")
+    ap.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--atlas", action="store_true", help="pack the thumbnails into a UI atlas afterwards (thumb_atlas.py)")
+    prop_filter.add_args(ap)
+    # everything after "--" is passed to every render_previews_svg.py worker
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = ap.parse_args(argv[:split])
+    args.extra = argv[split + 1:]
+    return args
+
+def start_worker(blender, export_dir, shard, count, threads, extra, log_path):
+    cmd = [
+        blender, "--background", "--factory-startup", "--threads", str(threads),
+        "--python", str(PREVIEW_SCRIPT), "--", str(export_dir),
+        "--shard", f"{shard}/{count}", "--no-index", *extra,
+    ]
+    log = open(log_path, "w", encoding="utf-8")
+    return subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT), log
+
+def main():
+    args = parse_args()
+    export_dir = Path(args.export_dir)
+    preview_dir = export_dir / "previews"
+    preview_dir.mkdir(parents=True, exist_ok=True)
+
+    all_bases = find_base_props(export_dir)
+    if not all_bases:
+        sys.exit(f"No *_v0.glb files found in {export_dir}")
+    # workers apply the same filters to the same list before taking their shard
+    bases = prop_filter.select_bases(args, all_bases, export_dir / "park_props_metadata.json")
+    if not bases:
+        sys.exit("No props match --props / --tiers")
+
+    workers = max(1, min(args.workers, len(bases)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"{len(bases)} props across {workers} Blender workers ({threads} render threads each)")
+
+    t0 = time.perf_counter()
+    running = []
+    for k in range(workers):
+        log_path = preview_dir / f"_worker_{k}.log"
+        proc, log = start_worker(args.blender, export_dir, k, workers, threads,
+                                 [*prop_filter.forward_args(args), *args.extra], log_path)
+        running.append((k, proc, log, log_path))
+
+    failed = []
+    for k, proc, log, log_path in running:
+        code = proc.wait()
+        log.close()
+        if code != 0:
+            failed.append(k)
+            print(f"Worker {k} failed (exit {code}), see {log_path}")
+
+    # a sheet counts when a worker journalled it (rendered now or resumed) and it is unchanged since;
+    # SVGs left over from an earlier run without a journal line do not count
+    finished = {}
+    for k in range(workers):
+        finished.update(build_journal.finished(preview_dir / build_journal.shard_name(JOURNAL_NAME, k, workers)))
+    missing = [b for b in bases if b not in finished]
+    # props outside the filters keep the sheets of earlier runs
+    indexed = [b for b in all_bases if b not in missing and (preview_dir / f"{b}.svg").exists()]
+    write_index(preview_dir, indexed)
+    if args.atlas:
+        thumb_atlas.write_atlas(preview_dir, indexed)
+    print(f"Rendered {len(bases) - len(missing)}/{len(bases)} props in {time.perf_counter() - t0:.1f}s")
+
+    if failed or missing:
+        if missing:
+            print("Missing previews:", ", ".join(missing))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
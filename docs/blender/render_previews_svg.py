@@ -5,26 +5,140 @@
 # Usage:
 #   Blender --background --factory-startup --python render_previews_svg.py -- /path/to/export_dir
 #
+# The generators import this module for their --previews option (render_live_object); nothing runs
+# on import.
+#
 import bpy
+import os
 import sys
-import math
+import re
+import json
 import base64
+import hashlib
+import socket
+import argparse
+import numpy as np
 from pathlib import Path
 from mathutils import Vector  # <-- FIX: Blender uses mathutils module, not bpy.mathutils
 
+# Sibling helper modules (Blender does not put the script folder on sys.path)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import build_journal
+import build_profiling as prof
+import datablock_leaks as leaks
+import png_encode
+import preview_diff
+import prop_filter
+import thumb_atlas
+from preview_camera import CAMERA_LOCATION, CAMERA_ROTATION, ORTHO_FIT, SUN_ROTATION
+from preview_index import find_base_props, write_index
+
 THUMB_SIZE = 256  # pixels per variant thumbnail
 MARGIN = 12       # px padding inside each cell
-
-def parse_export_dir():
-    if "--" in sys.argv:
-        args = sys.argv[sys.argv.index("--") + 1:]
-        if args and args[0].strip():
-            return Path(args[0])
-    return Path("/tmp/park_pack")
-
-EXPORT_DIR = parse_export_dir()
-PREVIEW_DIR = EXPORT_DIR / "previews"
-PREVIEW_DIR.mkdir(parents=True, exist_ok=True)
+VARIANTS = (0, 1, 2)
+CACHE_VERSION = 3 # bump when a code change alters tiles without changing any cached setting
+# Single-pass / contact sheet: neighbouring cells are also spaced this many cell widths apart along
+# the view axis (invisible in an orthographic render) so one variant's sun shadow cannot reach another.
+GRID_DEPTH_GAP = 8.0
+# Contact sheet layout when the metadata has no "layoutGrid" (matches the generators)
+DEFAULT_GRID_COLS = 10
+DEFAULT_GRID_SPACING = 2.6
+PACK_NAME = "park_props_pack_all.glb"
+JOURNAL_NAME = "_journal.jsonl"  # in previews/; _journal_<k>of<n>.jsonl per --shard worker
+# --quality tier: (engines in order of preference, samples). Workbench samples are its AA levels.
+#   workbench: flat studio lighting, milliseconds per tile on CPU (CI, iteration)
+#   eevee:     the default look for review (falls back to Cycles at low samples)
+#   cycles:    path traced, denoised, for marketing shots
+QUALITY_TIERS = {
+    "workbench": (("BLENDER_WORKBENCH",), 8),
+    "eevee": (("BLENDER_EEVEE_NEXT", "BLENDER_EEVEE", "CYCLES"), 16),
+    "cycles": (("CYCLES",), 128),
+}
+VARIANT_NAME = re.compile(r"^(?P<base>.+)_v(?P<variant>\d+)(\.\d+)?$")  # importer may add .001 suffixes
+
+def parse_args(argv=None):
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    ap = argparse.ArgumentParser(prog=Path(__file__).name)
+    ap.add_argument("export_dir", nargs="?", default="/tmp/park_pack")
+    ap.add_argument("--stage-times", default=None,
+                    help="write per-stage wall/CPU times for every variant preview to this JSON file")
+    ap.add_argument("--trace", default=None,
+                    help="write a Chrome Trace Event JSON of helper spans (open in ui.perfetto.dev)")
+    ap.add_argument("--cprofile-dir", default=None, help="dump one cProfile .prof file per prop here")
+    ap.add_argument("--single-pass", action="store_true",
+                    help="render v0/v1/v2 side by side in one render per prop and crop the cells")
+    ap.add_argument("--contact-sheet", action="store_true",
+                    help="render the whole pack as grid tiles and cut the per-prop sheets from them")
+    ap.add_argument("--from-pack", action="store_true",
+                    help=f"import {PACK_NAME} once and render each variant by toggling visibility")
+    ap.add_argument("--sheet-rows", type=int, default=16,
+                    help="grid rows per contact sheet tile (one render each)")
+    ap.add_argument("--shard", default=None,
+                    help="K/N: only render every N-th prop starting at K (see render_previews_parallel.py)")
+    ap.add_argument("--quality", choices=tuple(QUALITY_TIERS), default="eevee",
+                    help="render tier; all tiers share the camera, light and framing")
+    ap.add_argument("--capture", choices=("memory", "file"), default="memory",
+                    help="memory: read pixels from a compositor Viewer node; file: write_still to a temp PNG and read "
+                         "it back. Both render with the Standard view transform, so tiles look the same")
+    ap.add_argument("--png-filter", choices=png_encode.FILTERS, default="adaptive", help="PNG scanline filter")
+    ap.add_argument("--png-level", type=int, default=9, choices=range(10), metavar="0-9", help="zlib level")
+    ap.add_argument("--png-palette", type=int, default=0, metavar="N",
+                    help="write indexed PNGs with at most N (<= 256) colours; 0 = truecolour RGBA. Tiles "
+                         "that would lose too much (png_encode.MAX_PALETTE_ERROR) stay truecolour")
+    ap.add_argument("--tiles", choices=("inline", "external"), default="inline",
+                    help="inline: base64 PNGs inside each SVG; external: previews/tiles/<sha256>.png "
+                         "written once and referenced by href")
+    ap.add_argument("--atlas", action="store_true",
+                    help="also pack every thumbnail into previews/ui_atlas_<n>.png + ui_atlas.json (see thumb_atlas.py)")
+    ap.add_argument("--atlas-icon", type=int, default=thumb_atlas.ICON_SIZE,
+                    help="icon size in the atlas; must divide the thumbnail size")
+    ap.add_argument("--diff", action="store_true",
+                    help="compare each new tile with the sheet it replaces; changed-only report in previews/_diff")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="re-render every variant instead of reusing tiles from previews/_cache")
+    ap.add_argument("--no-index", action="store_true",
+                    help="do not write _preview_index.html (the parallel driver writes it once)")
+    ap.add_argument("--resume", action="store_true",
+                    help="skip props whose sheet an interrupted run journalled (previews/_journal*.jsonl) and that is unchanged")
+    ap.add_argument("--journal", default=None,
+                    help="journal file name in previews/ (default _journal.jsonl, _journal_<k>of<n>.jsonl with --shard)")
+    prop_filter.add_args(ap)
+    args = ap.parse_args(argv)
+    if not 0 <= args.png_palette <= 256:
+        ap.error("--png-palette must be between 0 and 256")
+    if args.shard and args.contact_sheet:
+        ap.error("--shard cannot be combined with --contact-sheet")
+    if args.shard and args.atlas:
+        ap.error("--atlas needs every prop; pass it to render_previews_parallel.py instead")
+    if args.shard and args.diff:
+        ap.error("--diff needs every prop; copy previews/ before the run and use preview_diff.py")
+    if args.contact_sheet and args.resume:
+        ap.error("--contact-sheet renders the whole pack; drop --resume (unchanged tiles come from the cache)")
+    if args.contact_sheet and prop_filter.is_partial(args):
+        ap.error("--contact-sheet renders the whole pack; drop --props / --tiers / --variants")
+    if args.from_pack and (args.contact_sheet or args.single_pass):
+        ap.error("--from-pack renders variants one at a time; drop --contact-sheet / --single-pass")
+    if not args.export_dir.strip():
+        args.export_dir = "/tmp/park_pack"
+    return args
+
+# Set by init() and setup_preview_scene()
+ARGS = None
+EXPORT_DIR = PREVIEW_DIR = CACHE_DIR = TILE_DIR = None
+cam = light = None
+CAPTURE = None    # (tree, render layers, viewer) from setup_memory_capture
+DIFF = None       # preview_diff.DiffReport with --diff
+RENDER_SETTINGS = None
+
+def init(args):
+    global ARGS, EXPORT_DIR, PREVIEW_DIR, CACHE_DIR, TILE_DIR
+    ARGS = args
+    EXPORT_DIR = Path(args.export_dir)
+    PREVIEW_DIR = EXPORT_DIR / "previews"
+    PREVIEW_DIR.mkdir(parents=True, exist_ok=True)
+    CACHE_DIR = PREVIEW_DIR / "_cache"
+    TILE_DIR = PREVIEW_DIR / "tiles"
 
 # -------------------------
 # Scene setup
@@ -41,36 +155,95 @@ def ensure_camera():
 
     cam_data.type = 'ORTHO'
     cam_data.ortho_scale = 3.0
-    cam.location = (3.0, -3.0, 2.2)
-    cam.rotation_euler = (math.radians(60), 0, math.radians(45))
+    cam.location = CAMERA_LOCATION
+    cam.rotation_euler = CAMERA_ROTATION
     return cam
 
 def ensure_light():
     light_data = bpy.data.lights.new("PreviewSun", type='SUN')
     light = bpy.data.objects.new("PreviewSun", light_data)
     bpy.context.scene.collection.objects.link(light)
-    light.rotation_euler = (math.radians(55), math.radians(0), math.radians(25))
+    light.rotation_euler = SUN_ROTATION
     light_data.energy = 2.5
     return light
 
-def configure_render(res):
+def configure_render(res, quality="eevee"):
     scene = bpy.context.scene
 
-    # Prefer fast engine in background
+    engines, samples = QUALITY_TIERS[quality]
     available = {e.identifier for e in bpy.types.RenderSettings.bl_rna.properties["engine"].enum_items}
-    if "BLENDER_EEVEE_NEXT" in available:
-        scene.render.engine = "BLENDER_EEVEE_NEXT"
-    elif "BLENDER_EEVEE" in available:
-        scene.render.engine = "BLENDER_EEVEE"
+    scene.render.engine = next((e for e in engines if e in available), "CYCLES")
+    if scene.render.engine == "BLENDER_WORKBENCH":
+        configure_workbench(scene, samples)
+    elif scene.render.engine == "CYCLES":
+        # the eevee tier only lands here when EEVEE is missing; keep it a quick preview
+        configure_cycles(scene, samples if quality == "cycles" else 16)
     else:
-        scene.render.engine = "CYCLES"
+        configure_eevee(scene, samples)
 
     scene.render.resolution_x = res
     scene.render.resolution_y = res
     scene.render.film_transparent = True
     scene.render.image_settings.file_format = 'PNG'
     scene.render.image_settings.color_mode = 'RGBA'
+    # Standard for every capture path: the memory capture can only sRGB-encode the Viewer's linear
+    # pixels, so a file capture under Filmic / AgX would give cached tiles a different look
+    scene.view_settings.view_transform = "Standard"
+    scene.view_settings.look = "None"
+
+def configure_workbench(scene, samples):
+    """Solid shading with studio light and material colours; no shadows or cavity, so it stays cheap."""
+    scene.display.render_aa = str(samples)
+    shading = scene.display.shading
+    shading.light = "STUDIO"
+    shading.color_type = "MATERIAL"
+    shading.show_shadows = False
+    shading.show_cavity = False
+    shading.show_object_outline = False
+    shading.show_specular_highlight = True
+
+def configure_eevee(scene, samples):
+    eevee = scene.eevee
+    eevee.taa_render_samples = samples
+    # EEVEE Next: screen-space rays cost more than they add at thumbnail size
+    if hasattr(eevee, "use_raytracing"):
+        eevee.use_raytracing = False
+    if hasattr(eevee, "use_gtao"):
+        eevee.use_gtao = False
+
+def configure_cycles(scene, samples):
+    cycles = scene.cycles
+    cycles.device = "CPU"
+    cycles.samples = samples
+    cycles.use_adaptive_sampling = True
+    cycles.adaptive_threshold = 0.05
+    cycles.use_denoising = True
+    # light paths: opaque painted props need a couple of diffuse bounces and no caustics
+    cycles.max_bounces = 4
+    cycles.diffuse_bounces = 2
+    cycles.glossy_bounces = 2
+    cycles.transmission_bounces = 2
+    cycles.volume_bounces = 0
+    cycles.transparent_max_bounces = 4
+    cycles.caustics_reflective = False
+    cycles.caustics_refractive = False
+
+def sync_viewport_colors():
+    """
+    Workbench shades with each material's viewport display colour, which the generators never set;
+    copy it (and roughness / metallic) from the Principled BSDF.
+    """
+    for mat in bpy.data.materials:
+        if mat.node_tree is None:
+            continue
+        bsdf = next((n for n in mat.node_tree.nodes if n.type == "BSDF_PRINCIPLED"), None)
+        if bsdf is None:
+            continue
+        mat.diffuse_color = bsdf.inputs["Base Color"].default_value
+        mat.roughness = bsdf.inputs["Roughness"].default_value
+        mat.metallic = bsdf.inputs["Metallic"].default_value
 
+@leaks.watch
 def delete_all_objects_except(cam, light):
     bpy.ops.object.select_all(action='SELECT')
     if cam:
@@ -82,6 +255,8 @@ def delete_all_objects_except(cam, light):
 # -------------------------
 # Import / mesh resolution
 # -------------------------
+@leaks.watch
+@prof.timed(prof.STAGE_PREVIEW_IMPORT)
 def import_glb_get_new_objects(filepath: Path):
     """
     Import GLB and return a list of newly created objects by diffing bpy.data.objects.
@@ -109,6 +284,8 @@ def collect_mesh_descendants(objs):
         visit(o)
     return list(meshes)
 
+@leaks.watch
+@prof.timed(prof.STAGE_PREVIEW_IMPORT)
 def join_meshes(meshes):
     """
     Join meshes into one object and return it.
@@ -151,37 +328,154 @@ def center_object_on_ground(obj):
     obj.location.y -= cy
     obj.location.z -= minz
 
-def fit_camera_ortho(cam, obj):
+def ortho_scale_for(obj):
     minx, maxx, miny, maxy, minz, maxz = compute_bounds(obj)
     dx = maxx - minx
     dy = maxy - miny
     dz = maxz - minz
     max_dim = max(dx, dy, dz)
-    cam.data.ortho_scale = max_dim * 2.2 if max_dim > 0 else 3.0
+    return max_dim * ORTHO_FIT if max_dim > 0 else 3.0
+
+def fit_camera_ortho(cam, obj):
+    cam.data.ortho_scale = ortho_scale_for(obj)
+
+def arrange_grid(cam, placed, cols, rows, cell=None):
+    """
+    Lay centred variants out as the cells of one orthographic frame. `placed` is a list of
+    (obj, col, row); obj may be None for an empty cell. Each object is scaled about the camera axis
+    so its cell looks exactly like fit_camera_ortho framing it alone. `cell` is the cell size in
+    world units (default: the largest variant's framing).
+    """
+    objs = [o for o, _, _ in placed if o is not None]
+    if cell is None:
+        cell = max(ortho_scale_for(o) for o in objs)
+    rot = cam.rotation_euler.to_matrix()
+    right = rot @ Vector((1.0, 0.0, 0.0))
+    up = rot @ Vector((0.0, 1.0, 0.0))
+    forward = rot @ Vector((0.0, 0.0, -1.0))
+    # point on the camera axis at the depth of the origin the variants were centred on
+    anchor = cam.location + forward * forward.dot(-cam.location)
+    depth = cell * GRID_DEPTH_GAP
+
+    for obj, col, row in placed:
+        if obj is None:
+            continue
+        s = cell / ortho_scale_for(obj)
+        offset = right * ((col - (cols - 1) / 2) * cell) + up * (((rows - 1) / 2 - row) * cell)
+        # 3x3 depth pattern: every neighbour (incl. diagonals) sits on a different depth level
+        level = col % 3 + 3 * (row % 3)
+        obj.location = anchor + (obj.location - anchor) * s + offset + forward * (level * depth)
+        obj.scale = obj.scale * s
 
-def render_png_bytes(tmp_path: Path):
-    bpy.context.scene.render.filepath = str(tmp_path)
-    bpy.ops.render.render(write_still=True)
-    data = tmp_path.read_bytes()
-    return data
+    cam.data.ortho_scale = cell * max(cols, rows)
+    cam.data.clip_end = max(cam.data.clip_end, (anchor - cam.location).length + 9 * depth + 2 * cell)
+    return cell
+
+# -------------------------
+# Render capture
+# -------------------------
+VIEWER_IMAGE = "Viewer Node"
+
+def setup_memory_capture():
+    """
+    Route renders through a compositor Viewer node so the pixels can be read with foreach_get
+    (the Render Result image has no pixel buffer in background mode). Viewer pixels are
+    scene-linear; viewer_rgba() does the sRGB encode of the Standard view transform that
+    configure_render() sets. Returns (tree, render_layers_node, viewer_node) so other passes can be
+    routed to the Viewer.
+    """
+    scene = bpy.context.scene
+    if hasattr(scene, "compositing_node_group"):  # Blender 5.x
+        tree = bpy.data.node_groups.new("PreviewCapture", "CompositorNodeTree")
+        scene.compositing_node_group = tree
+    else:
+        scene.use_nodes = True
+        tree = scene.node_tree
+        tree.nodes.clear()
+    scene.render.use_compositing = True
+
+    layers = tree.nodes.new("CompositorNodeRLayers")
+    viewer = tree.nodes.new("CompositorNodeViewer")
+    tree.links.new(layers.outputs["Image"], viewer.inputs["Image"])
+    if "Alpha" in viewer.inputs:
+        tree.links.new(layers.outputs["Alpha"], viewer.inputs["Alpha"])
+    if hasattr(viewer, "use_alpha"):
+        viewer.use_alpha = True
+    try:
+        composite = tree.nodes.new("CompositorNodeComposite")
+        tree.links.new(layers.outputs["Image"], composite.inputs["Image"])
+    except RuntimeError:
+        pass  # no Composite node in Blender 5; the Viewer alone drives the compositor
+    return tree, layers, viewer
+
+def viewer_pixels():
+    """Raw Viewer node pixels as a top-down (H, W, 4) float32 array (scene-linear / pass values)."""
+    img = bpy.data.images[VIEWER_IMAGE]
+    w, h = img.size
+    px = np.empty(w * h * 4, dtype=np.float32)
+    img.pixels.foreach_get(px)
+    return px.reshape(h, w, 4)[::-1]
+
+def viewer_rgba():
+    """Viewer node pixels (linear, premultiplied, bottom-up) -> top-down sRGB (H, W, 4) uint8."""
+    px = viewer_pixels()
+
+    alpha = np.clip(px[..., 3:4], 0.0, 1.0)
+    rgb = np.where(alpha > 0.0, px[..., :3] / np.maximum(alpha, 1e-8), 0.0)
+    rgb = np.clip(rgb, 0.0, 1.0)
+    srgb = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1.0 / 2.4) - 0.055)
+    return (np.concatenate([srgb, alpha], axis=2) * 255.0 + 0.5).astype(np.uint8)
+
+@leaks.watch
+@prof.timed(prof.STAGE_PREVIEW_RENDER)
+def render_rgba():
+    """Render once and return the result as a top-down (H, W, 4) uint8 array."""
+    if bpy.context.scene.render.engine == "BLENDER_WORKBENCH":
+        sync_viewport_colors()
+    if ARGS.capture == "file":
+        tmp_path = PREVIEW_DIR / f"__tmp_render_{temp_tag()}.png"
+        bpy.context.scene.render.filepath = str(tmp_path)
+        bpy.ops.render.render(write_still=True)
+        rgba = load_png_rgba(tmp_path)
+        tmp_path.unlink(missing_ok=True)
+        return rgba
+    bpy.ops.render.render()
+    return viewer_rgba()
+
+def temp_tag():
+    """Host + pid for temp file names: queue workers on several hosts share the export and cache folders."""
+    return f"{socket.gethostname()}.{os.getpid()}"
+
+def load_png_rgba(path: Path):
+    """Decode a PNG through Blender into a top-down (H, W, 4) uint8 array."""
+    img = bpy.data.images.load(str(path))
+    w, h = img.size
+    px = np.empty(w * h * 4, dtype=np.float32)
+    img.pixels.foreach_get(px)
+    bpy.data.images.remove(img)
+    return (px.reshape(h, w, 4)[::-1] * 255.0 + 0.5).astype(np.uint8)
+
+def encode_tile(rgba):
+    return png_encode.encode_png(rgba, ARGS.png_filter, ARGS.png_level, ARGS.png_palette)
 
 # -------------------------
 # SVG generation
 # -------------------------
-def svg_wrap_three(png_b64_list, size):
+def svg_wrap_three(hrefs, size):
+    """Three cells side by side; hrefs are data: URIs or tile paths relative to the SVG ("" = missing)."""
     W = size * 3
     H = size
     parts = [
         f'<svg xmlns="http://www.w3.org/2000/svg" width="{W}" height="{H}" viewBox="0 0 {W} {H}">',
         '<rect width="100%" height="100%" fill="white"/>'
     ]
-    for i, b64 in enumerate(png_b64_list):
+    for i, href in enumerate(hrefs):
         x = i * size
 
-        if b64:
+        if href:
             parts.append(
                 f'<image x="{x}" y="0" width="{size}" height="{size}" '
-                f'href="data:image/png;base64,{b64}"/>'
+                f'href="{href}"/>'
             )
         else:
             # Placeholder tile if render missing
@@ -194,72 +488,490 @@ def svg_wrap_three(png_b64_list, size):
     parts.append("</svg>")
     return "\n".join(parts)
 
-def find_base_props(export_dir: Path):
-    v0s = sorted(export_dir.glob("*_v0.glb"))
-    bases = []
-    for p in v0s:
-        stem = p.stem  # PROP_Acorn_v0
-        base = stem[:-3]  # remove "_v0"
-        bases.append(base)
-    return bases
+# -------------------------
+# Tile cache
+# -------------------------
+# One PNG per tile in previews/_cache, named after sha256(GLB sha256 + render settings). The file
+# name is the index: no shared index file, so parallel workers can fill the cache concurrently.
+_cache_stats = {"hit": 0, "miss": 0}
+
+def render_settings():
+    """Everything besides the GLB bytes that changes a tile; part of every cache key."""
+    scene = bpy.context.scene
+
+    def vec(v):
+        return [round(x, 6) for x in v]
+
+    return {
+        "cacheVersion": CACHE_VERSION,
+        "blender": bpy.app.version_string,
+        "engine": scene.render.engine,
+        "quality": ARGS.quality,
+        "samples": QUALITY_TIERS[ARGS.quality][1],
+        "thumbSize": THUMB_SIZE,
+        "filmTransparent": scene.render.film_transparent,
+        "capture": ARGS.capture,
+        "viewTransform": scene.view_settings.view_transform,
+        "png": {"filter": ARGS.png_filter, "level": ARGS.png_level, "palette": ARGS.png_palette,
+                "maxError": png_encode.MAX_PALETTE_ERROR},
+        "camera": {"type": cam.data.type, "location": vec(CAMERA_LOCATION), "rotation": vec(CAMERA_ROTATION),
+                   "orthoFit": ORTHO_FIT},
+        "light": {"type": light.data.type, "rotation": vec(SUN_ROTATION), "energy": light.data.energy},
+        # grid renders frame, light and bleed differently from one object per render
+        "mode": render_mode(),
+        "grid": grid_settings(),
+    }
+
+def render_mode():
+    if ARGS.contact_sheet:
+        return "contact-sheet"
+    return "single-pass" if ARGS.single_pass else "per-object"
+
+def grid_settings():
+    """Layout of the shared render the tiles are cropped from (None when each variant renders alone)."""
+    if ARGS.contact_sheet:
+        cols, spacing = contact_sheet_grid()
+        return {"depthGap": GRID_DEPTH_GAP, "cols": cols, "spacing": spacing}
+    if ARGS.single_pass:
+        return {"depthGap": GRID_DEPTH_GAP, "cols": len(VARIANTS)}
+    return None
+
+def file_sha256(path: Path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def tile_key(glb: Path):
+    payload = json.dumps({"glb": file_sha256(glb), "settings": RENDER_SETTINGS}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def cache_get(key):
+    """Cached PNG bytes for key, or None (always None with --no-cache)."""
+    path = CACHE_DIR / f"{key}.png"
+    if ARGS.no_cache or not path.exists():
+        _cache_stats["miss"] += 1
+        return None
+    _cache_stats["hit"] += 1
+    return path.read_bytes()
+
+def cache_put(key, png_bytes):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE_DIR / f"{key}.{temp_tag()}.tmp"
+    tmp.write_bytes(png_bytes)
+    os.replace(tmp, CACHE_DIR / f"{key}.png")
 
 # -------------------------
-# Main
+# Rendering
 # -------------------------
-print("Export dir:", str(EXPORT_DIR))
-
-reset_scene()
-cam = ensure_camera()
-light = ensure_light()
-configure_render(THUMB_SIZE)
-
-bases = find_base_props(EXPORT_DIR)
-if not bases:
-    raise RuntimeError(f"No *_v0.glb files found in {EXPORT_DIR}")
-
-index_lines = [
-    "<!doctype html><html><head><meta charset='utf-8'><title>Prop Previews</title></head><body>",
-    "<h1>Prop Preview Sheets</h1>",
-    "<ul style='list-style:none;padding:0'>"
-]
-
-for base in bases:
-    png_b64s = []
-    for v in (0, 1, 2):
-        glb = EXPORT_DIR / f"{base}_v{v}.glb"
-        if not glb.exists():
-            png_b64s.append("")
-            continue
+def setup_preview_scene(clear=True):
+    """Camera, sun, render settings and capture; clear=False keeps the scene's objects (generators)."""
+    global cam, light, RENDER_SETTINGS, CAPTURE
+    if clear:
+        reset_scene()
+        leaks.purge()
+    cam = ensure_camera()
+    light = ensure_light()
+    configure_render(THUMB_SIZE, ARGS.quality)
+    if ARGS.capture == "memory":
+        CAPTURE = setup_memory_capture()
+    if ARGS.single_pass:
+        bpy.context.scene.render.resolution_x = THUMB_SIZE * len(VARIANTS)
+    RENDER_SETTINGS = render_settings()
+
+def load_variant(glb: Path):
+    """Import a variant GLB, join its meshes and centre it on the ground; None if it has no mesh."""
+    new_objs = import_glb_get_new_objects(glb)
+    meshes = collect_mesh_descendants(new_objs)
+    merged = join_meshes(meshes)
+
+    if merged is None:
+        print(f"Warning: No mesh found for {glb.name} (skipping render)")
+        return None
 
-        # Clear previous imported objects
-        delete_all_objects_except(cam, light)
+    center_object_on_ground(merged)
+    return merged
 
-        new_objs = import_glb_get_new_objects(glb)
-        meshes = collect_mesh_descendants(new_objs)
-        merged = join_meshes(meshes)
+def render_variant(base, v):
+    """One render per variant; returns the base64 PNG ("" when missing)."""
+    prof.set_context(base, v)
+    glb = EXPORT_DIR / f"{base}_v{v}.glb"
+    if not glb.exists():
+        return ""
 
-        if merged is None:
-            print(f"Warning: No mesh found for {glb.name} (skipping render)")
-            png_b64s.append("")
-            continue
+    key = tile_key(glb)
+    cached = cache_get(key)
+    if cached is not None:
+        return base64.b64encode(cached).decode("ascii")
 
-        # Normalize pose + frame
-        center_object_on_ground(merged)
-        fit_camera_ortho(cam, merged)
+    # Imported objects are deleted after the render; the tracker purges their meshes/materials
+    with leaks.track(f"{base}_v{v}"):
+        try:
+            merged = load_variant(glb)
+            if merged is None:
+                return ""
 
-        tmp_png = PREVIEW_DIR / f"__tmp_{base}_v{v}.png"
-        png_bytes = render_png_bytes(tmp_png)
-        tmp_png.unlink(missing_ok=True)
+            fit_camera_ortho(cam, merged)
 
-        png_b64s.append(base64.b64encode(png_bytes).decode("ascii"))
+            png_bytes = encode_tile(render_rgba())
+            cache_put(key, png_bytes)
 
-    svg = svg_wrap_three(png_b64s, THUMB_SIZE)
-    out_svg = PREVIEW_DIR / f"{base}.svg"
-    out_svg.write_text(svg, encoding="utf-8")
+            return base64.b64encode(png_bytes).decode("ascii")
+        finally:
+            delete_all_objects_except(cam, light)
 
-    index_lines.append(f"<li style='margin:20px 0'><h3>{base}</h3><img src='{out_svg.name}' /></li>")
+def render_prop_single_pass(base):
+    """
+    All uncached variants of a prop in one render, cropped into THUMB_SIZE cells; "" for missing
+    ones, None for variants outside --variants. Nothing is rendered when every variant comes from the cache.
+    """
+    cells = [""] * len(VARIANTS)
+    keys = [None] * len(VARIANTS)
+    with leaks.track(base):
+        try:
+            objs = []
+            for i, v in enumerate(VARIANTS):
+                if not prop_filter.variant_selected(ARGS, v):
+                    cells[i] = None
+                    objs.append(None)
+                    continue
+                prof.set_context(base, v)
+                glb = EXPORT_DIR / f"{base}_v{v}.glb"
+                cached = None
+                if glb.exists():
+                    keys[i] = tile_key(glb)
+                    cached = cache_get(keys[i])
+                if cached is not None:
+                    cells[i] = base64.b64encode(cached).decode("ascii")
+                objs.append(load_variant(glb) if glb.exists() and cached is None else None)
+            if all(o is None for o in objs):
+                return cells
+
+            prof.set_context(base)
+            arrange_grid(cam, [(o, i, 0) for i, o in enumerate(objs)], len(objs), 1)
+            rgba = render_rgba()
+
+            for i, obj in enumerate(objs):
+                if obj is None:
+                    continue
+                png_bytes = encode_tile(rgba[:, i * THUMB_SIZE:(i + 1) * THUMB_SIZE])
+                cache_put(keys[i], png_bytes)
+                cells[i] = base64.b64encode(png_bytes).decode("ascii")
+            return cells
+        finally:
+            delete_all_objects_except(cam, light)
+
+def contact_sheet_layout(bases):
+    """
+    (entries, cols, spacing): entries are (base, variant, glb) in the generators' layout order,
+    taken from the metadata when present so the sheet matches the Blender scene grid.
+    """
+    meta_path = EXPORT_DIR / "park_props_metadata.json"
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        entries = [(p["name"], var["variantIndex"], EXPORT_DIR / var["file"])
+                   for p in meta["props"] for var in p["variants"]]
+    else:
+        entries = [(b, v, EXPORT_DIR / f"{b}_v{v}.glb") for b in bases for v in VARIANTS]
+    return (entries, *contact_sheet_grid())
+
+def contact_sheet_grid():
+    """(cols, spacing) of the contact sheet: the metadata's "layoutGrid", else the generators' defaults."""
+    meta_path = EXPORT_DIR / "park_props_metadata.json"
+    grid = json.loads(meta_path.read_text(encoding="utf-8")).get("layoutGrid", {}) if meta_path.exists() else {}
+    return grid.get("cols", DEFAULT_GRID_COLS), grid.get("spacing", DEFAULT_GRID_SPACING)
+
+def render_contact_sheet(entries, cols, spacing, manifest):
+    """
+    Render the pack as PNG tiles of `--sheet-rows` grid rows and fill `manifest` with the tile files
+    and each variant's crop rectangle. Yields (base, png_b64s) as soon as all of a prop's variants
+    have been cut, so only the current tile is held in memory.
+    """
+    rows_total = (len(entries) + cols - 1) // cols
+    remaining = {}
+    for base, _, _ in entries:
+        remaining[base] = remaining.get(base, 0) + 1
+    cells = {}
+
+    manifest.update({"thumbSize": THUMB_SIZE, "cols": cols, "rows": rows_total, "tiles": [], "variants": []})
+    for tile_index, row0 in enumerate(range(0, rows_total, ARGS.sheet_rows)):
+        rows = min(ARGS.sheet_rows, rows_total - row0)
+        chunk = entries[row0 * cols:(row0 + rows) * cols]
+        width, height = cols * THUMB_SIZE, rows * THUMB_SIZE
+
+        with leaks.track(f"contact_sheet_{tile_index}"):
+            try:
+                placed = []
+                keys = []
+                cached = {}   # chunk index -> cache key of a tile that needs no render
+                for k, (base, v, glb) in enumerate(chunk):
+                    prof.set_context(base, v)
+                    key = tile_key(glb) if glb.exists() else None
+                    keys.append(key)
+                    if key is not None and cache_get(key) is not None:
+                        cached[k] = key
+                    obj = load_variant(glb) if key is not None and k not in cached else None
+                    placed.append((obj, k % cols, k // cols))
+                prof.set_context()
+
+                if any(o is not None for o, _, _ in placed):
+                    bpy.context.scene.render.resolution_x = width
+                    bpy.context.scene.render.resolution_y = height
+                    arrange_grid(cam, placed, cols, rows, cell=spacing)
+                    rgba = render_rgba()
+                else:
+                    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+            finally:
+                delete_all_objects_except(cam, light)
+
+            for k, key in cached.items():
+                x, y = (k % cols) * THUMB_SIZE, (k // cols) * THUMB_SIZE
+                rgba[y:y + THUMB_SIZE, x:x + THUMB_SIZE] = load_png_rgba(CACHE_DIR / f"{key}.png")
+
+        tile_name = f"_contact_sheet_{tile_index}.png"
+        (PREVIEW_DIR / tile_name).write_bytes(encode_tile(rgba))
+        manifest["tiles"].append({"file": tile_name, "width": width, "height": height, "firstRow": row0})
+        print("Wrote:", str(PREVIEW_DIR / tile_name))
+
+        for k, (base, v, glb) in enumerate(chunk):
+            x, y = (k % cols) * THUMB_SIZE, (k // cols) * THUMB_SIZE
+            present = placed[k][0] is not None or k in cached
+            manifest["variants"].append({
+                "prop": base, "variant": v, "file": glb.name, "tile": tile_index,
+                "x": x, "y": y, "w": THUMB_SIZE, "h": THUMB_SIZE, "missing": not present,
+            })
+            png_bytes = b""
+            if k in cached:
+                png_bytes = (CACHE_DIR / f"{cached[k]}.png").read_bytes()
+            elif present:
+                png_bytes = encode_tile(rgba[y:y + THUMB_SIZE, x:x + THUMB_SIZE])
+                cache_put(keys[k], png_bytes)
+            cells.setdefault(base, {})[v] = base64.b64encode(png_bytes).decode("ascii")
+            remaining[base] -= 1
+            if remaining[base] == 0:
+                got = cells.pop(base)
+                yield base, [got.get(i, "") for i in VARIANTS]
+
+def render_live_object(obj, glb=None):
+    """
+    Render a mesh object that is already in the scene (the generators' --previews option) with the
+    same centring and camera fit as an imported variant. Its location and the render visibility of
+    every other object are restored afterwards. `glb` is the file it was exported to, for the cache.
+    """
+    key = tile_key(glb) if glb is not None else None
+    cached = cache_get(key) if key is not None else None
+    if cached is not None:
+        return base64.b64encode(cached).decode("ascii")
+
+    saved_location = obj.location.copy()
+    hidden = [o for o in bpy.context.scene.objects if o not in (obj, cam, light) and not o.hide_render]
+    for o in hidden:
+        o.hide_render = True
+    try:
+        center_object_on_ground(obj)
+        fit_camera_ortho(cam, obj)
+        png_bytes = encode_tile(render_rgba())
+    finally:
+        obj.location = saved_location
+        for o in hidden:
+            o.hide_render = False
+
+    if key is not None:
+        cache_put(key, png_bytes)
+    return base64.b64encode(png_bytes).decode("ascii")
+
+def sheet_tile_keys(base):
+    """Tile cache key of each variant GLB of a prop (None where the GLB is missing)."""
+    return [tile_key(glb) if glb.exists() else None for glb in (EXPORT_DIR / f"{base}_v{v}.glb" for v in VARIANTS)]
+
+def cached_tile(glb: Path):
+    """The cached tile of a GLB as base64, or None (write_prop_svg keeps the existing sheet's tile)."""
+    cached = cache_get(tile_key(glb))
+    return base64.b64encode(cached).decode("ascii") if cached is not None else None
+
+def import_pack(pack_path: Path):
+    """
+    Import the combined pack once and return {(base, variant): mesh object}, keyed by the
+    <base>_v<n> name of each top-level node. Variant objects are unparented so re-centring works
+    in world space.
+    """
+    prof.set_context()
+    groups = {}
+    for o in collect_mesh_descendants(import_glb_get_new_objects(pack_path)):
+        top = o
+        while top.parent is not None:
+            top = top.parent
+        m = VARIANT_NAME.match(top.name)
+        if m is None:
+            print(f"Warning: {PACK_NAME} node '{top.name}' is not named <base>_v<n> (ignored)")
+            continue
+        groups.setdefault((m.group("base"), int(m.group("variant"))), []).append(o)
+
+    variants = {}
+    for key, meshes in groups.items():
+        obj = join_meshes(meshes)
+        if obj.parent is not None:
+            world = obj.matrix_world.copy()
+            obj.parent = None
+            obj.matrix_world = world
+        variants[key] = obj
+    return variants
+
+def render_from_pack(pack_objects, bases):
+    """Yield (base, png_b64s) rendering the already imported pack variants one at a time."""
+    for base in bases:
+        png_b64s = []
+        for v in VARIANTS:
+            if not prop_filter.variant_selected(ARGS, v):
+                png_b64s.append(None)
+                continue
+            prof.set_context(base, v)
+            obj = pack_objects.get((base, v))
+            glb = EXPORT_DIR / f"{base}_v{v}.glb"
+            png_b64s.append(render_live_object(obj, glb if glb.exists() else None) if obj is not None else "")
+        yield base, png_b64s
+
+def write_tile(png_bytes):
+    """Store a tile under its content hash (once) and return its href relative to the SVGs."""
+    name = hashlib.sha256(png_bytes).hexdigest() + ".png"
+    path = TILE_DIR / name
+    if not path.exists():
+        TILE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = TILE_DIR / f"{name}.{temp_tag()}.tmp"
+        tmp.write_bytes(png_bytes)
+        os.replace(tmp, path)
+    return f"{TILE_DIR.name}/{name}"
+
+def diff_sheet(base, out_svg, svg_text, png_b64s):
+    """Compare a prop's new tiles with the sheet about to be overwritten (--diff)."""
+    old_text = out_svg.read_text(encoding="utf-8") if out_svg.exists() else ""
+    if old_text == svg_text:
+        DIFF.add_unchanged(sum(1 for b in png_b64s if b))
+        return
+    rendered = {v for v, b in zip(VARIANTS, png_b64s) if b is not None}
+    before = thumb_atlas.sheet_icons(out_svg, THUMB_SIZE) if old_text else {}
+    before = {v: rgba for v, rgba in before.items() if v in rendered}
+    after = {v: png_encode.decode_png(base64.b64decode(b)) for v, b in zip(VARIANTS, png_b64s) if b}
+    DIFF.add_sheet(base, before, after)
+
+def sheet_hrefs(svg_path: Path):
+    """{variant: href} of an existing sheet ({} if there is none)."""
+    if not svg_path.exists():
+        return {}
+    return {int(x) // THUMB_SIZE: href
+            for x, href in thumb_atlas.SHEET_IMAGE.findall(svg_path.read_text(encoding="utf-8"))}
+
+def write_prop_svg(base, png_b64s):
+    """png_b64s per variant: base64 PNG, "" (missing) or None (keep the tile of the existing sheet)."""
+    out_svg = PREVIEW_DIR / f"{base}.svg"
+    kept = sheet_hrefs(out_svg) if None in png_b64s else {}
+    hrefs = []
+    for v, b in zip(VARIANTS, png_b64s):
+        if b is None:
+            hrefs.append(kept.get(v, ""))
+        elif ARGS.tiles == "external":
+            hrefs.append(write_tile(base64.b64decode(b)) if b else "")
+        else:
+            hrefs.append(f"data:image/png;base64,{b}" if b else "")
+    svg_text = svg_wrap_three(hrefs, THUMB_SIZE)
+    if DIFF is not None:
+        diff_sheet(base, out_svg, svg_text, png_b64s)
+    out_svg.write_text(svg_text, encoding="utf-8")
     print("Wrote:", str(out_svg))
+    return out_svg
+
+# -------------------------
+# Main
+# -------------------------
+def main():
+    global DIFF
+    init(parse_args())
+    prof.configure(ARGS)
+
+    print("Export dir:", str(EXPORT_DIR))
 
-index_lines.append("</ul></body></html>")
-(PREVIEW_DIR / "_preview_index.html").write_text("\n".join(index_lines), encoding="utf-8")
-print("Index:", str(PREVIEW_DIR / "_preview_index.html"))
+    setup_preview_scene()
+
+    if ARGS.from_pack:
+        # works on a directory that only holds the pack
+        pack_objects = import_pack(EXPORT_DIR / PACK_NAME)
+        bases = sorted({base for base, _ in pack_objects})
+    else:
+        bases = find_base_props(EXPORT_DIR)
+    if not bases:
+        raise RuntimeError(f"No *_v0.glb files found in {EXPORT_DIR}")
+    all_bases = bases
+    if prop_filter.is_partial(ARGS):
+        bases = prop_filter.select_bases(ARGS, bases, EXPORT_DIR / "park_props_metadata.json")
+    if ARGS.shard:
+        shard, shard_count = (int(x) for x in ARGS.shard.split("/"))
+        bases = bases[shard::shard_count]
+
+    # One line per finished sheet; tiles within a sheet are already checkpointed by the tile cache.
+    # Workers (--shard) each keep their own journal. A sheet is resumed only while the tile keys of
+    # its GLBs (GLB hash + render settings) are the ones it was rendered from.
+    journal_name = build_journal.shard_name(JOURNAL_NAME, shard, shard_count) if ARGS.shard else JOURNAL_NAME
+    journal = build_journal.Journal(
+        PREVIEW_DIR / (ARGS.journal or journal_name),
+        build_journal.build_id(build_journal.file_sha256(__file__), json.dumps(RENDER_SETTINGS, sort_keys=True), ARGS.tiles),
+        resume=ARGS.resume)
+    pack_sha = file_sha256(EXPORT_DIR / PACK_NAME) if ARGS.from_pack else None
+
+    def sources(base):
+        return {"tileKeys": sheet_tile_keys(base), "pack": pack_sha}
+
+    resumed = [b for b in bases if journal.get(b, lambda frag: frag.get("sources") == sources(b)) is not None] \
+        if ARGS.resume else []
+    bases = [b for b in bases if b not in resumed]
+
+    written = list(resumed)
+    if ARGS.diff:
+        DIFF = preview_diff.DiffReport(PREVIEW_DIR / "_diff")
+
+    if ARGS.contact_sheet:
+        sheet_manifest = {}
+        sheets = render_contact_sheet(*contact_sheet_layout(bases), sheet_manifest)
+    elif ARGS.from_pack:
+        sheets = render_from_pack(pack_objects, bases)
+    elif ARGS.single_pass:
+        sheets = ((base, render_prop_single_pass(base)) for base in bases)
+    else:
+        sheets = ((base, [render_variant(base, v) if prop_filter.variant_selected(ARGS, v) else None for v in VARIANTS])
+                  for base in bases)
+
+    for base, png_b64s in sheets:
+        out_svg = write_prop_svg(base, png_b64s)
+        journal.record(base, [out_svg], {"tiles": sum(1 for b in png_b64s if b), "sources": sources(base)})
+        written.append(base)
+    journal.close()
+    written.sort(key=all_bases.index)  # resumed sheets were listed first
+
+    index_header = []
+    if ARGS.contact_sheet:
+        manifest_path = PREVIEW_DIR / "_contact_sheet.json"
+        manifest_path.write_text(json.dumps(sheet_manifest, indent=1), encoding="utf-8")
+        links = " ".join(f"<a href='{t['file']}'>{t['file']}</a>" for t in sheet_manifest["tiles"])
+        index_header.append(f"<p>Contact sheet: {links} (<a href='{manifest_path.name}'>manifest</a>)</p>")
+        print("Contact sheet manifest:", str(manifest_path))
+
+    if DIFF is not None:
+        report = DIFF.write()
+        index_header.append(f"<p><a href='{report.relative_to(PREVIEW_DIR).as_posix()}'>Changes since the last run</a> "
+                            f"({len(DIFF.entries)} of {DIFF.compared} tiles)</p>")
+
+    if prop_filter.is_partial(ARGS):
+        # the index and atlas still cover the sheets this run did not touch
+        written = [b for b in all_bases if (PREVIEW_DIR / f"{b}.svg").exists()]
+    if not ARGS.no_index:
+        write_index(PREVIEW_DIR, written, index_header)
+    if ARGS.atlas:
+        thumb_atlas.write_atlas(PREVIEW_DIR, written, THUMB_SIZE, ARGS.atlas_icon)
+
+    print(f"Tile cache: {_cache_stats['hit']} reused, {_cache_stats['miss']} rendered ({CACHE_DIR})")
+    leaks.print_summary()
+
+    prof.finish(Path(__file__).name)
+
+if __name__ == "__main__":
+    main()
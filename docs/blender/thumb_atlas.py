@@ -0,0 +1,157 @@
+# thumb_atlas.py
+# Plain Python + NumPy (no bpy import): packs every variant thumbnail into one power-of-two UI
+# atlas texture plus a UV-rect manifest, so shop / collection screens can draw any prop icon from one
+# texture and one material.
+#
+# Reads the preview sheets render_previews_svg.py wrote (inline base64 or --tiles external), so it
+# runs after any preview mode, including the parallel driver; render_previews_svg.py --atlas calls it
+# at the end of a run. Vector sheets (vector_previews.py) have no tiles and are skipped.
+#
+# Output (next to the sheets):
+#   - ui_atlas_<n>.png: power-of-two pages of at most --max-size px a side (usually just ui_atlas_0.png)
+#   - ui_atlas.json:    per "<PROP>_v<n>" icon: page, pixel rect and normalised uv rect. Both rects use a
+#                       bottom-left origin (Unity Rect / Sprite.Create); "padding" px of edge colour
+#                       surround every icon so bilinear filtering and mip levels do not bleed.
+#
+# Usage:
+#   python thumb_atlas.py ./out/park_pack/previews
+#   python thumb_atlas.py ./out/park_pack/previews --icon 64 --max-size 1024
+#
+import argparse
+import base64
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+import png_encode
+
+ATLAS_NAME = "ui_atlas"
+ICON_SIZE = 128
+PADDING = 4
+MAX_SIZE = 2048
+SHEET_IMAGE = re.compile(r'<image x="(\d+)" [^>]*href="([^"]+)"')
+
+# =========================
+# TILES
+# =========================
+def sheet_icons(svg_path: Path, thumb_size):
+    """{variant: rgba} for the tiles of one preview sheet; cells are thumb_size wide."""
+    icons = {}
+    for x, href in SHEET_IMAGE.findall(svg_path.read_text(encoding="utf-8")):
+        if href.startswith("data:image/png;base64,"):
+            data = base64.b64decode(href.split(",", 1)[1])
+        else:
+            data = (svg_path.parent / href).read_bytes()
+        icons[int(x) // thumb_size] = png_encode.decode_png(data)
+    return icons
+
+def downscale(rgba, size):
+    """Box-filter an (S, S, 4) tile to (size, size, 4) in premultiplied alpha (no dark fringes)."""
+    factor = rgba.shape[0] // size
+    if factor <= 1:
+        return rgba
+    px = rgba[:size * factor, :size * factor].astype(np.float64)
+    px[..., :3] *= px[..., 3:4] / 255.0
+    px = px.reshape(size, factor, size, factor, 4).mean(axis=(1, 3))
+    alpha = px[..., 3:4]
+    px[..., :3] = np.where(alpha > 0, px[..., :3] * 255.0 / np.maximum(alpha, 1e-6), 0)
+    return np.clip(np.round(px), 0, 255).astype(np.uint8)
+
+# =========================
+# PACKING
+# =========================
+def _pot(n):
+    side = 1
+    while side < n:
+        side *= 2
+    return side
+
+def atlas_size(count, cell, max_size):
+    """(width, height): the smallest-area power-of-two page holding `count` cells, at most max_size a side."""
+    best = None
+    width = _pot(cell)
+    while width <= max_size:
+        cols = width // cell
+        height = _pot(-(-count // cols) * cell)
+        if height <= max_size and (best is None or width * height < best[0] * best[1]):
+            best = (width, height)
+        width *= 2
+    return best
+
+def pack(icons, icon, padding, max_size):
+    """
+    icons: list of (name, rgba). Returns (pages [(H, W, 4) uint8], {name: entry}); icons that
+    do not fit a max_size page start the next one.
+    """
+    cell = icon + 2 * padding
+    if cell > max_size:
+        raise ValueError(f"icon {icon}px + padding does not fit a {max_size}px atlas")
+    per_page = (max_size // cell) ** 2
+    pages, entries = [], {}
+    for start in range(0, len(icons), per_page):
+        chunk = icons[start:start + per_page]
+        width, height = atlas_size(len(chunk), cell, max_size)
+        cols = width // cell
+        page = np.zeros((height, width, 4), dtype=np.uint8)
+        for k, (name, rgba) in enumerate(chunk):
+            cx, cy = (k % cols) * cell, (k // cols) * cell
+            # edge-extended padding
+            page[cy:cy + cell, cx:cx + cell] = np.pad(rgba, ((padding, padding), (padding, padding), (0, 0)), mode="edge")
+            x, y_top = cx + padding, cy + padding
+            y = height - (y_top + icon)  # bottom-left origin
+            entries[name] = {
+                "page": len(pages),
+                "rect": [x, y, icon, icon],
+                "uv": [x / width, y / height, icon / width, icon / height],
+            }
+        pages.append(page)
+    return pages, entries
+
+def write_atlas(preview_dir: Path, bases, thumb_size=256, icon=ICON_SIZE, padding=PADDING, max_size=MAX_SIZE):
+    """Pack the thumbnails of `bases` from preview_dir/<base>.svg; returns the manifest path (None if no tiles)."""
+    if thumb_size % icon:
+        raise ValueError(f"icon size {icon} must divide the thumbnail size {thumb_size}")
+    preview_dir = Path(preview_dir)
+    icons = []
+    for base in bases:
+        svg = preview_dir / f"{base}.svg"
+        if not svg.exists():
+            continue
+        for v, rgba in sorted(sheet_icons(svg, thumb_size).items()):
+            icons.append((f"{base}_v{v}", downscale(rgba, icon)))
+    if not icons:
+        print(f"Atlas: no raster tiles in {preview_dir} (vector or missing sheets)")
+        return None
+
+    pages, entries = pack(icons, icon, padding, max_size)
+    textures = []
+    for n, page in enumerate(pages):
+        name = f"{ATLAS_NAME}_{n}.png"
+        (preview_dir / name).write_bytes(png_encode.encode_png(page))
+        textures.append({"file": name, "width": page.shape[1], "height": page.shape[0]})
+
+    manifest = {"iconSize": icon, "padding": padding, "origin": "bottom-left", "textures": textures, "icons": entries}
+    out = preview_dir / f"{ATLAS_NAME}.json"
+    out.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    sizes = ", ".join(f"{t['width']}x{t['height']}" for t in textures)
+    print(f"Atlas: {len(entries)} icons on {len(textures)} page(s) ({sizes}) -> {out}")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Pack preview thumbnails into a UI atlas.")
+    ap.add_argument("preview_dir")
+    ap.add_argument("--thumb-size", type=int, default=256, help="cell width of the preview sheets")
+    ap.add_argument("--icon", type=int, default=ICON_SIZE, help="icon size in the atlas (divides --thumb-size)")
+    ap.add_argument("--padding", type=int, default=PADDING)
+    ap.add_argument("--max-size", type=int, default=MAX_SIZE, help="largest atlas page (power of two)")
+    args = ap.parse_args()
+
+    preview_dir = Path(args.preview_dir)
+    bases = sorted(p.stem for p in preview_dir.glob("*.svg"))
+    if write_atlas(preview_dir, bases, args.thumb_size, args.icon, args.padding, args.max_size) is None:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+# vector_previews.py
+# Plain Python + NumPy (no bpy import): true vector SVG previews straight from the exported GLBs.
+#
+# Same view as render_previews_svg.py (camera / sun constants from preview_camera.py), but the
+# triangles are projected and flat-shaded in NumPy instead of rendered:
+#   - centre each variant on the ground and fit the orthographic camera (ORTHO_FIT)
+#   - back-face cull, shade each face with the sun direction (Lambert + ambient, SHADE_LEVELS steps)
+#   - drop faces a z-buffer shows to be fully hidden (clustered props overlap a lot)
+#   - merge connected (near-)coplanar faces of the same colour into one polygon
+#   - paint the polygons far to near into previews/<PROP_NAME>.svg (same 3-cell layout)
+#
+# Scales to any size and is far smaller than the base64 PNG sheets. No shadows, no specular, and
+# textures are ignored (baseColorFactor only).
+#
+# Usage:
+#   python vector_previews.py ./out/park_pack
+#   python vector_previews.py ./out/park_pack --size 512 --out-dir ./out/park_pack/previews_vector
+#
+import argparse
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+
+from glb_pack import read_glb_header
+from preview_camera import CAMERA_LOCATION, CAMERA_ROTATION, ORTHO_FIT, SUN_ROTATION
+from preview_index import find_base_props, write_index
+
+VARIANTS = (0, 1, 2)
+AMBIENT = 0.35    # flat shading: colour * (AMBIENT + DIFFUSE * max(0, n.sun))
+DIFFUSE = 0.75
+SHADE_LEVELS = 8  # light intensity is quantised so faces of a bevel or curved patch can merge
+MERGE_ANGLE = math.radians(35)  # neighbouring faces this close to coplanar merge when their colour matches
+MIN_STEP = 0.35   # px; outline points closer than this, or on a straight run, are dropped
+SUPERSAMPLE = 2   # visibility z-buffer resolution, per output pixel
+WELD = 1e-5       # positions closer than this share a vertex (glTF splits vertices at seams)
+
+COMPONENT_DTYPES = {5120: np.int8, 5121: np.uint8, 5122: np.int16, 5123: np.uint16, 5125: np.uint32, 5126: np.float32}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT4": 16}
+MODE_TRIANGLES = 4
+
+# =========================
+# GLB READING
+# =========================
+def euler_to_matrix(rx, ry, rz):
+    """Blender 'XYZ' Euler -> 3x3 rotation matrix."""
+    cx, sx = math.cos(rx), math.sin(rx)
+    cy, sy = math.cos(ry), math.sin(ry)
+    cz, sz = math.cos(rz), math.sin(rz)
+    mx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    my = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    mz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return mz @ my @ mx
+
+def _quat_matrix(x, y, z, w):
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+
+def node_matrix(node):
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T  # column-major
+    m = np.eye(4)
+    m[:3, :3] = _quat_matrix(*node.get("rotation", (0, 0, 0, 1))) * np.array(node.get("scale", (1, 1, 1)))
+    m[:3, 3] = node.get("translation", (0, 0, 0))
+    return m
+
+def read_accessor(gltf, blob, index):
+    acc = gltf["accessors"][index]
+    if "sparse" in acc:
+        raise ValueError("sparse accessors are not supported")
+    dtype = np.dtype(COMPONENT_DTYPES[acc["componentType"]])
+    width = TYPE_SIZES[acc["type"]]
+    count = acc["count"]
+    if "bufferView" not in acc:
+        return np.zeros((count, width), dtype=dtype)
+    view = gltf["bufferViews"][acc["bufferView"]]
+    start = view.get("byteOffset", 0) + acc.get("byteOffset", 0)
+    stride = view.get("byteStride", 0) or dtype.itemsize * width
+    rows = np.ndarray((count, width), dtype=dtype, buffer=blob, offset=start, strides=(stride, dtype.itemsize))
+    return rows.copy()
+
+def load_glb_triangles(path: Path):
+    """
+    All triangles of the default scene in Blender axes (Z up): (positions (T, 3, 3), colours (T, 3)
+    linear RGB). Faces of nodes with a mirroring transform are re-wound so front faces stay CCW.
+    """
+    gltf, bin_offset, bin_length = read_glb_header(path)
+    blob = b""
+    if bin_offset is not None:
+        with open(path, "rb") as f:
+            f.seek(bin_offset)
+            blob = f.read(bin_length)
+
+    materials = gltf.get("materials", [])
+    tris, colours = [], []
+
+    def visit(node_index, parent):
+        node = gltf["nodes"][node_index]
+        world = parent @ node_matrix(node)
+        if "mesh" in node:
+            flip = np.linalg.det(world[:3, :3]) < 0
+            for prim in gltf["meshes"][node["mesh"]]["primitives"]:
+                if prim.get("mode", MODE_TRIANGLES) != MODE_TRIANGLES:
+                    continue
+                pos = read_accessor(gltf, blob, prim["attributes"]["POSITION"]).astype(np.float64)
+                pos = pos @ world[:3, :3].T + world[:3, 3]
+                if "indices" in prim:
+                    idx = read_accessor(gltf, blob, prim["indices"]).astype(np.int64).reshape(-1, 3)
+                else:
+                    idx = np.arange(len(pos)).reshape(-1, 3)
+                if flip:
+                    idx = idx[:, ::-1]
+                mat = materials[prim["material"]] if "material" in prim else {}
+                rgb = mat.get("pbrMetallicRoughness", {}).get("baseColorFactor", (1, 1, 1, 1))[:3]
+                tris.append(pos[idx])
+                colours.append(np.tile(rgb, (len(idx), 1)))
+        for child in node.get("children", []):
+            visit(child, world)
+
+    scenes = gltf.get("scenes", [])
+    roots = scenes[gltf.get("scene", 0)]["nodes"] if scenes else range(len(gltf.get("nodes", [])))
+    for r in roots:
+        visit(r, np.eye(4))
+
+    if not tris:
+        return np.zeros((0, 3, 3)), np.zeros((0, 3))
+    tris = np.concatenate(tris)
+    # glTF Y-up -> Blender Z-up: (x, y, z) -> (x, -z, y)
+    tris = tris[..., [0, 2, 1]] * np.array([1.0, -1.0, 1.0])
+    return tris, np.concatenate(colours)
+
+# =========================
+# PROJECTION + SHADING
+# =========================
+def center_on_ground(tris):
+    """Bounds centre to the origin in x/y, bottom on z=0 (center_object_on_ground)."""
+    pts = tris.reshape(-1, 3)
+    lo, hi = pts.min(axis=0), pts.max(axis=0)
+    return tris - np.array([(lo[0] + hi[0]) / 2, (lo[1] + hi[1]) / 2, lo[2]])
+
+def ortho_scale_for(tris):
+    pts = tris.reshape(-1, 3)
+    max_dim = float((pts.max(axis=0) - pts.min(axis=0)).max())
+    return max_dim * ORTHO_FIT if max_dim > 0 else 3.0
+
+def linear_to_srgb(c):
+    c = np.clip(c, 0.0, 1.0)
+    return np.where(c <= 0.0031308, c * 12.92, 1.055 * np.power(c, 1 / 2.4) - 0.055)
+
+def shade_faces(tris, colours):
+    """
+    Cull back faces and flat-shade the rest: returns (tris, normals, sRGB colours as 0-255 ints) of
+    the faces facing the camera.
+    """
+    cam_rot = euler_to_matrix(*CAMERA_ROTATION)
+    forward = cam_rot @ np.array([0.0, 0.0, -1.0])
+    to_sun = -(euler_to_matrix(*SUN_ROTATION) @ np.array([0.0, 0.0, -1.0]))
+
+    normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    length = np.linalg.norm(normals, axis=1)
+    keep = (length > 1e-12) & (normals @ forward < 0)
+    tris, colours = tris[keep], colours[keep]
+    normals = normals[keep] / length[keep, None]
+
+    lambert = np.round(np.clip(normals @ to_sun, 0.0, None) * SHADE_LEVELS) / SHADE_LEVELS
+    light = AMBIENT + DIFFUSE * lambert
+    srgb = linear_to_srgb(colours * light[:, None])
+    return tris, normals, np.round(srgb * 255).astype(np.int64)
+
+def project(tris, ortho_scale, size):
+    """Camera-space projection to SVG pixels: ((T, 3, 2) xy, (T, 3) distance from the camera)."""
+    cam_rot = euler_to_matrix(*CAMERA_ROTATION)
+    local = (tris - np.array(CAMERA_LOCATION)) @ cam_rot   # world -> camera axes
+    x = (local[..., 0] / ortho_scale + 0.5) * size
+    y = (0.5 - local[..., 1] / ortho_scale) * size
+    return np.stack([x, y], axis=-1), -local[..., 2]
+
+def visible_faces(xy, depth, size):
+    """Indices of the faces that win at least one sample of a SUPERSAMPLE x size z-buffer."""
+    n = size * SUPERSAMPLE
+    zbuf = np.full((n, n), np.inf)
+    ids = np.full((n, n), -1, dtype=np.int64)
+    pts = xy * SUPERSAMPLE
+    for i, ((x0, y0), (x1, y1), (x2, y2)) in enumerate(pts):
+        area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+        if abs(area) < 1e-12:
+            continue
+        lo_x = max(int(math.floor(min(x0, x1, x2))), 0)
+        hi_x = min(int(math.ceil(max(x0, x1, x2))), n)
+        lo_y = max(int(math.floor(min(y0, y1, y2))), 0)
+        hi_y = min(int(math.ceil(max(y0, y1, y2))), n)
+        if lo_x >= hi_x or lo_y >= hi_y:
+            continue
+        sx, sy = np.meshgrid(np.arange(lo_x, hi_x) + 0.5, np.arange(lo_y, hi_y) + 0.5)
+        # barycentric weights of the sample centres
+        w0 = ((x1 - sx) * (y2 - sy) - (x2 - sx) * (y1 - sy)) / area
+        w1 = ((x2 - sx) * (y0 - sy) - (x0 - sx) * (y2 - sy)) / area
+        w2 = 1.0 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        z = w0 * depth[i, 0] + w1 * depth[i, 1] + w2 * depth[i, 2]
+        win = inside & (z < zbuf[lo_y:hi_y, lo_x:hi_x])
+        zbuf[lo_y:hi_y, lo_x:hi_x][win] = z[win]
+        ids[lo_y:hi_y, lo_x:hi_x][win] = i
+    return np.unique(ids[ids >= 0])
+
+# =========================
+# POLYGON MERGING
+# =========================
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def merge_faces(tris, normals, rgb):
+    """
+    Group triangles that share an edge and a colour and meet at less than MERGE_ANGLE. Returns
+    (welded vertex ids (T, 3), list of triangle index arrays, one per group).
+    """
+    n = len(tris)
+    if n == 0:
+        return np.zeros((0, 3), dtype=np.int64), []
+    _, vid = np.unique(np.round(tris.reshape(-1, 3) / WELD).astype(np.int64), axis=0, return_inverse=True)
+    vid = vid.reshape(n, 3)
+
+    _, face_class = np.unique(rgb, axis=0, return_inverse=True)
+    face_class = face_class.ravel()
+
+    # undirected edges; pairs of faces sharing one (within a class) get joined
+    edges = np.stack([vid, np.roll(vid, -1, axis=1)], axis=-1).reshape(-1, 2)
+    edges.sort(axis=1)
+    owner = np.repeat(np.arange(n), 3)
+    order = np.lexsort((face_class[owner], edges[:, 1], edges[:, 0]))
+    e, o = edges[order], owner[order]
+    same = (e[1:] == e[:-1]).all(axis=1) & (face_class[o[1:]] == face_class[o[:-1]])
+    same &= np.einsum("ij,ij->i", normals[o[1:]], normals[o[:-1]]) >= math.cos(MERGE_ANGLE)
+
+    parent = list(range(n))
+    for a, b in zip(o[:-1][same], o[1:][same]):
+        ra, rb = _find(parent, a), _find(parent, b)
+        if ra != rb:
+            parent[rb] = ra
+    roots = np.array([_find(parent, i) for i in range(n)])
+    groups = np.split(np.argsort(roots, kind="stable"), np.flatnonzero(np.diff(np.sort(roots))) + 1)
+    return vid, groups
+
+def group_outline(vid, faces):
+    """Boundary loops (lists of welded vertex ids) of a group of triangles, in their winding order."""
+    directed = {}
+    for f in faces:
+        a, b, c = vid[f]
+        for u, v in ((a, b), (b, c), (c, a)):
+            directed[(u, v)] = directed.get((u, v), 0) + 1
+    nxt = {}
+    for (u, v), count in directed.items():
+        if (v, u) not in directed:
+            nxt.setdefault(u, []).extend([v] * count)
+
+    loops = []
+    while nxt:
+        start = next(iter(nxt))
+        loop = [start]
+        u = start
+        while True:
+            v = nxt[u].pop()
+            if not nxt[u]:
+                del nxt[u]
+            if v == start or v not in nxt:
+                break
+            loop.append(v)
+            u = v
+        if len(loop) >= 3:
+            loops.append(loop)
+    return loops
+
+def simplify_loop(pts):
+    """Drop outline points that are (almost) on the line between their neighbours or too close."""
+    out = []
+    for p in pts:
+        if out and abs(p[0] - out[-1][0]) < MIN_STEP and abs(p[1] - out[-1][1]) < MIN_STEP:
+            continue
+        if len(out) >= 2:
+            (ax, ay), (bx, by) = out[-2], out[-1]
+            if abs((bx - ax) * (p[1] - ay) - (by - ay) * (p[0] - ax)) < MIN_STEP * MIN_STEP:
+                out[-1] = p
+                continue
+        out.append(p)
+    return out if len(out) >= 3 else []
+
+# =========================
+# SVG
+# =========================
+def _num(tenths):
+    whole, frac = divmod(abs(tenths), 10)
+    text = (str(whole) if whole else "") + (f".{frac}" if frac else "")
+    return ("-" if tenths < 0 else "") + (text or "0")
+
+def path_loop(pts):
+    """One closed subpath: absolute start, then relative steps on a 0.1 px grid (much shorter)."""
+    q = [(round(x * 10), round(y * 10)) for x, y in pts]
+    out = f"M{_num(q[0][0])} {_num(q[0][1])}l"
+    first = True
+    for (ax, ay), (bx, by) in zip(q, q[1:]):
+        for token in (_num(bx - ax), _num(by - ay)):
+            out += token if first or token.startswith("-") else " " + token
+            first = False
+    return out + "z"
+
+def variant_polygons(glb: Path, size):
+    """SVG path elements for one variant, painted far to near."""
+    tris, colours = load_glb_triangles(glb)
+    if len(tris) == 0:
+        return []
+    tris = center_on_ground(tris)
+    scale = ortho_scale_for(tris)
+    tris, normals, rgb = shade_faces(tris, colours)
+    xy, depth = project(tris, scale, size)
+    seen = visible_faces(xy, depth, size)
+    tris, normals, rgb, xy, depth = tris[seen], normals[seen], rgb[seen], xy[seen], depth[seen]
+    vid, groups = merge_faces(tris, normals, rgb)
+
+    # 2D position of every welded vertex
+    points = np.zeros((vid.max() + 1 if len(vid) else 0, 2))
+    points[vid.ravel()] = xy.reshape(-1, 2)
+
+    shapes = []
+    for faces in groups:
+        loops = [simplify_loop(points[loop].tolist()) for loop in group_outline(vid, faces)]
+        loops = [loop for loop in loops if loop]
+        if not loops:
+            continue
+        d = "".join(path_loop(loop) for loop in loops)
+        r, g, b = rgb[faces[0]]
+        colour = f"#{r:02x}{g:02x}{b:02x}"
+        shapes.append((float(depth[faces].mean()), f'<path d="{d}" fill="{colour}" stroke="{colour}"/>'))
+    shapes.sort(key=lambda s: -s[0])
+    return [s for _, s in shapes]
+
+def svg_three(cells, size):
+    """Same sheet as render_previews_svg.svg_wrap_three, with vector cells (None = missing)."""
+    W = size * 3
+    H = size
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{W}" height="{H}" viewBox="0 0 {W} {H}">',
+        '<rect width="100%" height="100%" fill="white"/>'
+    ]
+    for i, shapes in enumerate(cells):
+        x = i * size
+        if shapes is not None:
+            # matching stroke hides the anti-aliasing seams between neighbouring polygons
+            parts.append(f'<g transform="translate({x},0)" stroke-width="0.6" stroke-linejoin="round" fill-rule="evenodd">')
+            parts.extend(shapes)
+            parts.append("</g>")
+        else:
+            parts.append(f'<rect x="{x}" y="0" width="{size}" height="{size}" fill="#f2f2f2"/>')
+            parts.append(f'<text x="{x + 20}" y="{H/2}" font-family="Arial" font-size="18" fill="#888">missing</text>')
+        parts.append(
+            f'<text x="{x + 10}" y="{H - 12}" font-family="Arial" font-size="18" fill="#333">v{i}</text>'
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+def write_prop_svg(export_dir: Path, out_dir: Path, base, size):
+    cells = []
+    for v in VARIANTS:
+        glb = export_dir / f"{base}_v{v}.glb"
+        cells.append(variant_polygons(glb, size) if glb.exists() else None)
+    out = out_dir / f"{base}.svg"
+    out.write_text(svg_three(cells, size), encoding="utf-8")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Vector SVG previews from GLB mesh data (no Blender).")
+    ap.add_argument("export_dir")
+    ap.add_argument("--size", type=int, default=256, help="pixels per variant cell")
+    ap.add_argument("--out-dir", default=None, help="default: <export_dir>/previews")
+    ap.add_argument("--no-index", action="store_true", help="skip _preview_index.html")
+    args = ap.parse_args()
+
+    export_dir = Path(args.export_dir)
+    out_dir = Path(args.out_dir) if args.out_dir else export_dir / "previews"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    bases = find_base_props(export_dir)
+    if not bases:
+        raise SystemExit(f"No *_v0.glb files found in {export_dir}")
+
+    t0 = time.perf_counter()
+    total = 0
+    for base in bases:
+        out = write_prop_svg(export_dir, out_dir, base, args.size)
+        total += out.stat().st_size
+        print("Wrote:", str(out))
+    if not args.no_index:
+        write_index(out_dir, bases)
+    print(f"{len(bases)} vector previews, {total / 1024:.0f} KiB, in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+# work_queue.py
+# Plain CPython: distributed build over a shared filesystem (NFS), no service needed. A coordinator
+# writes one job file per prop (or per variant) into a queue directory; workers on any host claim
+# jobs by renaming them, run the existing generator / preview renderer in headless Blender and write
+# the result (metadata fragment, output hashes, journal entries) back into the queue; the
+# coordinator then merges the results into the export dir.
+#
+# Queue layout:
+#   queue.json              export dir, generator, extra script arguments (written by submit)
+#   pending/<job>.json      waiting
+#   claimed/<job>.json.<worker>
+#                           claimed by os.rename (atomic on one filesystem, NFS included): of several
+#                           workers renaming the same file exactly one succeeds. The worker touches
+#                           the file while the job runs; `requeue --stale` returns dead workers' jobs.
+#   done/<job>.json         job + result, merged into the export dir by `collect` (then moved to collected/)
+#   failed/<job>.json       job + exit code and log tail; `requeue --failed` retries them
+#   work/<job>/             private export dir of a running generate job (removed when done)
+#   logs/<job>.log          Blender output
+#
+# Generate jobs build into their private dir (--props <name> [--variants <n>] --stream --no-pack),
+# so concurrent jobs never write the same metadata file; the worker moves the GLBs into the export
+# dir and `collect` merges the metadata fragments, appends the journal entries to
+# park_props_journal.jsonl (so a later --resume skips that work) and merges the combined pack.
+# Preview jobs render one prop's sheet straight into <export_dir>/previews (the tile cache is safe to
+# share) with a per-job journal; `collect` appends those entries to previews/_journal.jsonl and
+# writes the index.
+#
+# Every host must see the queue and export dir at the same paths. Variant seeds use hash(), so
+# workers pin PYTHONHASHSEED (as build.py and bench_pipeline.py do).
+#
+# Usage:
+#   python work_queue.py submit /mnt/shared/queue /mnt/shared/park_pack generate --tiers large
+#   python work_queue.py work /mnt/shared/queue --blender /opt/blender/blender     # on every host
+#   python work_queue.py work /mnt/shared/queue --processes 4                      # local test: 4 workers
+#   python work_queue.py status /mnt/shared/queue
+#   python work_queue.py collect /mnt/shared/queue
+#   python work_queue.py submit /mnt/shared/queue /mnt/shared/park_pack previews -- --quality workbench
+#
+import argparse
+import ast
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import glb_pack
+import prop_filter
+from preview_index import find_base_props, write_index
+
+# =========================
+# CONFIG
+# =========================
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_GENERATOR = SCRIPT_DIR / "variantWatchv5.py"
+PREVIEW_SCRIPT = SCRIPT_DIR / "render_previews_svg.py"
+METADATA_NAME = "park_props_metadata.json"
+PACK_NAME = "park_props_pack_all.glb"
+JOURNAL_NAME = "park_props_journal.jsonl"
+QUEUE_HASH_SEED = "0"
+STATES = ("pending", "claimed", "done", "failed", "collected")
+HEARTBEAT = 30.0       # seconds between touches of a claimed job file
+POLL = 5.0             # seconds between queue scans with --wait
+LOG_TAIL = 40          # log lines kept in a failed job's file
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Shared-filesystem work queue for generator and preview jobs.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("submit", help="write one job per prop (or variant) into the queue")
+    p.add_argument("queue")
+    p.add_argument("export_dir")
+    p.add_argument("kind", choices=("generate", "previews"))
+    p.add_argument("--generator", default=str(DEFAULT_GENERATOR))
+    p.add_argument("--per-variant", action="store_true", help="generate: one job per variant instead of per prop")
+    prop_filter.add_args(p)
+
+    p = sub.add_parser("work", help="claim and run jobs until the queue is empty")
+    p.add_argument("queue")
+    p.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    p.add_argument("--processes", type=int, default=1, help="worker processes on this host")
+    p.add_argument("--max-jobs", type=int, default=0, help="stop after this many jobs (0 = no limit)")
+    p.add_argument("--wait", action="store_true", help="keep polling while other workers still hold jobs")
+
+    p = sub.add_parser("requeue", help="return jobs to pending")
+    p.add_argument("queue")
+    p.add_argument("--stale", type=float, default=0, metavar="SECONDS",
+                   help="claimed jobs whose worker has not touched them for this long")
+    p.add_argument("--failed", action="store_true", help="failed jobs")
+
+    p = sub.add_parser("status", help="job counts per state")
+    p.add_argument("queue")
+
+    p = sub.add_parser("collect", help="merge finished jobs into the export dir")
+    p.add_argument("queue")
+    p.add_argument("--no-pack", action="store_true", help=f"do not re-merge {PACK_NAME}")
+
+    # everything after "--" is passed to every job's script
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = ap.parse_args(argv[:split])
+    args.extra = argv[split + 1:]
+    return args
+
+# =========================
+# QUEUE FILES
+# =========================
+def state_dir(queue: Path, state):
+    return queue / state
+
+def write_json(path: Path, data):
+    """Write via a temp file and rename, so readers on other hosts never see a partial file."""
+    tmp = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def read_json(path: Path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def job_files(queue: Path, state):
+    return sorted(p for p in state_dir(queue, state).iterdir() if not p.name.startswith("."))
+
+def claim(queue: Path, worker):
+    """Rename the first pending job we can into claimed/; (job, claimed path) or None when empty."""
+    for path in job_files(queue, "pending"):
+        target = state_dir(queue, "claimed") / f"{path.name}.{worker}"
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            # another worker won the rename (NFS may also report a retried rename of ours this way)
+            if not target.exists():
+                continue
+        return read_json(target), target
+    return None
+
+def _heartbeat(path: Path, stop: threading.Event):
+    while not stop.wait(HEARTBEAT):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return
+
+# =========================
+# SUBMIT
+# =========================
+def generator_props(script: Path):
+    """(PROPS, VARIANTS_PER_PROP) read from the generator's source without running Blender."""
+    values = {}
+    for node in ast.parse(Path(script).read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in ("PROPS", "VARIANTS_PER_PROP"):
+                values[node.targets[0].id] = ast.literal_eval(node.value)
+    return values["PROPS"], values["VARIANTS_PER_PROP"]
+
+def submit(args):
+    queue, export_dir = Path(args.queue).resolve(), Path(args.export_dir).resolve()
+    for state in STATES:
+        state_dir(queue, state).mkdir(parents=True, exist_ok=True)
+    (queue / "logs").mkdir(exist_ok=True)
+    config = read_json(queue / "queue.json") if (queue / "queue.json").exists() else {}
+    if config.get("exportDir", str(export_dir)) != str(export_dir):
+        sys.exit(f"{queue} already serves {config['exportDir']}")
+    config.update(exportDir=str(export_dir), generator=str(Path(args.generator).resolve()))
+    config.setdefault("extra", {})[args.kind] = args.extra
+    write_json(queue / "queue.json", config)
+
+    jobs = []
+    if args.kind == "generate":
+        props, per_prop = generator_props(args.generator)
+        variants = [v for v in range(per_prop) if prop_filter.variant_selected(args, v)]
+        for name, tier, *_ in props:
+            if not prop_filter.prop_selected(args, name, tier):
+                continue
+            if args.per_variant:
+                jobs += [(f"{name}_v{v}", {"props": [name], "variants": [v]}) for v in variants]
+            else:
+                jobs.append((name, {"props": [name], "variants": variants if args.variants else None}))
+    else:
+        bases = prop_filter.select_bases(args, find_base_props(export_dir), export_dir / METADATA_NAME)
+        jobs = [(base, {"props": [base], "variants": args.variants}) for base in bases]
+
+    # the random part keeps two submits of the same prop within one second from sharing an id
+    stamp = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    for k, (label, spec) in enumerate(jobs):
+        job_id = f"{stamp}-{k:05d}-{args.kind}-{label}"
+        write_json(state_dir(queue, "pending") / f"{job_id}.json", {"id": job_id, "kind": args.kind, **spec})
+    print(f"Submitted {len(jobs)} {args.kind} jobs to {queue}")
+
+# =========================
+# WORK
+# =========================
+def job_filter_args(job):
+    out = ["--props", ",".join(job["props"])]
+    if job.get("variants"):
+        out += ["--variants", ",".join(map(str, job["variants"]))]
+    return out
+
+def run_blender(blender, script, script_args, log_path: Path):
+    env = dict(os.environ)
+    env["PYTHONHASHSEED"] = QUEUE_HASH_SEED
+    cmd = [blender, "--background", "--factory-startup", "--python-use-system-env",
+           "--python", str(script), "--", *map(str, script_args)]
+    with open(log_path, "w", encoding="utf-8") as log:
+        return subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT, env=env).returncode
+
+def journal_lines(path: Path):
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return []
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def run_generate(config, job, blender, queue: Path, log_path: Path):
+    """Build into work/<job>/, move the GLBs into the export dir; (exit code, result)."""
+    export_dir = Path(config["exportDir"])
+    work = queue / "work" / job["id"]
+    if work.exists():
+        shutil.rmtree(work)  # left by a worker that died on this job
+    work.mkdir(parents=True)
+    try:
+        code = run_blender(blender, config["generator"],
+                           [work, "--stream", "--no-pack", *job_filter_args(job), *config["extra"].get("generate", [])],
+                           log_path)
+        if code != 0:
+            return code, {}
+        export_dir.mkdir(parents=True, exist_ok=True)
+        metadata = read_json(work / METADATA_NAME)
+        for prop in metadata["props"]:
+            for var in prop["variants"]:
+                shutil.move(str(work / var["file"]), str(export_dir / var["file"]))
+        return 0, {"metadata": metadata, "journal": journal_lines(work / JOURNAL_NAME)}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+def run_previews(config, job, blender, queue: Path, log_path: Path):
+    """Render one prop's sheet into <export_dir>/previews with a per-job journal; (exit code, result)."""
+    export_dir = Path(config["exportDir"])
+    journal_name = f"_journal_{job['id']}.jsonl"
+    journal_path = export_dir / "previews" / journal_name
+    try:
+        code = run_blender(blender, PREVIEW_SCRIPT,
+                           [export_dir, "--no-index", "--journal", journal_name, *job_filter_args(job),
+                            *config["extra"].get("previews", [])],
+                           log_path)
+        return code, {"journal": journal_lines(journal_path)} if code == 0 else {}
+    finally:
+        journal_path.unlink(missing_ok=True)
+
+RUNNERS = {"generate": run_generate, "previews": run_previews}
+
+def log_tail(path: Path):
+    try:
+        return path.read_text(encoding="utf-8", errors="replace").splitlines()[-LOG_TAIL:]
+    except FileNotFoundError:
+        return []
+
+def work(args):
+    queue = Path(args.queue).resolve()
+    if args.processes > 1:
+        # local test / multi-process host: the same command once per process
+        cmd = [sys.executable, str(Path(__file__).resolve()), "work", str(queue), "--blender", args.blender,
+               "--max-jobs", str(args.max_jobs), *(["--wait"] if args.wait else [])]
+        procs = [subprocess.Popen(cmd) for _ in range(args.processes)]
+        sys.exit(max(p.wait() for p in procs))
+
+    config = read_json(queue / "queue.json")
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    ran = failed = 0
+    while not args.max_jobs or ran < args.max_jobs:
+        claimed = claim(queue, worker)
+        if claimed is None:
+            if args.wait and job_files(queue, "claimed"):
+                time.sleep(POLL)
+                continue
+            break
+        job, claim_path = claimed
+        log_path = queue / "logs" / f"{job['id']}.log"
+        print(f"[{worker}] {job['id']}")
+
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(claim_path, stop), daemon=True)
+        beat.start()
+        t0 = time.perf_counter()
+        try:
+            code, result = RUNNERS[job["kind"]](config, job, args.blender, queue, log_path)
+        except Exception as exc:  # the job fails, the worker carries on
+            code, result = -1, {"error": f"{type(exc).__name__}: {exc}"}
+        finally:
+            stop.set()
+            beat.join()
+        seconds = time.perf_counter() - t0
+
+        record = {**job, "worker": worker, "seconds": round(seconds, 2), "exitCode": code, **result}
+        if code == 0:
+            write_json(state_dir(queue, "done") / f"{job['id']}.json", record)
+        else:
+            failed += 1
+            record["log"] = log_tail(log_path)
+            write_json(state_dir(queue, "failed") / f"{job['id']}.json", record)
+            print(f"[{worker}] {job['id']} FAILED (exit {code}), see {log_path}")
+        claim_path.unlink(missing_ok=True)
+        ran += 1
+
+    print(f"[{worker}] {ran} jobs, {failed} failed")
+    sys.exit(1 if failed else 0)
+
+# =========================
+# REQUEUE / STATUS
+# =========================
+def requeue(args):
+    queue = Path(args.queue).resolve()
+    moved = 0
+    if args.stale:
+        now = time.time()
+        for path in job_files(queue, "claimed"):
+            if now - path.stat().st_mtime > args.stale:
+                job_name = path.name.split(".json.", 1)[0] + ".json"
+                try:
+                    os.rename(path, state_dir(queue, "pending") / job_name)
+                    moved += 1
+                except FileNotFoundError:
+                    pass  # its worker finished in the meantime
+    if args.failed:
+        for path in job_files(queue, "failed"):
+            job = read_json(path)
+            write_json(state_dir(queue, "pending") / path.name,
+                       {k: job[k] for k in ("id", "kind", "props", "variants")})
+            path.unlink()
+            moved += 1
+    print(f"Requeued {moved} jobs")
+
+def status(args):
+    queue = Path(args.queue).resolve()
+    counts = {state: len(job_files(queue, state)) for state in STATES}
+    print("  ".join(f"{state} {n}" for state, n in counts.items()))
+    for path in job_files(queue, "claimed"):
+        print(f"  running: {path.name} ({time.time() - path.stat().st_mtime:.0f}s since last heartbeat)")
+    for path in job_files(queue, "failed"):
+        print(f"  failed:  {path.stem}: exit {read_json(path)['exitCode']}")
+
+# =========================
+# COLLECT
+# =========================
+def append_journal(path: Path, entries):
+    if entries:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(e) + "\n" for e in entries)
+
+def collect(args):
+    queue = Path(args.queue).resolve()
+    config = read_json(queue / "queue.json")
+    export_dir = Path(config["exportDir"])
+    meta_path = export_dir / METADATA_NAME
+
+    finished = job_files(queue, "done")
+    generated = previewed = 0
+    metadata = read_json(meta_path) if meta_path.exists() else None
+    for path in finished:
+        job = read_json(path)
+        if job["kind"] == "generate":
+            metadata = job["metadata"] if metadata is None else prop_filter.merge_into(metadata, job["metadata"])
+            append_journal(export_dir / JOURNAL_NAME, job["journal"])
+            generated += 1
+        else:
+            append_journal(export_dir / "previews" / "_journal.jsonl", job["journal"])
+            previewed += 1
+
+    if generated:
+        write_json(meta_path, metadata)
+        print("Metadata:", str(meta_path))
+        if not args.no_pack:
+            glbs = [export_dir / var["file"] for p in metadata["props"] for var in p["variants"]]
+            glb_pack.merge_glb_files(glbs, export_dir / PACK_NAME)
+            print("Combined pack:", str(export_dir / PACK_NAME))
+    if previewed:
+        preview_dir = export_dir / "previews"
+        write_index(preview_dir, [b for b in find_base_props(export_dir) if (preview_dir / f"{b}.svg").exists()])
+
+    for path in finished:
+        os.replace(path, state_dir(queue, "collected") / path.name)
+
+    left = {state: len(job_files(queue, state)) for state in ("pending", "claimed", "failed")}
+    print(f"Collected {generated} generate and {previewed} preview jobs; "
+          f"{left['pending']} pending, {left['claimed']} running, {left['failed']} failed")
+    if any(left.values()):
+        sys.exit(1)
+
+def main():
+    args = parse_args()
+    {"submit": submit, "work": work, "requeue": requeue, "status": status, "collect": collect}[args.command](args)
+
+if __name__ == "__main__":
+    main()